@@ -2,8 +2,22 @@
 
 __all__ = [
     "generator",
+    "parallel",
     "utils",
+    "fingerprint",
     "storage",
+    "storage_index",
+    "snapshot",
     "storage_pg",
+    "storage_sqlite",
+    "backends",
+    "transfer",
+    "formats",
+    "audit",
+    "aio",
     "commands",
+    "batch",
+    "daemon",
+    "client",
+    "bench",
 ]
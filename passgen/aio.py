@@ -0,0 +1,219 @@
+"""Асинхронный интерфейс к хранилищам паролей.
+
+Функции модуля не блокируют цикл событий:
+
+* файловое хранилище работает в пуле потоков, а одновременные сохранения в
+  один файл объединяются в общие дописывания через
+  :class:`storage.GroupCommitWriter` — один ``write``, один ``fsync`` и
+  одна блокировка на пачку;
+* PostgreSQL используется через асинхронный драйвер ``asyncpg`` с пулом
+  соединений на каждый DSN, поэтому одновременные запросы выполняются на
+  разных соединениях, а не по очереди.
+
+Пулы и писатели файлов привязаны к циклу событий, в котором были созданы.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from . import fingerprint, storage, storage_pg, utils
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PasswordPolicy
+
+_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Path, storage.GroupCommitWriter]]" = (
+    weakref.WeakKeyDictionary()
+)
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+_SELECT = storage_pg._SELECT_SQL
+
+
+def _import_asyncpg():
+    """Импортировать asyncpg с понятным сообщением об ошибке."""
+    try:
+        import asyncpg  # type: ignore
+    except ImportError as exc:
+        raise ImportError("Установите пакет asyncpg для асинхронной работы с PostgreSQL") from exc
+    return asyncpg
+
+
+def _file_writer(path: Path) -> storage.GroupCommitWriter:
+    """Вернуть общего для цикла событий писателя файла хранения."""
+    writers = _writers.setdefault(asyncio.get_running_loop(), {})
+    writer = writers.get(path)
+    if writer is None:
+        writer = writers[path] = storage.GroupCommitWriter(str(path))
+    return writer
+
+
+async def _init_connection(conn) -> None:
+    """Научить соединение asyncpg читать и писать JSONB как объекты Python."""
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def _get_pool(dsn: str):
+    """Вернуть пул asyncpg для DSN, создав его и схему при первом обращении."""
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get(dsn)
+    if pool is not None:
+        return pool
+    asyncpg = _import_asyncpg()
+    pool = await asyncpg.create_pool(
+        dsn,
+        min_size=storage_pg.POOL_MIN_SIZE,
+        max_size=storage_pg.POOL_MAX_SIZE,
+        init=_init_connection,
+    )
+    async with pool.acquire() as conn:
+        await conn.execute(storage_pg._CREATE_TABLE_SQL)
+        try:
+            await conn.execute(storage_pg._CREATE_TRGM_SQL)
+            await conn.execute(storage_pg._CREATE_LABEL_INDEX_SQL)
+        except asyncpg.PostgresError:
+            pass
+    # Another task may have created a pool while this one was connecting.
+    existing = pools.setdefault(dsn, pool)
+    if existing is not pool:
+        await pool.close()
+    return existing
+
+
+async def close_pools() -> None:
+    """Закрыть пулы asyncpg, открытые в текущем цикле событий."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.close()
+
+
+def _parse_timestamp(value: object) -> datetime:
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+async def store_password(
+    password: str,
+    *,
+    label: str,
+    length: int | None = None,
+    options: Dict[str, bool] | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+    policy: PasswordPolicy | None = None,
+) -> Tuple[Dict[str, object], object]:
+    """Асинхронно сохранить хэш пароля с метаданными.
+
+    Args:
+        password (str): Пароль в открытом виде.
+        label (str): Метка записи.
+        length (int | None): Длина сгенерированного пароля.
+        options (Dict[str, bool] | None): Использованные опции генерации.
+        storage_file (str | None): Файл хранения.
+        storage_dsn (str | None): Строка подключения PostgreSQL (имеет приоритет).
+        policy (PasswordPolicy | None): Политика, из которой берутся длина и опции.
+
+    Returns:
+        Tuple[Dict[str, object], object]: Созданная запись и путь к файлу или DSN.
+
+    Raises:
+        ImportError: Если для PostgreSQL не установлен asyncpg.
+    """
+    length, options = utils.resolve_metadata(length, options, policy)
+    # Slow fingerprint schemes must not stall the event loop.
+    entry = await asyncio.to_thread(utils.build_entry, password, label=label, length=length, options=options)
+    if storage_dsn:
+        pool = await _get_pool(storage_dsn)
+        row = await pool.fetchrow(
+            storage_pg._INSERT_SQL.format("$1, $2, $3, $4, $5"),
+            entry["label"],
+            entry["hash"],
+            entry["length"],
+            entry["options"],
+            _parse_timestamp(entry["created_at"]),
+        )
+        return storage_pg._row_to_entry(row), storage_dsn
+    path = storage.resolve_storage_file(storage_file)
+    # Stores that overlap in the thread pool share one append and fsync.
+    await asyncio.to_thread(_file_writer(path).append, entry)
+    return entry, path
+
+
+async def search_passwords(
+    *,
+    label_query: str | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+) -> Tuple[List[Dict[str, object]], object]:
+    """Асинхронно найти записи по метке.
+
+    Args:
+        label_query (str | None): Подстрока для поиска в метке.
+        storage_file (str | None): Файл хранения.
+        storage_dsn (str | None): Строка подключения PostgreSQL (имеет приоритет).
+
+    Returns:
+        Tuple[List[Dict[str, object]], object]: Записи и путь к файлу или DSN.
+    """
+    if storage_dsn:
+        pool = await _get_pool(storage_dsn)
+        if label_query:
+            rows = await pool.fetch(f"{_SELECT} WHERE label ILIKE $1 ORDER BY id", f"%{label_query}%")
+        else:
+            rows = await pool.fetch(f"{_SELECT} ORDER BY id")
+        return [storage_pg._row_to_entry(row) for row in rows], storage_dsn
+    return await asyncio.to_thread(
+        storage.search_passwords,
+        label_query=label_query,
+        storage_file=storage_file,
+    )
+
+
+async def verify_password(
+    password: str,
+    *,
+    label_query: str | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+) -> Tuple[List[Dict[str, object]], object]:
+    """Асинхронно проверить наличие пароля по его хэшу.
+
+    Args:
+        password (str): Проверяемый пароль в открытом виде.
+        label_query (str | None): Необязательный фильтр по метке.
+        storage_file (str | None): Файл хранения.
+        storage_dsn (str | None): Строка подключения PostgreSQL (имеет приоритет).
+
+    Returns:
+        Tuple[List[Dict[str, object]], object]: Совпадающие записи и путь к файлу или DSN.
+    """
+    if storage_dsn:
+        candidates = await asyncio.to_thread(fingerprint.candidate_fingerprints, password)
+        pool = await _get_pool(storage_dsn)
+        if label_query:
+            rows = await pool.fetch(
+                f"{_SELECT} WHERE hash = ANY($1::text[]) AND label ILIKE $2",
+                candidates,
+                f"%{label_query}%",
+            )
+        else:
+            rows = await pool.fetch(f"{_SELECT} WHERE hash = ANY($1::text[])", candidates)
+        return [storage_pg._row_to_entry(row) for row in rows], storage_dsn
+    return await asyncio.to_thread(
+        storage.verify_password,
+        password,
+        label_query=label_query,
+        storage_file=storage_file,
+    )
+
+
+__all__ = [
+    "store_password",
+    "search_passwords",
+    "verify_password",
+    "close_pools",
+]
@@ -0,0 +1,282 @@
+"""Массовая проверка паролей-кандидатов по хранилищу.
+
+Отпечатки хранилища загружаются один раз в компактную структуру —
+отсортированные колонки сырых 32-байтных дайджестов по схемам отпечатков. Кандидаты читаются
+потоково и хэшируются пачками в пуле процессов (для медленных схем именно
+хэширование занимает почти всё время), а совпадения отдаются по мере
+готовности пачек.
+"""
+
+from __future__ import annotations
+
+import os
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, IO, Iterable, Iterator, List, Tuple
+
+from . import fingerprint, utils
+
+#: Сколько кандидатов отправляется рабочему процессу за раз.
+DEFAULT_CHUNK_SIZE = 2048
+
+
+_DIGEST_SIZE = 32
+#: Предел размера каталога корзин: 2**24 корзин (64 МиБ на ``array("I")``).
+_MAX_BUCKET_BITS = 24
+
+
+class _DigestColumn:
+    """Отсортированные дайджесты одной схемы в одном непрерывном ``bytes``.
+
+    Рядом лежат ``array`` с номерами меток и каталог корзин по старшим битам
+    дайджеста. Число корзин подбирается по числу записей (примерно одна
+    запись на корзину), поэтому поиск — два чтения из каталога и сравнение
+    одного-двух срезов, без объектов на каждую запись.
+    """
+
+    __slots__ = ("digests", "label_ids", "starts", "shift")
+
+    def __init__(self, digests: bytearray, label_ids: array) -> None:
+        count = len(label_ids)
+        bits = min(_MAX_BUCKET_BITS, max(1, count.bit_length()))
+        self.shift = 24 - bits
+        order = sorted(range(count), key=lambda index: digests[index * _DIGEST_SIZE:(index + 1) * _DIGEST_SIZE])
+        packed = bytearray(count * _DIGEST_SIZE)
+        sorted_ids = array("I", bytes(4 * count))
+        starts = array("I", bytes(4 * ((1 << bits) + 1)))
+        for position, index in enumerate(order):
+            start = index * _DIGEST_SIZE
+            packed[position * _DIGEST_SIZE:(position + 1) * _DIGEST_SIZE] = digests[start:start + _DIGEST_SIZE]
+            sorted_ids[position] = label_ids[index]
+            starts[(int.from_bytes(digests[start:start + 3], "big") >> self.shift) + 1] += 1
+        for bucket in range(1, len(starts)):
+            starts[bucket] += starts[bucket - 1]
+        self.digests = bytes(packed)
+        self.label_ids = sorted_ids
+        self.starts = starts
+
+    def find_many(self, digests: Iterable[bytes]) -> List[List[int]]:
+        """Вернуть номера меток записей для каждого из дайджестов.
+
+        Каталог корзин и колонка читаются в локальные переменные один раз
+        на вызов, поэтому пачка кандидатов проверяется без лишних обращений
+        к атрибутам.
+
+        Args:
+            digests (Iterable[bytes]): Дайджесты кандидатов.
+
+        Returns:
+            List[List[int]]: Номера меток совпавших записей по порядку дайджестов.
+        """
+        starts, shift, packed, label_ids = self.starts, self.shift, self.digests, self.label_ids
+        from_bytes = int.from_bytes
+        results = []
+        for digest in digests:
+            bucket = from_bytes(digest[:3], "big") >> shift
+            low = starts[bucket]
+            high = starts[bucket + 1]
+            found = []
+            while low < high:
+                offset = low * _DIGEST_SIZE
+                if packed[offset:offset + _DIGEST_SIZE] == digest:
+                    found.append(label_ids[low])
+                low += 1
+            results.append(found)
+        return results
+
+
+class StoredFingerprints:
+    """Отпечатки хранилища, сгруппированные по схеме.
+
+    Дайджесты каждой схемы хранятся как сырые 32 байта в отсортированной
+    колонке (:class:`_DigestColumn`), а метки — в общем списке без
+    повторов, поэтому на запись приходится около 40 байт плюс уникальные
+    метки.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._columns: Dict[str, _DigestColumn] = {}
+        self._labels: List[str] = []
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, object]]) -> "StoredFingerprints":
+        """Собрать структуру из потока записей хранилища.
+
+        Args:
+            entries (Iterable[Dict[str, object]]): Записи хранилища.
+
+        Returns:
+            StoredFingerprints: Загруженные отпечатки.
+
+        Raises:
+            ValueError: Если хэш записи не является отпечатком.
+        """
+        stored = cls()
+        label_ids: Dict[str, int] = {}
+        pending: Dict[str, Tuple[bytearray, array]] = {}
+        for entry in entries:
+            prefix, digest = fingerprint.split_fingerprint(str(entry["hash"]))
+            label = str(entry.get("label") or "")
+            label_id = label_ids.get(label)
+            if label_id is None:
+                label_id = label_ids[label] = len(stored._labels)
+                stored._labels.append(label)
+            column = pending.get(prefix)
+            if column is None:
+                column = pending[prefix] = (bytearray(), array("I"))
+            column[0].extend(digest)
+            column[1].append(label_id)
+            stored.count += 1
+        for prefix, (digests, ids) in pending.items():
+            stored._columns[prefix] = _DigestColumn(digests, ids)
+        return stored
+
+    @property
+    def prefixes(self) -> List[str]:
+        """Префиксы схем, встречающихся в хранилище."""
+        return list(self._columns)
+
+    def match_chunk(self, hashed: List[Tuple[str, List[bytes]]], count: int) -> List[List[str]]:
+        """Сопоставить пачку кандидатов за один проход по каждой схеме.
+
+        Args:
+            hashed (List[Tuple[str, List[bytes]]]): Для каждой схемы пара
+                (префикс, дайджесты всех кандидатов пачки).
+            count (int): Число кандидатов в пачке.
+
+        Returns:
+            List[List[str]]: Метки совпавших записей для каждого кандидата.
+        """
+        results: List[List[str]] = [[] for _ in range(count)]
+        labels = self._labels
+        for prefix, digests in hashed:
+            column = self._columns.get(prefix)
+            if column is None:
+                continue
+            for index, found in enumerate(column.find_many(digests)):
+                results[index].extend(labels[label_id] for label_id in found)
+        return results
+
+
+_worker_fingerprinters: List[Tuple[str, fingerprint.Fingerprinter]] = []
+
+
+def _init_worker(prefixes: List[str], pepper: str | None) -> None:
+    """Подготовить вычислители отпечатков в рабочем процессе."""
+    _worker_fingerprinters[:] = [
+        (prefix, fingerprint.fingerprinter_for_prefix(prefix, pepper=pepper)) for prefix in prefixes
+    ]
+
+
+def _hash_chunk(candidates: List[str]) -> List[Tuple[str, List[bytes]]]:
+    """Посчитать дайджесты кандидатов по всем схемам хранилища (по колонке на схему)."""
+    return [(prefix, fingerprinter.digest_many(candidates)) for prefix, fingerprinter in _worker_fingerprinters]
+
+
+def audit_candidates(
+    candidates: Iterable[str],
+    stored: StoredFingerprints,
+    *,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pepper: str | None = None,
+) -> Iterator[Tuple[str, List[str]]]:
+    """Лениво проверить кандидатов и отдать совпадения.
+
+    Порядок совпадений совпадает с порядком кандидатов. Одновременно в
+    работе не больше ``2 * workers`` пачек, поэтому расход памяти не зависит
+    от числа кандидатов.
+
+    Args:
+        candidates (Iterable[str]): Пароли-кандидаты.
+        stored (StoredFingerprints): Отпечатки хранилища.
+        workers (int | None): Число процессов, по умолчанию ``os.cpu_count()``.
+            При 1, а также если в хранилище нет медленных схем (scrypt,
+            argon2id), хэширование идёт в текущем процессе: передача
+            кандидатов в другой процесс дороже самого SHA-256.
+        chunk_size (int): Размер пачки кандидатов.
+        pepper (str | None): Перец хранилища, по умолчанию из ``PASSGEN_PEPPER``.
+
+    Returns:
+        Iterator[Tuple[str, List[str]]]: Пары (кандидат, метки совпавших записей).
+
+    Raises:
+        ValueError: Если ``workers`` или ``chunk_size`` меньше 1 либо для схемы
+            хранилища не хватает перца.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Workers must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    if pepper is None:
+        pepper = os.environ.get(fingerprint.PEPPER_ENV) or None
+    prefixes = stored.prefixes
+    # Validate every scheme up front so that errors surface before hashing starts.
+    for prefix in prefixes:
+        fingerprint.fingerprinter_for_prefix(prefix, pepper=pepper)
+    if not prefixes:
+        return iter(())
+    chunks = utils.chunked(candidates, chunk_size)
+    slow = any(prefix.split("$", 1)[0] in fingerprint.SLOW_SCHEMES for prefix in prefixes)
+    # Fast hashes cost less than shipping candidates to another process.
+    if workers == 1 or not slow:
+        return _iter_local(chunks, stored, prefixes, pepper)
+    return _iter_parallel(chunks, stored, prefixes, pepper, workers)
+
+
+def _matches(chunk: List[str], hashed, stored: StoredFingerprints) -> Iterator[Tuple[str, List[str]]]:
+    for candidate, labels in zip(chunk, stored.match_chunk(hashed, len(chunk))):
+        if labels:
+            yield candidate, labels
+
+
+def _iter_local(chunks, stored, prefixes, pepper) -> Iterator[Tuple[str, List[str]]]:
+    _init_worker(prefixes, pepper)
+    for chunk in chunks:
+        yield from _matches(chunk, _hash_chunk(chunk), stored)
+
+
+def _iter_parallel(chunks, stored, prefixes, pepper, workers) -> Iterator[Tuple[str, List[str]]]:
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prefixes, pepper))
+    try:
+        queue: Deque[Tuple[List[str], Future]] = deque()
+        for chunk in chunks:
+            queue.append((chunk, executor.submit(_hash_chunk, chunk)))
+            if len(queue) >= 2 * workers:
+                done_chunk, future = queue.popleft()
+                yield from _matches(done_chunk, future.result(), stored)
+        while queue:
+            done_chunk, future = queue.popleft()
+            yield from _matches(done_chunk, future.result(), stored)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def read_candidates(handle: IO[str]) -> Iterator[str]:
+    """Прочитать кандидатов построчно, пропуская пустые строки.
+
+    Пробелы внутри и по краям пароля сохраняются, отбрасывается только
+    перевод строки. Файл стоит открывать с ``errors="surrogateescape"``:
+    тогда строки не в UTF-8 хэшируются как исходные байты.
+
+    Args:
+        handle (IO[str]): Открытый текстовый файл.
+
+    Yields:
+        str: Кандидаты.
+    """
+    for line in handle:
+        candidate = line.rstrip("\r\n")
+        if candidate:
+            yield candidate
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "StoredFingerprints",
+    "audit_candidates",
+    "read_candidates",
+]
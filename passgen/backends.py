@@ -0,0 +1,362 @@
+"""Реестр хранилищ, выбираемых по схеме URL.
+
+Каждое хранилище реализует протокол :class:`StorageBackend` и открывается
+по URL вида ``<схема>://<адрес>``:
+
+* ``file://<путь>`` и ``jsonl://<путь>`` — файл JSON Lines (:mod:`passgen.storage`);
+* ``sqlite://<путь>`` — база SQLite (:mod:`passgen.storage_sqlite`);
+* ``postgresql://...`` и ``postgres://...`` — PostgreSQL (:mod:`passgen.storage_pg`),
+  URL целиком передаётся драйверу как DSN.
+
+Всё после ``://`` считается путём: ``sqlite:///var/lib/passgen.db`` —
+абсолютный путь, ``sqlite://passgen.db`` — относительный. Строка без схемы
+считается путём к файлу JSON Lines. Новые хранилища подключаются через
+:func:`register_backend`.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Protocol, Tuple, Type, runtime_checkable
+
+from . import storage
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PasswordPolicy
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """Протокол хранилища хэшей паролей.
+
+    Attributes:
+        location: Путь к файлу или DSN для вывода пользователю.
+    """
+
+    location: object
+
+    def store_password(
+        self,
+        password: str,
+        *,
+        label: str,
+        length: int | None = None,
+        options: Dict[str, bool] | None = None,
+        policy: PasswordPolicy | None = None,
+    ) -> Dict[str, object]:
+        """Сохранить хэш пароля и вернуть созданную запись."""
+
+    def store_entries(self, entries: Iterable[Dict[str, object]], *, batch_size: int) -> int:
+        """Сохранить поток готовых записей пачками и вернуть их количество."""
+
+    def load_entries(self, entries: Iterable[Dict[str, object]], *, batch_size: int) -> int:
+        """Загрузить поток записей самым быстрым способом хранилища (импорт)."""
+
+    def iter_entries(self) -> Iterator[Dict[str, object]]:
+        """Потоково прочитать все записи в порядке сохранения."""
+
+    def search(
+        self,
+        label_query: str | None = None,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        after_id: int | None = None,
+    ) -> Iterator[Dict[str, object]]:
+        """Найти записи по подстроке метки с постраничным выводом."""
+
+    def verify(self, password: str, *, label_query: str | None = None) -> List[Dict[str, object]]:
+        """Найти записи с хэшем заданного пароля."""
+
+    def compact(self, *, retention: timedelta | None = None, dedupe: bool = True) -> Dict[str, int]:
+        """Удалить устаревшие записи и дубликаты, вернуть счётчики удалённого."""
+
+    def close(self) -> None:
+        """Освободить соединения хранилища; после вызова оно откроет новые."""
+
+
+def _paginate(entries: Iterable[Dict[str, object]], limit: int | None, offset: int) -> Iterator[Dict[str, object]]:
+    stop = None if limit is None else offset + limit
+    return islice(entries, offset, stop)
+
+
+class FileBackend:
+    """Хранилище в файле JSON Lines.
+
+    Args:
+        storage_file (str | None): Путь к файлу, по умолчанию :data:`storage.DEFAULT_STORAGE_FILE`.
+    """
+
+    def __init__(self, storage_file: str | None = None) -> None:
+        self.storage_file = storage_file
+        self.location = storage.resolve_storage_file(storage_file)
+
+    def store_password(self, password, *, label, length=None, options=None, policy=None):
+        entry, _ = storage.store_password(
+            password,
+            label=label,
+            length=length,
+            options=options,
+            storage_file=self.storage_file,
+            policy=policy,
+        )
+        return entry
+
+    def store_entries(self, entries, *, batch_size=storage.DEFAULT_BATCH_SIZE):
+        total, _ = storage.store_entries(entries, storage_file=self.storage_file, batch_size=batch_size)
+        return total
+
+    load_entries = store_entries
+
+    def iter_entries(self):
+        return storage.iter_entries(self.storage_file)
+
+    def search(self, label_query=None, *, limit=None, offset=0, after_id=None):
+        if after_id is not None:
+            raise ValueError("after_id is not supported by the file backend")
+        entries, _ = storage.search_passwords(label_query=label_query, storage_file=self.storage_file)
+        return _paginate(entries, limit, offset)
+
+    def verify(self, password, *, label_query=None):
+        entries, _ = storage.verify_password(password, label_query=label_query, storage_file=self.storage_file)
+        return entries
+
+    def compact(self, *, retention=None, dedupe=True):
+        return storage.compact_storage(self.storage_file, retention=retention, dedupe=dedupe)
+
+    def close(self):
+        # Files are opened per operation; nothing stays open.
+        pass
+
+
+class SQLiteBackend:
+    """Хранилище в базе SQLite.
+
+    Args:
+        path (str): Путь к файлу базы.
+    """
+
+    def __init__(self, path: str) -> None:
+        from . import storage_sqlite
+
+        self._impl = storage_sqlite
+        self.location = Path(path).expanduser().resolve()
+
+    def store_password(self, password, *, label, length=None, options=None, policy=None):
+        entry, _ = self._impl.store_password_sqlite(
+            password,
+            label=label,
+            length=length,
+            options=options,
+            path=self.location,
+            policy=policy,
+        )
+        return entry
+
+    def store_entries(self, entries, *, batch_size=storage.DEFAULT_BATCH_SIZE):
+        total, _ = self._impl.store_entries_sqlite(entries, path=self.location, batch_size=batch_size)
+        return total
+
+    load_entries = store_entries
+
+    def iter_entries(self):
+        return self._impl.iter_entries_sqlite(path=self.location)
+
+    def search(self, label_query=None, *, limit=None, offset=0, after_id=None):
+        return self._impl.iter_search_passwords_sqlite(
+            label_query=label_query,
+            path=self.location,
+            limit=limit,
+            offset=offset,
+            after_id=after_id,
+        )
+
+    def verify(self, password, *, label_query=None):
+        entries, _ = self._impl.verify_password_sqlite(password, label_query=label_query, path=self.location)
+        return entries
+
+    def compact(self, *, retention=None, dedupe=True):
+        return self._impl.compact_sqlite(path=self.location, retention=retention, dedupe=dedupe)
+
+    def close(self):
+        self._impl.close_connections(self.location)
+
+
+class PostgresBackend:
+    """Хранилище в PostgreSQL.
+
+    Args:
+        dsn (str): Строка подключения или URL ``postgresql://``.
+    """
+
+    def __init__(self, dsn: str) -> None:
+        from . import storage_pg
+
+        self._impl = storage_pg
+        self.location = dsn
+
+    def store_password(self, password, *, label, length=None, options=None, policy=None):
+        entry, _ = self._impl.store_password_postgres(
+            password,
+            label=label,
+            length=length,
+            options=options,
+            dsn=self.location,
+            policy=policy,
+        )
+        return entry
+
+    def store_entries(self, entries, *, batch_size=storage.DEFAULT_BATCH_SIZE):
+        total, _ = self._impl.store_passwords_postgres(entries, dsn=self.location, batch_size=batch_size)
+        return total
+
+    def load_entries(self, entries, *, batch_size=storage.DEFAULT_BATCH_SIZE):
+        total, _ = self._impl.copy_entries_postgres(entries, dsn=self.location, batch_size=batch_size)
+        return total
+
+    def iter_entries(self):
+        return self._impl.iter_entries_postgres(dsn=self.location)
+
+    def search(self, label_query=None, *, limit=None, offset=0, after_id=None):
+        return self._impl.iter_search_passwords_postgres(
+            label_query=label_query,
+            dsn=self.location,
+            limit=limit,
+            offset=offset,
+            after_id=after_id,
+        )
+
+    def verify(self, password, *, label_query=None):
+        entries, _ = self._impl.verify_password_postgres(password, label_query=label_query, dsn=self.location)
+        return entries
+
+    def compact(self, *, retention=None, dedupe=True):
+        return self._impl.compact_postgres(dsn=self.location, retention=retention, dedupe=dedupe)
+
+    def close(self):
+        # Pools are shared per process; this closes all of them.
+        self._impl.close_pools()
+
+
+def backend_errors() -> Tuple[Type[BaseException], ...]:
+    """Вернуть типы ошибок, которыми хранилища сообщают о сбоях.
+
+    Кроме ``OSError`` и ``ValueError`` это ``ImportError`` (нет драйвера),
+    ``sqlite3.Error`` и, если драйвер уже загружен, ``psycopg2.Error``.
+    Драйверы здесь не импортируются: ошибка PostgreSQL возможна только
+    после загрузки ``psycopg2``.
+
+    Returns:
+        Tuple[Type[BaseException], ...]: Кортеж для ``except``.
+    """
+    import sqlite3
+    import sys
+
+    errors: Tuple[Type[BaseException], ...] = (OSError, ValueError, ImportError, sqlite3.Error)
+    psycopg2 = sys.modules.get("psycopg2")
+    if psycopg2 is not None:
+        errors += (psycopg2.Error,)
+    return errors
+
+
+_REGISTRY: Dict[str, Callable[[str], StorageBackend]] = {}
+
+
+def register_backend(scheme: str, factory: Callable[[str], StorageBackend]) -> None:
+    """Зарегистрировать хранилище для схемы URL.
+
+    Args:
+        scheme (str): Схема без ``://``, например ``"sqlite"``.
+        factory (Callable[[str], StorageBackend]): Конструктор, получающий полный URL.
+    """
+    _REGISTRY[scheme.lower()] = factory
+
+
+def registered_schemes() -> List[str]:
+    """Вернуть список зарегистрированных схем."""
+    return sorted(_REGISTRY)
+
+
+def _split_url(url: str) -> tuple[str, str]:
+    scheme, separator, rest = url.partition("://")
+    if not separator:
+        return "file", url
+    return scheme.lower(), rest
+
+
+def open_backend(url: str) -> StorageBackend:
+    """Открыть хранилище по URL.
+
+    Args:
+        url (str): URL хранилища или путь к файлу JSON Lines.
+
+    Returns:
+        StorageBackend: Хранилище для схемы URL.
+
+    Raises:
+        ValueError: Если схема не зарегистрирована.
+    """
+    scheme, _ = _split_url(url)
+    factory = _REGISTRY.get(scheme)
+    if factory is None:
+        known = ", ".join(registered_schemes())
+        raise ValueError(f"Unknown storage URL scheme {scheme!r} (known: {known})")
+    return factory(url)
+
+
+def resolve_backend(
+    *,
+    storage_url: str | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+) -> StorageBackend:
+    """Выбрать хранилище по параметрам командной строки.
+
+    URL имеет приоритет над DSN, DSN — над путём к файлу.
+
+    Args:
+        storage_url (str | None): URL хранилища.
+        storage_file (str | None): Путь к файлу JSON Lines.
+        storage_dsn (str | None): Строка подключения PostgreSQL.
+
+    Returns:
+        StorageBackend: Выбранное хранилище.
+    """
+    if storage_url:
+        return open_backend(storage_url)
+    if storage_dsn:
+        return PostgresBackend(storage_dsn)
+    return FileBackend(storage_file)
+
+
+def _file_factory(url: str) -> StorageBackend:
+    return FileBackend(_split_url(url)[1] or None)
+
+
+def _sqlite_factory(url: str) -> StorageBackend:
+    path = _split_url(url)[1]
+    if not path:
+        raise ValueError("sqlite:// URL must include a database path")
+    return SQLiteBackend(path)
+
+
+register_backend("file", _file_factory)
+register_backend("jsonl", _file_factory)
+register_backend("sqlite", _sqlite_factory)
+register_backend("postgresql", PostgresBackend)
+register_backend("postgres", PostgresBackend)
+
+
+__all__ = [
+    "StorageBackend",
+    "FileBackend",
+    "SQLiteBackend",
+    "PostgresBackend",
+    "register_backend",
+    "registered_schemes",
+    "open_backend",
+    "resolve_backend",
+    "backend_errors",
+]
@@ -0,0 +1,322 @@
+"""Пакетный режим: много операций за один запуск CLI.
+
+``passgen batch`` читает команды JSON Lines из stdin и пишет по строке
+ответа на каждую команду в stdout, в том же порядке. Формат команд и
+ответов тот же, что у сервиса :mod:`passgen.daemon`::
+
+    {"op": "generate", "length": 20, "save": true, "label": "db"}
+    {"ok": true, "result": {"passwords": ["..."], "labels": ["db"], ...}}
+
+Операции: ``generate``, ``store``, ``search`` и ``verify``. Хранилище
+открывается один раз на весь запуск. Сохранения не пишутся по одному, а
+копятся и уходят пачкой через ``store_entries`` (один ``write`` и ``fsync``
+или одна транзакция на пачку); перед ``search`` и ``verify`` накопленное
+сбрасывается, поэтому чтения видят результат предыдущих команд. Ответы на
+сохранения выводятся после записи их пачки.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from . import backends, codec, storage, utils
+from .generator import PasswordPolicy, generate_passwords
+
+if TYPE_CHECKING:
+    from .backends import StorageBackend
+
+# An operation returns its result and the entries it wants saved.
+_Outcome = Tuple[Dict[str, Any], List[Dict[str, object]]]
+
+# Operations that read the store and therefore flush pending writes first.
+_READ_OPS = frozenset({"search", "verify"})
+
+_NONE = type(None)
+
+#: Параметры операций протокола: имя → (допустимые типы, обязателен ли).
+OP_PARAMS: Dict[str, Dict[str, Tuple[Tuple[type, ...], bool]]] = {
+    "ping": {},
+    "shutdown": {},
+    "generate": {
+        "length": ((int,), False),
+        "count": ((int,), False),
+        "digits": ((bool,), False),
+        "special": ((bool,), False),
+        "uppercase": ((bool,), False),
+        "lowercase": ((bool,), False),
+        "save": ((bool,), False),
+        "label": ((str, _NONE), False),
+    },
+    "store": {
+        "password": ((str,), True),
+        "label": ((str,), True),
+        "length": ((int, _NONE), False),
+        "options": ((dict, _NONE), False),
+    },
+    "search": {
+        "label": ((str, _NONE), False),
+        "limit": ((int, _NONE), False),
+        "offset": ((int,), False),
+        "after_id": ((int, _NONE), False),
+    },
+    "verify": {
+        "password": ((str,), True),
+        "label": ((str, _NONE), False),
+    },
+}
+
+
+def check_params(op: str, params: Dict[str, Any]) -> None:
+    """Проверить параметры операции протокола по :data:`OP_PARAMS`.
+
+    ``bool`` не считается ``int``: ``{"length": true}`` — ошибка.
+
+    Args:
+        op (str): Имя операции.
+        params (Dict[str, Any]): Параметры запроса без ``op``.
+
+    Raises:
+        ValueError: Если параметр неизвестен, пропущен или имеет не тот тип.
+    """
+    schema = OP_PARAMS[op]
+    problems = [f"unexpected {name!r}" for name in params if name not in schema]
+    for name, (types, required) in schema.items():
+        if name not in params:
+            if required:
+                problems.append(f"missing {name!r}")
+            continue
+        value = params[name]
+        if (isinstance(value, bool) and bool not in types) or not isinstance(value, types):
+            expected = " or ".join("null" if kind is _NONE else kind.__name__ for kind in types)
+            problems.append(f"{name!r} must be {expected}")
+    if problems:
+        raise ValueError(f"Invalid parameters for {op!r}: {', '.join(problems)}")
+
+
+def prepare_generate(
+    *,
+    length: int = 16,
+    count: int = 1,
+    digits: bool = True,
+    special: bool = True,
+    uppercase: bool = True,
+    lowercase: bool = True,
+    save: bool = False,
+    label: str | None = None,
+) -> _Outcome:
+    """Выполнить операцию ``generate`` протокола без записи в хранилище.
+
+    Метки сохраняемых паролей — как у ``passgen generate``: ``label`` для
+    одного пароля и ``label-1`` … ``label-N`` для нескольких.
+
+    Args:
+        length (int): Длина пароля.
+        count (int): Сколько паролей сгенерировать.
+        digits (bool): Использовать цифры.
+        special (bool): Использовать спецсимволы.
+        uppercase (bool): Использовать заглавные буквы.
+        lowercase (bool): Использовать строчные буквы.
+        save (bool): Подготовить записи для сохранения.
+        label (str | None): Метка, по умолчанию :func:`utils.default_label`.
+
+    Returns:
+        Tuple[Dict[str, Any], List[Dict[str, object]]]: Результат операции
+        (``passwords`` и, при ``save``, ``labels``) и записи для сохранения.
+
+    Raises:
+        ValueError: Если параметры политики или ``count`` некорректны.
+    """
+    policy = PasswordPolicy(
+        length,
+        use_digits=digits,
+        use_special=special,
+        use_uppercase=uppercase,
+        use_lowercase=lowercase,
+    )
+    if count < 1:
+        raise ValueError("Count must be at least 1")
+    passwords = list(generate_passwords(count, policy=policy))
+    if not save:
+        return {"passwords": passwords}, []
+    label = label or utils.default_label()
+    labels = [label] if count == 1 else [f"{label}-{index}" for index in range(1, count + 1)]
+    options = policy.options
+    entries = [
+        utils.build_entry(password, label=item, length=policy.length, options=options)
+        for password, item in zip(passwords, labels)
+    ]
+    return {"passwords": passwords, "labels": labels}, entries
+
+
+class BatchRunner:
+    """Исполнитель команд пакетного режима поверх одного хранилища.
+
+    Args:
+        backend (StorageBackend): Хранилище, открытое на весь запуск.
+        batch_size (int): Сколько записей копить перед записью пачки.
+
+    Attributes:
+        commands (int): Число прочитанных команд.
+        failed (int): Число команд, завершившихся ошибкой.
+        saved (int): Число сохранённых записей.
+
+    Raises:
+        ValueError: Если ``batch_size`` меньше 1.
+    """
+
+    def __init__(self, backend: StorageBackend, *, batch_size: int = storage.DEFAULT_BATCH_SIZE) -> None:
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.backend = backend
+        self.batch_size = batch_size
+        self.location = str(backend.location)
+        self.commands = 0
+        self.failed = 0
+        self.saved = 0
+        self._entries: List[Dict[str, object]] = []
+        # Responses waiting for the pending batch, with "has writes" flags.
+        self._held: List[Tuple[Dict[str, Any], bool]] = []
+        self._ops: Dict[str, Callable[..., _Outcome]] = {
+            "generate": self._generate,
+            "store": self._store,
+            "search": self._search,
+            "verify": self._verify,
+        }
+
+    def run(self, lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+        """Выполнить команды и отдать ответы в порядке команд.
+
+        Пустые строки пропускаются. Ошибка одной команды не прерывает
+        остальные: для неё отдаётся ``{"ok": false, "error": ...}``.
+
+        Args:
+            lines (Iterable[bytes]): Строки JSON Lines с командами.
+
+        Yields:
+            Dict[str, Any]: Ответы протокола.
+        """
+        current = codec.get_codec()
+        for line in lines:
+            if not line.strip():
+                continue
+            self.commands += 1
+            try:
+                request = current.loads(line)
+            except ValueError as exc:
+                yield from self._respond({"ok": False, "error": f"Invalid JSON: {exc}"})
+                continue
+            yield from self._execute(request)
+        yield from self.flush()
+
+    def flush(self) -> Iterator[Dict[str, Any]]:
+        """Записать накопленную пачку и отдать придержанные ответы.
+
+        Если пачку записать не удалось, все сохранения из неё получают
+        ответ с ошибкой.
+
+        Yields:
+            Dict[str, Any]: Ответы протокола.
+        """
+        if self._entries:
+            entries, self._entries = self._entries, []
+            try:
+                self.saved += self.backend.store_entries(entries, batch_size=self.batch_size)
+            except backends.backend_errors() as exc:
+                failure = {"ok": False, "error": str(exc)}
+                self._held = [(failure if writes else response, writes) for response, writes in self._held]
+        held, self._held = self._held, []
+        for response, _ in held:
+            yield self._counted(response)
+
+    def _execute(self, request: object) -> Iterator[Dict[str, Any]]:
+        if not isinstance(request, dict):
+            yield from self._respond({"ok": False, "error": "Request must be a JSON object"})
+            return
+        params = dict(request)
+        op = params.pop("op", None)
+        handler = self._ops.get(op)
+        if handler is None:
+            yield from self._respond({"ok": False, "error": f"Unknown operation {op!r}"})
+            return
+        try:
+            check_params(op, params)
+        except ValueError as exc:
+            yield from self._respond({"ok": False, "error": str(exc)})
+            return
+        if op in _READ_OPS:
+            yield from self.flush()
+        try:
+            result, entries = handler(**params)
+        except backends.backend_errors() as exc:
+            yield from self._respond({"ok": False, "error": str(exc)})
+            return
+        except Exception as exc:
+            # A bug in one command must not discard the queued writes.
+            yield from self._respond({"ok": False, "error": f"Internal error: {exc!r}"})
+            return
+        response = {"ok": True, "result": result}
+        if not entries:
+            yield from self._respond(response)
+            return
+        self._entries.extend(entries)
+        self._held.append((response, True))
+        if len(self._entries) >= self.batch_size:
+            yield from self.flush()
+
+    def _respond(self, response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Keep the output in command order behind a pending batch.
+        if self._held:
+            self._held.append((response, False))
+        else:
+            yield self._counted(response)
+
+    def _counted(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        if not response["ok"]:
+            self.failed += 1
+        return response
+
+    def _generate(self, **params: Any) -> _Outcome:
+        result, entries = prepare_generate(**params)
+        if entries:
+            result["location"] = self.location
+        return result, entries
+
+    def _store(
+        self,
+        *,
+        password: str,
+        label: str,
+        length: int | None = None,
+        options: Dict[str, bool] | None = None,
+    ) -> _Outcome:
+        # An externally supplied password carries its own length.
+        entry = utils.build_entry(
+            password,
+            label=label,
+            length=len(password) if length is None else length,
+            options=options or {},
+        )
+        return {"entry": entry, "location": self.location}, [entry]
+
+    def _search(
+        self,
+        *,
+        label: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        after_id: int | None = None,
+    ) -> _Outcome:
+        entries = list(self.backend.search(label, limit=limit, offset=offset, after_id=after_id))
+        return {"entries": entries, "location": self.location}, []
+
+    def _verify(self, *, password: str, label: str | None = None) -> _Outcome:
+        entries = self.backend.verify(password, label_query=label)
+        return {"entries": entries, "location": self.location}, []
+
+
+__all__ = [
+    "OP_PARAMS",
+    "check_params",
+    "prepare_generate",
+    "BatchRunner",
+]
@@ -0,0 +1,424 @@
+"""Встроенные замеры производительности passgen.
+
+:func:`run_benchmarks` измеряет на синтетических хранилищах заданных размеров:
+
+* ``generate_password`` и ``generate_passwords`` — скорость генерации для
+  каждой политики из :data:`POLICIES`;
+* ``store_password`` — задержку сохранения одного пароля в хранилище
+  данного размера;
+* ``search`` — задержку поиска одной записи по метке;
+* ``verify_hit`` и ``verify_miss`` — задержку проверки сохранённого и
+  отсутствующего пароля;
+* ``fingerprint`` и ``fingerprint_cached`` — стоимость отпечатка каждой
+  схемы из :data:`DEFAULT_SCHEMES` без кэша и с кэшем
+  (:func:`passgen.fingerprint.measure_cost`).
+
+Хранилища (``file``, ``sqlite`` и, при заданном DSN, ``postgresql``)
+создаются один раз и дорастают до каждого размера по возрастанию. Для
+PostgreSQL нужна отдельная пустая база, например локальный контейнер:
+замер оставляет в ней свои записи.
+
+Отчёт — словарь, пригодный для JSON: окружение запуска и строки
+``results``. Отчёты разных запусков сравниваются :func:`compare`, которая
+находит строки, ставшие медленнее порога.
+"""
+
+from __future__ import annotations
+
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from .backends import StorageBackend
+
+#: Версия формата отчёта; меняется при несовместимых изменениях полей.
+REPORT_VERSION = 1
+
+#: Размеры синтетических хранилищ по умолчанию.
+DEFAULT_SIZES = (1_000, 10_000)
+
+#: Сколько замеров задержки делается на каждую операцию.
+DEFAULT_ROUNDS = 200
+
+#: Сколько паролей генерируется для замера скорости генерации.
+DEFAULT_GENERATE_COUNT = 20_000
+
+#: Допустимое замедление по умолчанию для :func:`compare` (доля).
+DEFAULT_THRESHOLD = 0.25
+
+#: Схемы отпечатков для замера стоимости (см. :meth:`Fingerprinter.from_spec`).
+DEFAULT_SCHEMES = ("sha256", "hmac-sha256", "scrypt", "argon2id")
+
+#: Сколько отпечатков вычисляется на схему; медленные схемы стоят десятки мс.
+DEFAULT_FINGERPRINT_ROUNDS = 5
+
+#: Политики генерации: имя → параметры :class:`~passgen.generator.PasswordPolicy`.
+POLICIES: Dict[str, Dict[str, Any]] = {
+    "default": {"length": 16},
+    "pin": {"length": 6, "use_special": False, "use_uppercase": False, "use_lowercase": False},
+    "alnum": {"length": 20, "use_special": False},
+    "long": {"length": 64},
+}
+
+# Fields that identify a result row across runs.
+_KEY_FIELDS = ("benchmark", "backend", "policy", "scheme", "size")
+
+
+def _summary(samples: List[int]) -> Dict[str, float]:
+    """Свести замеры одной операции (в наносекундах) в микросекунды."""
+    ordered = sorted(samples)
+    return {
+        "ops": len(ordered),
+        "mean_us": statistics.fmean(ordered) / 1000,
+        "median_us": statistics.median(ordered) / 1000,
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] / 1000,
+        "min_us": ordered[0] / 1000,
+    }
+
+
+def _latency(operation: Callable[[int], object], rounds: int) -> Dict[str, float]:
+    """Замерить ``rounds`` вызовов ``operation(round)`` по отдельности."""
+    clock = time.perf_counter_ns
+    samples = []
+    for index in range(rounds):
+        started = clock()
+        operation(index)
+        samples.append(clock() - started)
+    return _summary(samples)
+
+
+def measure_generation(
+    *,
+    count: int = DEFAULT_GENERATE_COUNT,
+    policies: Dict[str, Dict[str, Any]] | None = None,
+) -> List[Dict[str, object]]:
+    """Измерить скорость генерации паролей по политикам.
+
+    ``generate_password`` вызывается по одному паролю, ``generate_passwords``
+    выдаёт ту же серию одним потоком.
+
+    Args:
+        count (int): Сколько паролей генерировать в каждом замере.
+        policies (Dict[str, Dict[str, Any]] | None): Политики, по умолчанию :data:`POLICIES`.
+
+    Returns:
+        List[Dict[str, object]]: Строки отчёта с полями ``benchmark``,
+        ``policy``, ``ops``, ``mean_us`` и ``ops_per_s``.
+
+    Raises:
+        ValueError: Если ``count`` меньше 1 или политика некорректна.
+    """
+    from .generator import PasswordPolicy, generate_password, generate_passwords
+
+    if count < 1:
+        raise ValueError("Count must be at least 1")
+    report = []
+    for name, params in (POLICIES if policies is None else policies).items():
+        policy = PasswordPolicy(**params)
+        runs: List[Tuple[str, Callable[[], object]]] = [
+            ("generate_password", lambda: [generate_password(policy=policy) for _ in range(count)]),
+            ("generate_passwords", lambda: list(generate_passwords(count, policy=policy))),
+        ]
+        for benchmark, run in runs:
+            started = time.perf_counter_ns()
+            run()
+            elapsed = time.perf_counter_ns() - started
+            report.append(
+                {
+                    "benchmark": benchmark,
+                    "policy": name,
+                    "ops": count,
+                    "mean_us": elapsed / count / 1000,
+                    "ops_per_s": count / (elapsed / 1e9) if elapsed else None,
+                }
+            )
+    return report
+
+
+def measure_fingerprints(
+    schemes: Iterable[str] = DEFAULT_SCHEMES,
+    *,
+    rounds: int = DEFAULT_FINGERPRINT_ROUNDS,
+) -> Tuple[List[Dict[str, object]], List[Dict[str, str]]]:
+    """Измерить стоимость отпечатков: вычисление без кэша и повторную проверку.
+
+    Args:
+        schemes (Iterable[str]): Схемы в формате :meth:`Fingerprinter.from_spec`.
+        rounds (int): Сколько паролей вычислять на схему.
+
+    Returns:
+        Tuple[List[Dict[str, object]], List[Dict[str, str]]]: Строки отчёта
+        ``fingerprint`` и ``fingerprint_cached`` с полями ``scheme``, ``ops``
+        и ``mean_us``, а также схемы, пропущенные без нужного пакета.
+
+    Raises:
+        ValueError: Если ``rounds`` меньше 1 или схема некорректна.
+    """
+    from .fingerprint import measure_cost
+
+    if rounds < 1:
+        raise ValueError("Rounds must be at least 1")
+    report = []
+    skipped = []
+    for scheme in schemes:
+        try:
+            (cost,) = measure_cost([scheme], rounds=rounds)
+        except ImportError as exc:
+            skipped.append({"scheme": scheme, "reason": str(exc)})
+            continue
+        for benchmark, field in (("fingerprint", "cold_ms"), ("fingerprint_cached", "cached_ms")):
+            report.append({"benchmark": benchmark, "scheme": scheme, "ops": rounds, "mean_us": cost[field] * 1000})
+    return report, skipped
+
+
+def _bench_entries(start: int, stop: int) -> Iterable[Dict[str, object]]:
+    from . import utils
+
+    options = {"digits": True, "special": True, "uppercase": True, "lowercase": True}
+    for index in range(start, stop):
+        yield utils.build_entry(_bench_password(index), label=_bench_label(index), length=16, options=options)
+
+
+def _bench_password(index: int) -> str:
+    return f"bench-password-{index}"
+
+
+def _bench_label(index: int) -> str:
+    # Fixed width, so a label query matches exactly one synthetic entry.
+    return f"bench-{index:09d}"
+
+
+def measure_backend(
+    backend: StorageBackend,
+    name: str,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    *,
+    rounds: int = DEFAULT_ROUNDS,
+) -> List[Dict[str, object]]:
+    """Измерить задержки операций хранилища при разных размерах.
+
+    Хранилище дополняется синтетическими записями до каждого размера по
+    возрастанию, затем замеряются ``store_password``, ``search``,
+    ``verify_hit`` и ``verify_miss``. Записи, сохранённые замером
+    ``store_password``, в размер не входят.
+
+    Args:
+        backend (StorageBackend): Хранилище, желательно пустое.
+        name (str): Имя хранилища в отчёте.
+        sizes (Iterable[int]): Числа синтетических записей.
+        rounds (int): Сколько замеров делать на операцию.
+
+    Returns:
+        List[Dict[str, object]]: Строки отчёта с полями ``benchmark``,
+        ``backend``, ``size``, ``ops``, ``mean_us``, ``median_us``, ``p95_us``
+        и ``min_us``.
+
+    Raises:
+        ValueError: Если размер или ``rounds`` меньше 1.
+    """
+    if rounds < 1:
+        raise ValueError("Rounds must be at least 1")
+    report = []
+    filled = 0
+    stored = 0
+    for size in sorted(set(sizes)):
+        if size < 1:
+            raise ValueError("Store size must be at least 1")
+        backend.store_entries(_bench_entries(filled, size))
+        filled = size
+
+        def store(index: int) -> None:
+            backend.store_password(f"bench-stored-{stored + index}", label="bench-stored", length=16, options={})
+
+        # Probes are spread over the whole store so no single region is measured.
+        step = max(1, size // rounds)
+
+        def search(index: int) -> None:
+            list(backend.search(_bench_label(index * step % size)))
+
+        def verify_hit(index: int) -> None:
+            backend.verify(_bench_password(index * step % size))
+
+        def verify_miss(index: int) -> None:
+            backend.verify(f"bench-missing-{index}")
+
+        for benchmark, operation in (
+            ("store_password", store),
+            ("search", search),
+            ("verify_hit", verify_hit),
+            ("verify_miss", verify_miss),
+        ):
+            report.append({"benchmark": benchmark, "backend": name, "size": size, **_latency(operation, rounds)})
+        stored += rounds
+    return report
+
+
+def run_benchmarks(
+    *,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    rounds: int = DEFAULT_ROUNDS,
+    generate_count: int = DEFAULT_GENERATE_COUNT,
+    backends: Iterable[str] = ("file", "sqlite"),
+    dsn: str | None = None,
+    workdir: str | None = None,
+    schemes: Iterable[str] = DEFAULT_SCHEMES,
+    fingerprint_rounds: int = DEFAULT_FINGERPRINT_ROUNDS,
+) -> Dict[str, Any]:
+    """Выполнить все замеры и собрать отчёт.
+
+    Файловое хранилище и SQLite создаются во временном каталоге (или в
+    ``workdir``), PostgreSQL — по ``dsn``. Если драйвер PostgreSQL или
+    пакет схемы отпечатков не установлен, хранилище или схема попадает в
+    ``skipped`` с причиной.
+
+    Args:
+        sizes (Iterable[int]): Размеры синтетических хранилищ.
+        rounds (int): Сколько замеров делать на операцию хранилища.
+        generate_count (int): Сколько паролей генерировать на замер генерации.
+        backends (Iterable[str]): Локальные хранилища: ``file`` и/или ``sqlite``.
+        dsn (str | None): DSN пустой базы PostgreSQL для замера ``postgresql``.
+        workdir (str | None): Каталог для локальных хранилищ.
+        schemes (Iterable[str]): Схемы отпечатков для замера стоимости.
+        fingerprint_rounds (int): Сколько отпечатков вычислять на схему.
+
+    Returns:
+        Dict[str, Any]: Отчёт с полями ``version``, ``environment``,
+        ``config``, ``results`` и ``skipped``.
+
+    Raises:
+        ValueError: Если параметры некорректны или хранилище неизвестно.
+    """
+    import tempfile
+
+    from . import codec
+    from .backends import FileBackend, PostgresBackend, SQLiteBackend
+
+    sizes = sorted(set(sizes))
+    names = list(backends)
+    factories: Dict[str, Callable[[Path], StorageBackend]] = {
+        "file": lambda directory: FileBackend(str(directory / "bench.json")),
+        "sqlite": lambda directory: SQLiteBackend(str(directory / "bench.db")),
+    }
+    unknown = [name for name in names if name not in factories]
+    if unknown:
+        raise ValueError(f"Unknown benchmark backend {unknown[0]!r} (known: file, sqlite)")
+
+    schemes = list(schemes)
+    results = measure_generation(count=generate_count)
+    costs, skipped = measure_fingerprints(schemes, rounds=fingerprint_rounds)
+    results.extend(costs)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
+        for name in names:
+            backend = factories[name](Path(tmpdir))
+            try:
+                results.extend(measure_backend(backend, name, sizes, rounds=rounds))
+            finally:
+                backend.close()
+    if dsn:
+        backend = PostgresBackend(dsn)
+        try:
+            results.extend(measure_backend(backend, "postgresql", sizes, rounds=rounds))
+        except ImportError as exc:
+            skipped.append({"backend": "postgresql", "reason": str(exc)})
+        finally:
+            backend.close()
+    return {
+        "version": REPORT_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "codec": codec.get_codec().name,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "config": {
+            "sizes": sizes,
+            "rounds": rounds,
+            "generate_count": generate_count,
+            "schemes": schemes,
+            "fingerprint_rounds": fingerprint_rounds,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def _key(row: Dict[str, Any]) -> Tuple[object, ...]:
+    return tuple(row.get(field) for field in _KEY_FIELDS)
+
+
+def _metric(row: Dict[str, Any]) -> float | None:
+    # Medians resist scheduler noise; throughput rows only have a mean.
+    value = row.get("median_us", row.get("mean_us"))
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, object]]:
+    """Найти замеры, ставшие медленнее базового отчёта.
+
+    Строки сопоставляются по ``benchmark``, ``backend``, ``policy``,
+    ``scheme`` и ``size``; сравнивается медиана задержки, а для генерации — среднее
+    время на пароль. Строки, которых нет в одном из отчётов, пропускаются.
+
+    Args:
+        baseline (Dict[str, Any]): Отчёт предыдущего запуска.
+        current (Dict[str, Any]): Отчёт текущего запуска.
+        threshold (float): Допустимое относительное замедление.
+
+    Returns:
+        List[Dict[str, object]]: Регрессии: ключ строки, ``baseline_us``,
+        ``current_us`` и ``ratio``, от худшей к лучшей.
+
+    Raises:
+        ValueError: Если порог отрицательный, отчёт не словарь или версии
+            отчётов различаются.
+    """
+    if threshold < 0:
+        raise ValueError("Threshold must be non-negative")
+    if not isinstance(baseline, dict) or not isinstance(current, dict):
+        raise ValueError("Benchmark reports must be JSON objects")
+    versions = {baseline.get("version"), current.get("version")}
+    if versions != {REPORT_VERSION}:
+        raise ValueError(f"Cannot compare benchmark reports of versions {sorted(map(str, versions))}")
+    previous = {_key(row): _metric(row) for row in baseline.get("results", [])}
+    regressions = []
+    for row in current.get("results", []):
+        before = previous.get(_key(row))
+        after = _metric(row)
+        if not before or after is None or after <= before * (1 + threshold):
+            continue
+        regressions.append(
+            {
+                **{field: row[field] for field in _KEY_FIELDS if field in row},
+                "baseline_us": before,
+                "current_us": after,
+                "ratio": after / before,
+            }
+        )
+    regressions.sort(key=lambda item: item["ratio"], reverse=True)
+    return regressions
+
+
+__all__ = [
+    "REPORT_VERSION",
+    "DEFAULT_SIZES",
+    "DEFAULT_ROUNDS",
+    "DEFAULT_GENERATE_COUNT",
+    "DEFAULT_THRESHOLD",
+    "DEFAULT_SCHEMES",
+    "DEFAULT_FINGERPRINT_ROUNDS",
+    "POLICIES",
+    "measure_generation",
+    "measure_fingerprints",
+    "measure_backend",
+    "run_benchmarks",
+    "compare",
+]
@@ -0,0 +1,202 @@
+"""Клиент резидентного сервиса passgen.
+
+Модуль намеренно зависит только от стандартной библиотеки и
+:mod:`passgen.codec`: ``--via-daemon`` в CLI не должен платить за импорт
+asyncio, генератора и хранилищ, которые уже загружены в сервисе
+(:mod:`passgen.daemon`).
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import stat
+from pathlib import Path
+from typing import Any, Dict
+
+from . import codec
+
+#: Переменная окружения с путём к сокету сервиса.
+SOCKET_ENV = "PASSGEN_SOCKET"
+
+#: Тайм-аут клиента по умолчанию, секунд.
+DEFAULT_TIMEOUT = 30.0
+
+
+def resolve_socket_path(socket_path: str | None = None) -> Path:
+    """Определить путь к сокету сервиса.
+
+    Args:
+        socket_path (str | None): Явный путь. По умолчанию ``PASSGEN_SOCKET``,
+            затем ``$XDG_RUNTIME_DIR/passgen.sock``, затем
+            ``passgen.sock`` в :func:`fallback_socket_dir`.
+
+    Returns:
+        Path: Путь к сокету.
+    """
+    if socket_path:
+        return Path(socket_path).expanduser()
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV]).expanduser()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "passgen.sock"
+    return fallback_socket_dir() / "passgen.sock"
+
+
+def fallback_socket_dir() -> Path:
+    """Вернуть личный каталог сокета для систем без ``XDG_RUNTIME_DIR``.
+
+    Каталог ``<tmp>/passgen-<uid>`` создаёт сервис с правами 0700 и
+    проверяет, что он принадлежит текущему пользователю: сам сокет в общем
+    ``/tmp`` мог бы заранее создать другой пользователь.
+
+    Returns:
+        Path: Путь к каталогу.
+    """
+    import tempfile
+
+    return Path(tempfile.gettempdir()) / f"passgen-{os.getuid()}"
+
+
+def check_socket(path: Path) -> None:
+    """Убедиться, что сокет создан текущим пользователем и закрыт для других.
+
+    Args:
+        path (Path): Путь к сокету.
+
+    Raises:
+        OSError: Если путь не сокет, принадлежит другому пользователю или
+            доступен группе и остальным.
+    """
+    info = os.lstat(path)
+    if not stat.S_ISSOCK(info.st_mode):
+        raise OSError(f"Refusing to connect: {path} is not a socket")
+    if info.st_uid != os.getuid():
+        raise OSError(f"Refusing to connect: {path} is owned by uid {info.st_uid}")
+    if info.st_mode & 0o077:
+        raise OSError(f"Refusing to connect: {path} is accessible to other users")
+
+
+def _check_peer(sock: socket.socket, path: Path) -> None:
+    # The path could be swapped between check_socket() and connect(); the
+    # kernel's peer credentials name the process actually listening.
+    peercred = getattr(socket, "SO_PEERCRED", None)
+    if peercred is None:
+        return
+    import struct
+
+    size = struct.calcsize("3i")
+    _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, peercred, size))
+    if uid != os.getuid():
+        raise OSError(f"Refusing to talk to {path}: the service runs as uid {uid}")
+
+
+class DaemonClient:
+    """Синхронный клиент сервиса с одним подключением на несколько запросов.
+
+    Args:
+        socket_path (str | None): Путь к сокету (см. :func:`resolve_socket_path`).
+        timeout (float): Тайм-аут подключения и ответа, секунд.
+        codec_name (str | None): Кодек JSON (см. :func:`passgen.codec.get_codec`),
+            по умолчанию из ``PASSGEN_JSON_CODEC``.
+
+    Raises:
+        OSError: Если сервис недоступен или сокет не принадлежит текущему
+            пользователю (см. :func:`check_socket`).
+    """
+
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        codec_name: str | None = None,
+    ) -> None:
+        self.path = resolve_socket_path(socket_path)
+        self._codec = codec.get_codec(codec_name)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            check_socket(self.path)
+            self._sock.connect(str(self.path))
+            _check_peer(self._sock, self.path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._reader = self._sock.makefile("rb")
+
+    def request(self, op: str, **params: object) -> Dict[str, Any]:
+        """Выполнить запрос и вернуть поле ``result`` ответа.
+
+        Args:
+            op (str): Операция протокола.
+            **params: Параметры операции.
+
+        Returns:
+            Dict[str, Any]: Результат операции.
+
+        Raises:
+            ValueError: Если сервис вернул ошибку.
+            OSError: Если соединение разорвано.
+        """
+        self._sock.sendall(self._codec.dumps_line({"op": op, **params}))
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError(f"passgen service on {self.path} closed the connection")
+        response = self._codec.loads(line)
+        if not response.get("ok"):
+            raise ValueError(response.get("error") or "passgen service request failed")
+        return response.get("result") or {}
+
+    def close(self) -> None:
+        """Закрыть подключение."""
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def request(
+    op: str,
+    *,
+    socket_path: str | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    codec_name: str | None = "json",
+    **params: object,
+) -> Dict[str, Any]:
+    """Выполнить один запрос к сервису через новое подключение.
+
+    Args:
+        op (str): Операция протокола.
+        socket_path (str | None): Путь к сокету.
+        timeout (float): Тайм-аут, секунд.
+        codec_name (str | None): Кодек JSON. По умолчанию стандартный ``json``:
+            для одного короткого запроса импорт orjson/msgspec дороже
+            выигрыша в разборе.
+        **params: Параметры операции.
+
+    Returns:
+        Dict[str, Any]: Результат операции.
+
+    Raises:
+        ValueError: Если сервис вернул ошибку.
+        OSError: Если сервис недоступен.
+    """
+    with DaemonClient(socket_path, timeout=timeout, codec_name=codec_name) as client:
+        return client.request(op, **params)
+
+
+__all__ = [
+    "SOCKET_ENV",
+    "DEFAULT_TIMEOUT",
+    "resolve_socket_path",
+    "fallback_socket_dir",
+    "check_socket",
+    "DaemonClient",
+    "request",
+]
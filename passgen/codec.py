@@ -0,0 +1,324 @@
+"""Кодеки JSON для файла хранения.
+
+Разбор строк JSON Lines занимает почти всё время чтения большого файла,
+поэтому файл хранения кодируется через самый быстрый доступный кодек:
+
+* ``msgspec`` и ``orjson`` — быстрый разбор в словарь с проверкой схемы;
+* ``json`` — стандартная библиотека, используется, если ничего не установлено.
+
+Все кодеки разбирают запись в обычный словарь и проверяют её одной
+функцией :func:`check_entry`, поэтому результат не зависит от кодека:
+поля вне схемы (:class:`EntrySchema`) сохраняются.
+
+Кодек выбирается переменной окружения ``PASSGEN_JSON_CODEC``
+(``auto``, ``msgspec``, ``orjson`` или ``json``). Все кодеки пишут
+одинаковые байты: компактный JSON в UTF-8 без экранирования не-ASCII.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+
+#: Переменная окружения с именем кодека.
+CODEC_ENV = "PASSGEN_JSON_CODEC"
+
+#: Кодеки в порядке предпочтения для ``auto``.
+CODEC_NAMES = ("msgspec", "orjson", "json")
+
+#: Размеры хранилищ по умолчанию для :func:`measure_codecs`.
+DEFAULT_BENCHMARK_SIZES = (10_000, 100_000, 1_000_000)
+
+
+class _RequiredFields(TypedDict):
+    hash: str
+
+
+class EntrySchema(_RequiredFields, total=False):
+    """Схема записи файла хранения: обязателен только ``hash``."""
+
+    label: Optional[str]
+    length: Optional[int]
+    options: Optional[Dict[str, bool]]
+    created_at: Optional[str]
+
+
+class SchemaError(ValueError):
+    """Строка является корректным JSON, но не записью хранилища."""
+
+
+# Expected types of the optional fields, checked by the untyped codecs.
+_FIELD_TYPES: Tuple[Tuple[str, type], ...] = (
+    ("label", str),
+    ("length", int),
+    ("options", dict),
+    ("created_at", str),
+)
+
+
+class Codec(ABC):
+    """Кодек записей хранилища.
+
+    Attributes:
+        name: Имя кодека.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> object:
+        """Разобрать произвольный документ JSON.
+
+        Raises:
+            ValueError: Если данные не являются корректным JSON.
+        """
+
+    def decode_entry(self, line: bytes) -> Dict[str, object]:
+        """Разобрать одну строку JSON Lines в запись.
+
+        Raises:
+            SchemaError: Если JSON не соответствует схеме записи.
+            ValueError: Если строка не является корректным JSON.
+        """
+        return check_entry(self.loads(line))
+
+    @abstractmethod
+    def dumps_line(self, value: object) -> bytes:
+        """Сериализовать значение в одну строку JSON с переводом строки."""
+
+    def encode_entry(self, entry: Dict[str, object]) -> bytes:
+        """Сериализовать запись в строку JSON Lines с переводом строки."""
+        return self.dumps_line(entry)
+
+
+def check_entry(value: object) -> Dict[str, object]:
+    """Проверить, что разобранное значение соответствует схеме записи.
+
+    Args:
+        value (object): Результат разбора строки.
+
+    Returns:
+        Dict[str, object]: Та же запись.
+
+    Raises:
+        SchemaError: Если значение не является записью.
+    """
+    if value.__class__ is dict and value.get("hash").__class__ is str:
+        # Fast path for plain decoded JSON: exact types, no loop.
+        get = value.get
+        label, length, options, created_at = get("label"), get("length"), get("options"), get("created_at")
+        if (
+            (label is None or label.__class__ is str)
+            and (length is None or length.__class__ is int)
+            and (options is None or options.__class__ is dict)
+            and (created_at is None or created_at.__class__ is str)
+        ):
+            return value
+    if not isinstance(value, dict) or not isinstance(value.get("hash"), str):
+        raise SchemaError("not an entry")
+    for name, expected in _FIELD_TYPES:
+        field = value.get(name)
+        # bool is an int subclass, but never a valid length.
+        if field is not None and (not isinstance(field, expected) or isinstance(field, bool) and expected is int):
+            raise SchemaError(f"field {name!r} must be {expected.__name__}")
+    return value
+
+
+class _StdlibCodec(Codec):
+    name = "json"
+
+    def loads(self, data: bytes) -> object:
+        return json.loads(data)
+
+    def dumps_line(self, value: object) -> bytes:
+        return (json.dumps(value, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class _OrjsonCodec(Codec):
+    name = "orjson"
+
+    def __init__(self, orjson) -> None:
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_APPEND_NEWLINE
+
+    def loads(self, data: bytes) -> object:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError.
+        return self._loads(data)
+
+    def dumps_line(self, value: object) -> bytes:
+        return self._dumps(value, option=self._option)
+
+
+class _MsgspecCodec(Codec):
+    name = "msgspec"
+
+    def __init__(self, msgspec) -> None:
+        self._error = msgspec.MsgspecError
+        self._any = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: bytes) -> object:
+        try:
+            return self._any.decode(data)
+        except self._error as exc:
+            raise ValueError(str(exc)) from exc
+
+    def dumps_line(self, value: object) -> bytes:
+        buffer = bytearray()
+        self._encoder.encode_into(value, buffer)
+        buffer += b"\n"
+        return bytes(buffer)
+
+
+def _orjson_codec() -> Optional[Codec]:
+    try:
+        import orjson  # type: ignore
+    except ImportError:
+        return None
+    return _OrjsonCodec(orjson)
+
+
+def _msgspec_codec() -> Optional[Codec]:
+    try:
+        import msgspec  # type: ignore
+    except ImportError:
+        return None
+    return _MsgspecCodec(msgspec)
+
+
+_FACTORIES: Dict[str, Callable[[], Optional[Codec]]] = {
+    "json": _StdlibCodec,
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+}
+
+
+def get_codec(name: str | None = None) -> Codec:
+    """Вернуть кодек по имени или по переменной ``PASSGEN_JSON_CODEC``.
+
+    Args:
+        name (str | None): ``auto``, ``msgspec``, ``orjson`` или ``json``.
+            None — значение переменной окружения, по умолчанию ``auto``.
+
+    Returns:
+        Codec: Кодек; для ``auto`` — первый установленный из :data:`CODEC_NAMES`.
+
+    Raises:
+        ValueError: Если имя кодека неизвестно.
+        ImportError: Если явно запрошенный кодек не установлен.
+    """
+    if name is None:
+        name = os.environ.get(CODEC_ENV) or "auto"
+    return _load_codec(name.strip().lower())
+
+
+@lru_cache(maxsize=None)
+def _load_codec(name: str) -> Codec:
+    if name == "auto":
+        for candidate in CODEC_NAMES:
+            codec = _FACTORIES[candidate]()
+            if codec is not None:
+                return codec
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown JSON codec {name!r}")
+    codec = factory()
+    if codec is None:
+        raise ImportError(f"Установите пакет {name} или выберите другой кодек в {CODEC_ENV}")
+    return codec
+
+
+def available_codecs() -> List[str]:
+    """Вернуть имена установленных кодеков в порядке предпочтения."""
+    return [name for name in CODEC_NAMES if _FACTORIES[name]() is not None]
+
+
+def _sample_entry(index: int) -> Dict[str, object]:
+    return {
+        "label": f"service-{index % 1000}",
+        "hash": f"{index:064x}",
+        "length": 16,
+        "options": {"digits": True, "special": index % 2 == 0, "uppercase": True, "lowercase": True},
+        "created_at": "2024-01-01T00:00:00Z",
+    }
+
+
+def measure_codecs(
+    sizes: Iterable[int] = DEFAULT_BENCHMARK_SIZES,
+    codecs: Iterable[str] | None = None,
+) -> List[Dict[str, object]]:
+    """Сравнить кодеки по времени записи и чтения хранилища и пику памяти.
+
+    Для каждого размера файл хранения записывается кодеком построчно, затем
+    читается целиком в список записей. Пик памяти при чтении измеряется
+    через ``tracemalloc`` отдельным проходом, чтобы трассировка не искажала
+    время.
+
+    Args:
+        sizes (Iterable[int]): Числа записей в хранилище.
+        codecs (Iterable[str] | None): Имена кодеков, по умолчанию все установленные.
+
+    Returns:
+        List[Dict[str, object]]: Строки отчёта с полями ``codec``, ``entries``,
+        ``dump_s``, ``load_s`` и ``load_peak_mb``.
+    """
+    import tempfile
+    import tracemalloc
+
+    report = []
+    names = list(codecs) if codecs is not None else available_codecs()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "passwords.json"
+        for size in sizes:
+            entries = [_sample_entry(index) for index in range(size)]
+            for name in names:
+                codec = get_codec(name)
+                started = time.perf_counter()
+                with path.open("wb") as handle:
+                    handle.writelines(codec.encode_entry(entry) for entry in entries)
+                dump = time.perf_counter() - started
+
+                started = time.perf_counter()
+                with path.open("rb") as handle:
+                    loaded = [codec.decode_entry(line) for line in handle]
+                load = time.perf_counter() - started
+                del loaded
+
+                tracemalloc.start()
+                try:
+                    with path.open("rb") as handle:
+                        loaded = [codec.decode_entry(line) for line in handle]
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                del loaded
+                report.append(
+                    {
+                        "codec": name,
+                        "entries": size,
+                        "dump_s": dump,
+                        "load_s": load,
+                        "load_peak_mb": peak / 1e6,
+                    }
+                )
+    return report
+
+
+__all__ = [
+    "CODEC_ENV",
+    "CODEC_NAMES",
+    "DEFAULT_BENCHMARK_SIZES",
+    "EntrySchema",
+    "SchemaError",
+    "Codec",
+    "check_entry",
+    "get_codec",
+    "available_codecs",
+    "measure_codecs",
+]
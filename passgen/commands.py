@@ -1,12 +1,17 @@
-"""Command handlers for the CLI."""
+"""Command handlers for the CLI.
+
+Each handler imports the modules it needs on call, so a CLI run only pays
+for the subcommand it executes (``--via-daemon`` needs just the client).
+"""
 
 from __future__ import annotations
 
 import sys
-from typing import Any, Dict
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator
 
-from .generator import generate_password
-from . import storage, utils
+if TYPE_CHECKING:
+    from . import backends
 
 
 def handle_generate(args) -> int:
@@ -18,122 +23,485 @@ def handle_generate(args) -> int:
     Returns:
         int: Код возврата 0 при успехе или 1 при ошибке валидации.
     """
-    use_digits = args.use_digits
-    use_special = args.use_special
-    use_uppercase = args.use_uppercase
-    use_lowercase = args.use_lowercase
+    count = getattr(args, "count", 1)
+    if getattr(args, "via_daemon", False):
+        return _generate_via_daemon(args, count)
+
+    from . import utils
+    from .generator import PasswordPolicy, generate_passwords
 
     try:
-        password = generate_password(
+        if getattr(args, "batch_size", 1) < 1:
+            raise ValueError("Batch size must be at least 1")
+        policy = PasswordPolicy(
             args.length,
-            use_digits=use_digits,
-            use_special=use_special,
-            use_uppercase=use_uppercase,
-            use_lowercase=use_lowercase,
+            use_digits=args.use_digits,
+            use_special=args.use_special,
+            use_uppercase=args.use_uppercase,
+            use_lowercase=args.use_lowercase,
         )
+        workers = getattr(args, "workers", 1)
+        if workers != 1:
+            from . import parallel
+
+            passwords = parallel.generate_passwords_parallel(
+                count,
+                policy=policy,
+                workers=workers,
+                ordered=not getattr(args, "unordered", False),
+            )
+        else:
+            passwords = generate_passwords(count, policy=policy)
     except ValueError as exc:
         print(f"Ошибка: {exc}", file=sys.stderr)
         return 1
 
-    print(password)
+    write = sys.stdout.write
+    if not args.save:
+        for password in passwords:
+            write(f"{password}\n")
+        return 0
 
-    if args.save:
-        label = args.label or utils.default_label()
-        options = {
-            "digits": use_digits,
-            "special": use_special,
-            "uppercase": use_uppercase,
-            "lowercase": use_lowercase,
-        }
-        if getattr(args, "storage_dsn", None):
-            from . import storage_pg
-
-            entry, path = storage_pg.store_password_postgres(
-                password,
-                label=label,
-                length=args.length,
-                options=options,
-                dsn=args.storage_dsn,
-            )
-        else:
-            entry, path = storage.store_password(
+    label = args.label or utils.default_label()
+    try:
+        backend = _backend(args)
+    except ValueError as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+
+    if count == 1:
+        password = next(iter(passwords))
+        write(f"{password}\n")
+        entry = backend.store_password(password, label=label, policy=policy)
+        print(
+            "Хэш сохранён:",
+            f"label={entry['label']} file={backend.location}"
+        )
+        return 0
+
+    def _entries():
+        options = policy.options
+        for index, password in enumerate(passwords, start=1):
+            write(f"{password}\n")
+            yield utils.build_entry(
                 password,
-                label=label,
-                length=args.length,
+                label=f"{label}-{index}",
+                length=policy.length,
                 options=options,
-                storage_file=args.storage_file,
             )
-        print(
-            "Хэш сохранён:",
-            f"label={entry['label']} file={path}"
+
+    from . import storage
+
+    batch_size = getattr(args, "batch_size", storage.DEFAULT_BATCH_SIZE)
+    saved = backend.store_entries(_entries(), batch_size=batch_size)
+    print(f"Хэшей сохранено: {saved} file={backend.location}", file=sys.stderr)
+    return 0
+
+
+def _generate_via_daemon(args, count: int) -> int:
+    """Выполнить `generate` через резидентный сервис (``--via-daemon``)."""
+    from . import client
+
+    try:
+        result = client.request(
+            "generate",
+            socket_path=getattr(args, "socket", None),
+            length=args.length,
+            count=count,
+            digits=args.use_digits,
+            special=args.use_special,
+            uppercase=args.use_uppercase,
+            lowercase=args.use_lowercase,
+            save=args.save,
+            label=args.label,
         )
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    sys.stdout.write("".join(f"{password}\n" for password in result["passwords"]))
+    if args.save:
+        if count == 1:
+            print("Хэш сохранён:", f"label={result['labels'][0]} file={result['location']}")
+        else:
+            print(f"Хэшей сохранено: {len(result['labels'])} file={result['location']}", file=sys.stderr)
     return 0
 
 
+def _backend(args) -> backends.StorageBackend:
+    """Выбрать хранилище по параметрам ``--storage-url``/``--storage-dsn``/``--storage-file``.
+
+    Args:
+        args: Пространство имён argparse с параметрами хранилища.
+
+    Returns:
+        backends.StorageBackend: Выбранное хранилище.
+
+    Raises:
+        ValueError: Если схема URL не поддерживается.
+    """
+    from . import backends
+
+    return backends.resolve_backend(
+        storage_url=getattr(args, "storage_url", None),
+        storage_file=getattr(args, "storage_file", None),
+        storage_dsn=getattr(args, "storage_dsn", None),
+    )
+
+
 def handle_search(args) -> int:
     """Обработчик подкоманды `search`.
 
+    Записи выводятся по мере получения: PostgreSQL и SQLite отдают строки
+    курсором порциями, а не загружают результат целиком.
+
     Args:
         args: Пространство имён argparse с аргументами подкоманды.
 
     Returns:
-        int: Код возврата подкоманды, всегда 0.
+        int: Код возврата 0 при успехе или 1 при ошибке валидации.
+    """
+    limit = getattr(args, "limit", None)
+    offset = getattr(args, "offset", 0) or 0
+    try:
+        if limit is not None and limit < 0:
+            raise ValueError("Limit must be non-negative")
+        if offset < 0:
+            raise ValueError("Offset must be non-negative")
+        if getattr(args, "via_daemon", False):
+            entries = _search_via_daemon(args, limit, offset)
+            return _print_entries(entries, getattr(args, "format", "text"))
+        backend = _backend(args)
+        if args.password:
+            entries = _paginate(backend.verify(args.password, label_query=args.label), limit, offset)
+        else:
+            entries = backend.search(
+                args.label,
+                limit=limit,
+                offset=offset,
+                after_id=getattr(args, "after_id", None),
+            )
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    return _print_entries(entries, getattr(args, "format", "text"))
+
+
+def _print_entries(entries: Iterable[Dict[str, Any]], fmt: str) -> int:
+    """Вывести найденные записи в формате ``--format`` или сообщение об их отсутствии.
+
+    Для машиночитаемых форматов сообщение уходит в stderr, чтобы не
+    смешиваться с данными.
     """
-    use_pg = getattr(args, "storage_dsn", None)
+    from . import formats
+
+    try:
+        found = formats.write_entries(entries, sys.stdout, fmt)
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    if not found:
+        print("Ничего не найдено", file=sys.stdout if fmt == "text" else sys.stderr)
+    return 0
+
+
+def _search_via_daemon(args, limit: int | None, offset: int):
+    """Выполнить `search` через резидентный сервис (``--via-daemon``).
+
+    Returns:
+        List[Dict[str, Any]]: Найденные записи.
+
+    Raises:
+        OSError: Если сервис недоступен.
+        ValueError: Если сервис вернул ошибку.
+    """
+    from . import client
+
+    socket_path = getattr(args, "socket", None)
     if args.password:
-        if use_pg:
-            from . import storage_pg
+        result = client.request("verify", socket_path=socket_path, password=args.password, label=args.label)
+        return list(_paginate(result["entries"], limit, offset))
+    result = client.request(
+        "search",
+        socket_path=socket_path,
+        label=args.label,
+        limit=limit,
+        offset=offset,
+        after_id=getattr(args, "after_id", None),
+    )
+    return result["entries"]
 
-            entries, path = storage_pg.verify_password_postgres(
-                args.password,
-                label_query=args.label,
-                dsn=use_pg,
-            )
+
+def _paginate(entries: Iterable[Dict[str, Any]], limit: int | None, offset: int) -> Iterator[Dict[str, Any]]:
+    """Применить ``--offset``/``--limit`` к уже полученным записям."""
+    stop = None if limit is None else offset + limit
+    return islice(entries, offset, stop)
+
+
+def handle_export(args) -> int:
+    """Обработчик подкоманды `export`.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 при успехе или 1 при ошибке чтения или записи.
+    """
+    from . import backends, transfer
+
+    progress = transfer.Progress("Выгружено")
+    try:
+        entries = transfer.read_store(
+            storage_url=getattr(args, "storage_url", None),
+            storage_file=args.storage_file,
+            storage_dsn=getattr(args, "storage_dsn", None),
+        )
+        transfer.write_jsonl(progress.track(entries), args.output)
+    except backends.backend_errors() as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    progress.finish()
+    return 0
+
+
+def handle_import(args) -> int:
+    """Обработчик подкоманды `import`.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 при успехе или 1 при ошибке чтения или записи.
+    """
+    from pathlib import Path
+
+    from . import backends, transfer
+
+    progress = transfer.Progress("Загружено")
+    try:
+        if args.input:
+            source = None if args.input == transfer.STDIO else Path(args.input)
+            entries = transfer.read_jsonl(args.input)
         else:
-            entries, path = storage.verify_password(
-                args.password,
-                label_query=args.label,
-                storage_file=args.storage_file,
+            origin = backends.resolve_backend(
+                storage_url=getattr(args, "from_storage_url", None),
+                storage_file=args.from_storage_file,
+                storage_dsn=args.from_storage_dsn,
             )
-    else:
-        if use_pg:
-            from . import storage_pg
+            source = origin.location
+            entries = origin.iter_entries()
+        _, path = transfer.write_store(
+            progress.track(entries),
+            storage_url=getattr(args, "storage_url", None),
+            storage_file=args.storage_file,
+            storage_dsn=getattr(args, "storage_dsn", None),
+            batch_size=args.batch_size,
+            source=source,
+        )
+    except backends.backend_errors() as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    progress.finish()
+    print(f"Записи загружены в {path}", file=sys.stderr)
+    return 0
 
-            entries, path = storage_pg.search_passwords_postgres(
-                label_query=args.label,
-                dsn=use_pg,
-            )
+
+def handle_verify(args) -> int:
+    """Обработчик подкоманды `verify`: массовая проверка кандидатов.
+
+    Совпадения выводятся на stdout строками ``<пароль>\t<метка>`` по мере
+    готовности, итоговая статистика — в stderr.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 при успехе или 1 при ошибке.
+    """
+    from . import audit, transfer
+
+    progress = transfer.Progress("Проверено")
+    matched = 0
+    handle = None
+    try:
+        if args.chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        stored = audit.StoredFingerprints.from_entries(_backend(args).iter_entries())
+        if args.from_file == transfer.STDIO:
+            source = sys.stdin
         else:
-            entries, path = storage.search_passwords(
-                label_query=args.label,
-                storage_file=args.storage_file,
-            )
+            source = handle = open(args.from_file, encoding="utf-8", errors="surrogateescape")
+        matches = audit.audit_candidates(
+            progress.track(audit.read_candidates(source)),
+            stored,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+        write = sys.stdout.write
+        for candidate, labels in matches:
+            matched += 1
+            for label in labels:
+                write(f"{candidate}\t{label}\n")
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if handle is not None:
+            handle.close()
+    progress.finish()
+    print(f"Совпадений: {matched} из {progress.count} (в хранилище {stored.count} записей)", file=sys.stderr)
+    return 0
 
-    if not entries:
-        print("Ничего не найдено")
-        return 0
 
-    for entry in entries:
-        _print_entry(entry, path)
+def handle_serve(args) -> int:
+    """Обработчик подкоманды `serve`: резидентный сервис на Unix-сокете.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 после остановки или 1 при ошибке запуска.
+    """
+    import asyncio
+
+    from . import daemon
+
+    def ready(path) -> None:
+        print(f"Сервис passgen слушает {path}", file=sys.stderr)
+
+    try:
+        backend = _backend(args)
+        asyncio.run(daemon.serve(backend, getattr(args, "socket", None), ready=ready))
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
     return 0
 
 
-def _print_entry(entry: Dict[str, Any], path) -> None:
-    """Вывести одну запись на stdout.
+def handle_batch(args) -> int:
+    """Обработчик подкоманды `batch`: команды JSON Lines из stdin.
+
+    Ответы выводятся в stdout по строке на команду, итог — в stderr.
 
     Args:
-        entry (Dict[str, Any]): Словарь с полями сохранённого пароля.
-        path (Path): Файл, из которого была прочитана запись.
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0, если все команды выполнены, иначе 1.
+    """
+    from . import batch, codec
+
+    try:
+        runner = batch.BatchRunner(_backend(args), batch_size=args.batch_size)
+        dumps_line = codec.get_codec().dumps_line
+        output = sys.stdout.buffer
+        for response in runner.run(sys.stdin.buffer):
+            output.write(dumps_line(response))
+        output.flush()
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    print(
+        f"Команд: {runner.commands}, с ошибкой: {runner.failed}, записей сохранено: {runner.saved}",
+        file=sys.stderr,
+    )
+    return 1 if runner.failed else 0
+
+
+def handle_bench(args) -> int:
+    """Обработчик подкоманды `bench`: замеры производительности.
+
+    Отчёт JSON пишется в ``--output`` или stdout, регрессии относительно
+    ``--baseline`` — в stderr.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 при успехе, 1 при ошибке или найденных регрессиях.
+    """
+    import json
+
+    from . import bench
+
+    try:
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as handle:
+                baseline = json.load(handle)
+        report = bench.run_benchmarks(
+            sizes=args.sizes,
+            rounds=args.rounds,
+            generate_count=args.generate_count,
+            backends=args.backends or ("file", "sqlite"),
+            dsn=args.storage_dsn,
+            schemes=args.schemes or bench.DEFAULT_SCHEMES,
+            fingerprint_rounds=args.fingerprint_rounds,
+        )
+        regressions = [] if baseline is None else bench.compare(baseline, report, threshold=args.threshold)
+        text = json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                handle.write(text)
+        else:
+            sys.stdout.write(text)
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    for skipped in report["skipped"]:
+        if "backend" in skipped:
+            print(f"Пропущено хранилище {skipped['backend']}: {skipped['reason']}", file=sys.stderr)
+        else:
+            print(f"Пропущена схема {skipped['scheme']}: {skipped['reason']}", file=sys.stderr)
+    for item in regressions:
+        where = ", ".join(f"{field}={item[field]}" for field in ("backend", "policy", "scheme", "size") if field in item)
+        print(
+            f"Регрессия {item['benchmark']} ({where}): "
+            f"{item['baseline_us']:.1f} → {item['current_us']:.1f} мкс (x{item['ratio']:.2f})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+def handle_compact(args) -> int:
+    """Обработчик подкоманды `compact`: срок хранения и удаление дубликатов.
+
+    Args:
+        args: Пространство имён argparse с аргументами подкоманды.
+
+    Returns:
+        int: Код возврата 0 при успехе или 1 при ошибке.
     """
-    options = entry.get("options", {})
-    enabled = ", ".join([name for name, enabled in options.items() if enabled])
+    from datetime import timedelta
+
+    try:
+        keep_days = getattr(args, "keep_days", None)
+        if keep_days is not None and keep_days <= 0:
+            raise ValueError("Retention must be a positive number of days")
+        backend = _backend(args)
+        stats = backend.compact(
+            retention=None if keep_days is None else timedelta(days=keep_days),
+            dedupe=getattr(args, "dedupe", True),
+        )
+    except (OSError, ValueError) as exc:
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
     print(
-        f"label: {entry.get('label')}\n"
-        f"  hash: {entry.get('hash')}\n"
-        f"  length: {entry.get('length')}\n"
-        f"  options: {enabled or '—'}\n"
-        f"  created_at: {entry.get('created_at')}"
+        f"Хранилище {backend.location} сжато: удалено устаревших {stats['expired']}, "
+        f"дубликатов {stats['duplicates']}, осталось {stats['kept']}"
     )
+    return 0
 
 
-__all__ = ["handle_generate", "handle_search"]
+__all__ = [
+    "handle_generate",
+    "handle_search",
+    "handle_verify",
+    "handle_export",
+    "handle_import",
+    "handle_compact",
+    "handle_serve",
+    "handle_batch",
+    "handle_bench",
+]
@@ -0,0 +1,284 @@
+"""Резидентный сервис passgen на Unix-сокете.
+
+``passgen serve`` один раз загружает модули и открывает хранилище, после
+чего обслуживает клиентов через Unix-сокет: пул соединений PostgreSQL,
+соединения SQLite и индекс файла хранения остаются «тёплыми» между
+запросами. Одновременные клиенты обслуживаются в asyncio, блокирующая
+работа с хранилищем идёт в пуле потоков, а сохранения в файл объединяются
+в общие пачки (:class:`storage.GroupCommitWriter`).
+
+Протокол — JSON Lines: клиент пишет по одному запросу на строку, сервис
+отвечает строкой в том же порядке::
+
+    {"op": "verify", "password": "..."}
+    {"ok": true, "result": {"entries": [...]}}
+
+Операции: ``ping``, ``generate``, ``store``, ``search``, ``verify`` и
+``shutdown``. При ошибке приходит ``{"ok": false, "error": "..."}``.
+Синхронный клиент — :mod:`passgen.client`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import stat
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from . import backends, batch, codec, storage
+from .client import SOCKET_ENV, fallback_socket_dir, resolve_socket_path
+
+#: Максимальная длина строки запроса.
+MAX_LINE = 1 << 20
+
+
+class PassgenService:
+    """Обработчик запросов сервиса поверх одного хранилища.
+
+    Args:
+        backend (backends.StorageBackend): Хранилище, с которым работает сервис.
+    """
+
+    def __init__(self, backend: backends.StorageBackend) -> None:
+        self.backend = backend
+        self.requests = 0
+        self._stopped = asyncio.Event()
+        self._store = backend.store_password
+        self._writer: storage.GroupCommitWriter | None = None
+        if isinstance(backend, backends.FileBackend):
+            # Concurrent clients share one write, fsync and lock per batch.
+            self._writer = storage.GroupCommitWriter(backend.storage_file)
+            self._store = self._writer.store_password
+        self._ops: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {
+            "ping": self._ping,
+            "generate": self._generate,
+            "store": self._store_password,
+            "search": self._search,
+            "verify": self._verify,
+            "shutdown": self._shutdown,
+        }
+
+    async def handle(self, request: object) -> Dict[str, Any]:
+        """Выполнить один запрос и вернуть ответ протокола.
+
+        Args:
+            request (object): Разобранная строка запроса.
+
+        Returns:
+            Dict[str, Any]: ``{"ok": true, "result": ...}`` или ``{"ok": false, "error": ...}``.
+        """
+        self.requests += 1
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object"}
+        params = dict(request)
+        op = params.pop("op", None)
+        handler = self._ops.get(op)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown operation {op!r}"}
+        try:
+            batch.check_params(op, params)
+            result = await handler(**params)
+        except backends.backend_errors() as exc:
+            return {"ok": False, "error": str(exc)}
+        except Exception as exc:
+            # Every request gets a reply, or the client would wait forever.
+            return {"ok": False, "error": f"Internal error: {exc!r}"}
+        return {"ok": True, "result": result}
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслужить одно подключение: запросы выполняются по порядку."""
+        current = codec.get_codec()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(current.dumps_line({"ok": False, "error": "Request line is too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = current.loads(line)
+                except ValueError as exc:
+                    response: Dict[str, Any] = {"ok": False, "error": f"Invalid JSON: {exc}"}
+                else:
+                    response = await self.handle(request)
+                writer.write(current.dumps_line(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def wait_stopped(self) -> None:
+        """Дождаться запроса ``shutdown``."""
+        await self._stopped.wait()
+
+    def stop(self) -> None:
+        """Остановить сервис."""
+        self._stopped.set()
+
+    async def _ping(self) -> Dict[str, Any]:
+        return {"location": str(self.backend.location), "requests": self.requests}
+
+    async def _generate(self, **params: Any) -> Dict[str, Any]:
+        result, entries = await asyncio.to_thread(batch.prepare_generate, **params)
+        if entries:
+            await asyncio.to_thread(self._save, entries)
+            result["location"] = str(self.backend.location)
+        return result
+
+    def _save(self, entries: List[Dict[str, object]]) -> None:
+        if self._writer is not None and len(entries) == 1:
+            self._writer.append(entries[0])
+        else:
+            self.backend.store_entries(entries, batch_size=storage.DEFAULT_BATCH_SIZE)
+
+    async def _store_password(
+        self,
+        *,
+        password: str,
+        label: str,
+        length: int | None = None,
+        options: Dict[str, bool] | None = None,
+    ) -> Dict[str, Any]:
+        # An externally supplied password carries its own length.
+        if length is None:
+            length = len(password)
+        entry = await asyncio.to_thread(self._store, password, label=label, length=length, options=options)
+        return {"entry": entry, "location": str(self.backend.location)}
+
+    async def _search(
+        self,
+        *,
+        label: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        after_id: int | None = None,
+    ) -> Dict[str, Any]:
+        def run() -> List[Dict[str, object]]:
+            return list(self.backend.search(label, limit=limit, offset=offset, after_id=after_id))
+
+        return {"entries": await asyncio.to_thread(run), "location": str(self.backend.location)}
+
+    async def _verify(self, *, password: str, label: str | None = None) -> Dict[str, Any]:
+        entries = await asyncio.to_thread(self.backend.verify, password, label_query=label)
+        return {"entries": entries, "location": str(self.backend.location)}
+
+    async def _shutdown(self) -> Dict[str, Any]:
+        self.stop()
+        return {}
+
+
+def _prepare_socket_dir(directory: Path) -> None:
+    """Создать каталог сокета; личный каталог по умолчанию — с проверкой.
+
+    Raises:
+        OSError: Если :func:`~passgen.client.fallback_socket_dir` занят
+            чужим каталогом, ссылкой или доступен другим пользователям.
+    """
+    if directory != fallback_socket_dir():
+        directory.mkdir(parents=True, exist_ok=True)
+        return
+    try:
+        directory.mkdir(mode=0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise OSError(f"{directory} must be a directory owned by uid {os.getuid()} with mode 0700")
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Удалить сокет, оставшийся от завершившегося сервиса.
+
+    Raises:
+        OSError: Если по этому пути уже отвечает работающий сервис.
+        ValueError: Если путь занят файлом, который не является сокетом.
+    """
+    try:
+        mode = path.stat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except ConnectionRefusedError:
+        path.unlink()
+        return
+    finally:
+        probe.close()
+    raise OSError(f"passgen service is already running on {path}")
+
+
+async def serve(
+    backend: backends.StorageBackend,
+    socket_path: str | None = None,
+    *,
+    ready: Callable[[Path], None] | None = None,
+) -> None:
+    """Запустить сервис и обслуживать клиентов до ``shutdown`` или сигнала.
+
+    Сокет создаётся сразу с правами 0600 (umask на время ``bind``). При
+    остановке сокет удаляется, а соединения хранилища закрываются.
+
+    Args:
+        backend (backends.StorageBackend): Хранилище сервиса.
+        socket_path (str | None): Путь к сокету (см. :func:`passgen.client.resolve_socket_path`).
+        ready (Callable[[Path], None] | None): Вызывается, когда сокет готов.
+
+    Raises:
+        OSError: Если сокет занят работающим сервисом или каталог сокета
+            по умолчанию небезопасен.
+    """
+    import signal
+
+    path = resolve_socket_path(socket_path)
+    _prepare_socket_dir(path.parent)
+    _remove_stale_socket(path)
+    service = PassgenService(backend)
+    # Without the umask the socket would be reachable by others until chmod.
+    previous_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(service.handle_client, path=str(path), limit=MAX_LINE)
+    finally:
+        os.umask(previous_umask)
+    os.chmod(path, 0o600)
+    loop = asyncio.get_running_loop()
+    signals = []
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, service.stop)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Not the main thread (or not supported): rely on "shutdown".
+            continue
+        signals.append(signum)
+    try:
+        async with server:
+            if ready is not None:
+                ready(path)
+            await service.wait_stopped()
+    finally:
+        for signum in signals:
+            loop.remove_signal_handler(signum)
+        path.unlink(missing_ok=True)
+        backend.close()
+
+
+__all__ = [
+    "SOCKET_ENV",
+    "MAX_LINE",
+    "resolve_socket_path",
+    "PassgenService",
+    "serve",
+]
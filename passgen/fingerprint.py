@@ -0,0 +1,431 @@
+"""Отпечатки паролей для хранилищ.
+
+Вместо пароля хранится его отпечаток — строка ``<схема>$<параметры>$<hex>``:
+
+* ``sha256`` — исторический формат без префикса: голый SHA-256 в hex;
+* ``hmac-sha256`` — HMAC-SHA256 с секретным «перцем» хранилища;
+* ``scrypt`` и ``argon2id`` — медленная функция поверх HMAC с перцем.
+
+Отпечаток детерминирован для пары (пароль, перец), поэтому проверка
+остаётся поиском по индексу на равенство, а не перебором записей. Записи в
+старом формате SHA-256 продолжают проверяться: в поиск передаются отпечатки
+и по текущей схеме, и по SHA-256.
+
+Схема и перец задаются переменными окружения ``PASSGEN_HASH_SCHEME``
+(например, ``scrypt:n=16384,r=8,p=1``) и ``PASSGEN_PEPPER``. Если перец
+задан, а схема нет, используется ``hmac-sha256``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+#: Переменная окружения со схемой отпечатков.
+SCHEME_ENV = "PASSGEN_HASH_SCHEME"
+#: Переменная окружения с перцем хранилища.
+PEPPER_ENV = "PASSGEN_PEPPER"
+
+#: Исторический формат: SHA-256 без ключа и префикса.
+LEGACY_SCHEME = "sha256"
+
+#: Параметры по умолчанию для схем с настраиваемой стоимостью.
+DEFAULT_PARAMS: Dict[str, Dict[str, int]] = {
+    LEGACY_SCHEME: {},
+    "hmac-sha256": {},
+    "scrypt": {"n": 16384, "r": 8, "p": 1},
+    "argon2id": {"t": 2, "m": 65536, "p": 1},
+}
+
+#: Схемы, для которых кэшируется вычисленный отпечаток.
+SLOW_SCHEMES = frozenset({"scrypt", "argon2id"})
+
+#: Размер кэша отпечатков по умолчанию.
+DEFAULT_CACHE_SIZE = 1024
+#: Время жизни записи кэша в секундах.
+DEFAULT_CACHE_TTL = 300.0
+
+_DIGEST_SIZE = 32
+
+
+def encode_password(password: str) -> bytes:
+    """Закодировать пароль в байты для хэширования.
+
+    Все схемы и проверка старого SHA-256 используют одну кодировку:
+    UTF-8 с ``surrogateescape``, чтобы недекодируемые байты входного файла
+    (см. :func:`passgen.audit.read_candidates`) хэшировались как есть.
+
+    Args:
+        password (str): Пароль в открытом виде.
+
+    Returns:
+        bytes: Байты пароля.
+    """
+    return password.encode("utf-8", "surrogateescape")
+
+
+class VerificationCache:
+    """Ограниченный LRU-кэш отпечатков с временем жизни записей.
+
+    Ключом служит HMAC пароля со случайным ключом процесса, поэтому сам
+    пароль в кэше не хранится, а ключи бесполезны вне процесса.
+
+    Args:
+        maxsize (int): Максимальное количество записей.
+        ttl (float): Время жизни записи в секундах.
+
+    Raises:
+        ValueError: Если ``maxsize`` меньше 1 или ``ttl`` не положителен.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL) -> None:
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        if ttl <= 0:
+            raise ValueError("Cache TTL must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._key = secrets.token_bytes(32)
+        self._items: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, password: str) -> bytes:
+        return hmac.digest(self._key, encode_password(password), "sha256")
+
+    def get(self, password: str) -> str | None:
+        """Вернуть отпечаток из кэша или None, если его нет или он устарел."""
+        key = self._cache_key(password)
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, password: str, value: str) -> None:
+        """Запомнить отпечаток, вытеснив самую давнюю запись при переполнении."""
+        key = self._cache_key(password)
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class Fingerprinter:
+    """Вычислитель отпечатков по заданной схеме.
+
+    Args:
+        scheme (str): Одна из схем :data:`DEFAULT_PARAMS`.
+        pepper (bytes | str | None): Секрет хранилища для HMAC.
+        params (Dict[str, int] | None): Параметры стоимости (для scrypt — ``n``,
+            ``r``, ``p``; для argon2id — ``t``, ``m``, ``p``).
+        cache (VerificationCache | None): Кэш отпечатков; по умолчанию создаётся
+            для медленных схем.
+
+    Raises:
+        ValueError: Если схема или параметры неизвестны.
+    """
+
+    __slots__ = ("scheme", "params", "pepper", "prefix", "cache")
+
+    def __init__(
+        self,
+        scheme: str = LEGACY_SCHEME,
+        *,
+        pepper: bytes | str | None = None,
+        params: Dict[str, int] | None = None,
+        cache: VerificationCache | None = None,
+    ) -> None:
+        if scheme not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown fingerprint scheme {scheme!r}")
+        merged = dict(DEFAULT_PARAMS[scheme])
+        for name, value in (params or {}).items():
+            if name not in merged:
+                raise ValueError(f"Unknown parameter {name!r} for scheme {scheme!r}")
+            merged[name] = int(value)
+        if scheme == "hmac-sha256" and not pepper:
+            raise ValueError("Scheme 'hmac-sha256' requires a pepper")
+        self.scheme = scheme
+        self.params = merged
+        self.pepper = pepper.encode("utf-8") if isinstance(pepper, str) else (pepper or b"")
+        if scheme == LEGACY_SCHEME:
+            self.prefix = ""
+        elif merged:
+            encoded = ",".join(f"{name}={value}" for name, value in merged.items())
+            self.prefix = f"{scheme}${encoded}$"
+        else:
+            self.prefix = f"{scheme}$"
+        if cache is None and scheme in SLOW_SCHEMES:
+            cache = VerificationCache()
+        self.cache = cache
+
+    @classmethod
+    def from_spec(cls, spec: str, *, pepper: bytes | str | None = None) -> "Fingerprinter":
+        """Создать вычислитель из строки вида ``scrypt:n=16384,r=8,p=1``.
+
+        Args:
+            spec (str): Схема и необязательные параметры через двоеточие.
+            pepper (bytes | str | None): Секрет хранилища.
+
+        Returns:
+            Fingerprinter: Настроенный вычислитель.
+
+        Raises:
+            ValueError: Если строка не разбирается.
+        """
+        scheme, _, raw_params = spec.strip().partition(":")
+        params = {}
+        for item in filter(None, raw_params.split(",")):
+            name, separator, value = item.partition("=")
+            if not separator or not value.strip().isdigit():
+                raise ValueError(f"Invalid fingerprint parameter {item!r}")
+            params[name.strip()] = int(value)
+        return cls(scheme.strip().lower(), pepper=pepper, params=params)
+
+    def digest(self, password: str) -> bytes:
+        """Вычислить 32-байтный дайджест пароля без префикса и без кэша.
+
+        Args:
+            password (str): Пароль в открытом виде.
+
+        Returns:
+            bytes: Дайджест.
+        """
+        data = encode_password(password)
+        if self.scheme == LEGACY_SCHEME:
+            return hashlib.sha256(data).digest()
+        keyed = hmac.digest(self.pepper, data, "sha256")
+        if self.scheme == "hmac-sha256":
+            return keyed
+        if self.scheme == "scrypt":
+            n, r, p = self.params["n"], self.params["r"], self.params["p"]
+            return hashlib.scrypt(
+                keyed,
+                salt=b"passgen",
+                n=n,
+                r=r,
+                p=p,
+                maxmem=256 * r * (n + p + 2),
+                dklen=_DIGEST_SIZE,
+            )
+        low_level = _import_argon2()
+        return low_level.hash_secret_raw(
+            keyed,
+            b"passgen-argon2",
+            time_cost=self.params["t"],
+            memory_cost=self.params["m"],
+            parallelism=self.params["p"],
+            hash_len=_DIGEST_SIZE,
+            type=low_level.Type.ID,
+        )
+
+    def digest_many(self, passwords: List[str]) -> List[bytes]:
+        """Вычислить дайджесты пачки паролей (см. :meth:`digest`).
+
+        Для быстрых схем цикл идёт без вызова метода на каждый пароль, что
+        заметно при массовой проверке кандидатов.
+
+        Args:
+            passwords (List[str]): Пароли в открытом виде.
+
+        Returns:
+            List[bytes]: Дайджесты в порядке паролей.
+        """
+        if self.scheme == LEGACY_SCHEME:
+            sha256, encode = hashlib.sha256, encode_password
+            return [sha256(encode(password)).digest() for password in passwords]
+        if self.scheme == "hmac-sha256":
+            keyed, pepper, encode = hmac.digest, self.pepper, encode_password
+            return [keyed(pepper, encode(password), "sha256") for password in passwords]
+        return [self.digest(password) for password in passwords]
+
+    def fingerprint(self, password: str) -> str:
+        """Вычислить отпечаток пароля по текущей схеме.
+
+        Args:
+            password (str): Пароль в открытом виде.
+
+        Returns:
+            str: Отпечаток с префиксом схемы.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(password)
+            if cached is not None:
+                return cached
+        value = self.prefix + self.digest(password).hex()
+        if self.cache is not None:
+            self.cache.put(password, value)
+        return value
+
+    def candidates(self, password: str) -> List[str]:
+        """Вернуть отпечатки, под которыми пароль может быть сохранён.
+
+        Помимо текущей схемы, в список входит SHA-256 старого формата.
+
+        Args:
+            password (str): Пароль в открытом виде.
+
+        Returns:
+            List[str]: Отпечатки для поиска в хранилище.
+        """
+        current = self.fingerprint(password)
+        if self.scheme == LEGACY_SCHEME:
+            return [current]
+        return [current, hashlib.sha256(encode_password(password)).hexdigest()]
+
+
+def _import_argon2():
+    """Импортировать argon2-cffi с понятным сообщением об ошибке."""
+    try:
+        from argon2 import low_level  # type: ignore
+    except ImportError as exc:
+        raise ImportError("Установите пакет argon2-cffi для схемы argon2id") from exc
+    return low_level
+
+
+def split_fingerprint(value: str) -> Tuple[str, bytes]:
+    """Разделить отпечаток на префикс схемы и 32-байтный дайджест.
+
+    Args:
+        value (str): Сохранённый отпечаток.
+
+    Returns:
+        Tuple[str, bytes]: Префикс (пустой для SHA-256) и дайджест.
+
+    Raises:
+        ValueError: Если дайджест не является 32-байтным hex.
+    """
+    prefix, _, hex_digest = value.rpartition("$")
+    if prefix:
+        prefix += "$"
+    try:
+        digest = bytes.fromhex(hex_digest)
+    except ValueError as exc:
+        raise ValueError(f"Invalid fingerprint {value!r}") from exc
+    if len(digest) != _DIGEST_SIZE:
+        raise ValueError(f"Invalid fingerprint {value!r}")
+    return prefix, digest
+
+
+def fingerprinter_for_prefix(prefix: str, *, pepper: bytes | str | None = None) -> Fingerprinter:
+    """Восстановить вычислитель по префиксу сохранённого отпечатка.
+
+    Args:
+        prefix (str): Префикс из :func:`split_fingerprint` (пустой для SHA-256).
+        pepper (bytes | str | None): Перец хранилища.
+
+    Returns:
+        Fingerprinter: Вычислитель без кэша.
+
+    Raises:
+        ValueError: Если префикс не разбирается или схеме нужен перец.
+    """
+    scheme, _, params = prefix.rstrip("$").partition("$")
+    spec = f"{scheme}:{params}" if params else (scheme or LEGACY_SCHEME)
+    fingerprinter = Fingerprinter.from_spec(spec, pepper=pepper)
+    fingerprinter.cache = None
+    return fingerprinter
+
+
+@lru_cache(maxsize=8)
+def _fingerprinter_for(spec: str, pepper: str) -> Fingerprinter:
+    return Fingerprinter.from_spec(spec, pepper=pepper or None)
+
+
+def get_fingerprinter() -> Fingerprinter:
+    """Вернуть вычислитель, настроенный переменными окружения.
+
+    Returns:
+        Fingerprinter: Общий для процесса вычислитель (с общим кэшем).
+
+    Raises:
+        ValueError: Если ``PASSGEN_HASH_SCHEME`` задана неверно.
+    """
+    pepper = os.environ.get(PEPPER_ENV, "")
+    spec = os.environ.get(SCHEME_ENV) or ("hmac-sha256" if pepper else LEGACY_SCHEME)
+    return _fingerprinter_for(spec, pepper)
+
+
+def fingerprint_password(password: str) -> str:
+    """Вычислить отпечаток пароля по схеме из окружения."""
+    return get_fingerprinter().fingerprint(password)
+
+
+def candidate_fingerprints(password: str) -> List[str]:
+    """Вернуть отпечатки для проверки пароля по схеме из окружения."""
+    return get_fingerprinter().candidates(password)
+
+
+def measure_cost(specs: List[str], *, rounds: int = 5, pepper: str = "benchmark-pepper") -> List[Dict[str, object]]:
+    """Измерить стоимость отпечатков для набора схем.
+
+    Для каждой схемы считается среднее время вычисления без кэша и время
+    повторной проверки того же пароля через кэш.
+
+    Args:
+        specs (List[str]): Схемы в формате :meth:`Fingerprinter.from_spec`.
+        rounds (int): Сколько паролей вычислять для усреднения.
+        pepper (str): Перец для схем с ключом.
+
+    Returns:
+        List[Dict[str, object]]: Строки отчёта с полями ``scheme``,
+        ``cold_ms`` и ``cached_ms``.
+    """
+    report = []
+    for spec in specs:
+        fingerprinter = Fingerprinter.from_spec(spec, pepper=pepper)
+        if fingerprinter.cache is None:
+            fingerprinter.cache = VerificationCache()
+        passwords = [f"password-{index}" for index in range(rounds)]
+        started = time.perf_counter()
+        for password in passwords:
+            fingerprinter.fingerprint(password)
+        cold = (time.perf_counter() - started) / rounds
+        started = time.perf_counter()
+        for password in passwords:
+            fingerprinter.fingerprint(password)
+        cached = (time.perf_counter() - started) / rounds
+        report.append({"scheme": spec, "cold_ms": cold * 1000, "cached_ms": cached * 1000})
+    return report
+
+
+__all__ = [
+    "SCHEME_ENV",
+    "PEPPER_ENV",
+    "LEGACY_SCHEME",
+    "DEFAULT_PARAMS",
+    "DEFAULT_CACHE_SIZE",
+    "DEFAULT_CACHE_TTL",
+    "encode_password",
+    "VerificationCache",
+    "Fingerprinter",
+    "split_fingerprint",
+    "fingerprinter_for_prefix",
+    "get_fingerprinter",
+    "fingerprint_password",
+    "candidate_fingerprints",
+    "measure_cost",
+]
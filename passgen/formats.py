@@ -0,0 +1,237 @@
+"""Форматы вывода записей для ``passgen search``.
+
+* ``text`` — многострочный вывод для человека (по умолчанию);
+* ``table`` — таблица с заголовком, ширины колонок подбираются по первой
+  порции записей;
+* ``csv`` — CSV с заголовком, опции через ``;``;
+* ``jsonl`` — по записи JSON на строку, как у ``passgen export``.
+
+Записи форматируются порциями и пишутся в поток одним ``write`` на порцию,
+без сброса буфера после каждой строки, поэтому вывод большого результата
+упирается в ввод-вывод, а не в интерпретатор. Строка включённых опций
+берётся из заранее построенной таблицы по битовой маске флагов политики
+(:class:`OptionsFormatter`).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from itertools import islice
+from typing import IO, Any, Callable, Dict, Iterable, List, Tuple
+
+from .utils import OPTION_NAMES
+
+#: Имена форматов вывода.
+FORMATS = ("text", "table", "csv", "jsonl")
+
+#: Сколько записей форматируется и пишется за один ``write``.
+DEFAULT_CHUNK_SIZE = 1024
+
+# Columns of the table and CSV formats, after an optional "id".
+_COLUMNS = ("label", "hash", "length", "options", "created_at")
+
+_Renderer = Callable[[List[Dict[str, Any]]], str]
+
+
+class OptionsFormatter:
+    """Строка включённых опций записи по заранее построенной таблице.
+
+    Для каждой из 16 масок флагов :data:`OPTION_NAMES` строка собирается
+    один раз при создании, а для записи остаётся вычислить маску.
+
+    Args:
+        separator (str): Разделитель имён опций.
+        empty (str): Строка для записи без включённых опций.
+    """
+
+    __slots__ = ("separator", "empty", "table")
+
+    def __init__(self, separator: str = ", ", empty: str = "—") -> None:
+        self.separator = separator
+        self.empty = empty
+        self.table = tuple(
+            separator.join(name for bit, name in enumerate(OPTION_NAMES) if mask >> bit & 1) or empty
+            for mask in range(1 << len(OPTION_NAMES))
+        )
+
+    def format(self, options: Dict[str, bool] | None) -> str:
+        """Вернуть включённые опции через разделитель.
+
+        Args:
+            options (Dict[str, bool] | None): Опции записи.
+
+        Returns:
+            str: Строка опций.
+        """
+        if not options:
+            return self.empty
+        # Entries written by passgen carry exactly the four policy flags;
+        # anything else (e.g. imported data) takes the generic path.
+        if (
+            len(options) == 4
+            and "digits" in options
+            and "special" in options
+            and "uppercase" in options
+            and "lowercase" in options
+        ):
+            get = options.get
+            return self.table[
+                (1 if get("digits") else 0)
+                | (2 if get("special") else 0)
+                | (4 if get("uppercase") else 0)
+                | (8 if get("lowercase") else 0)
+            ]
+        return self.separator.join([name for name, enabled in options.items() if enabled]) or self.empty
+
+
+def _text(first: List[Dict[str, Any]]) -> Tuple[str, _Renderer]:
+    options = OptionsFormatter(", ", "—").format
+
+    def render(chunk: List[Dict[str, Any]]) -> str:
+        return "".join(
+            [
+                (f"id: {entry['id']}\n" if "id" in entry else "")
+                + f"label: {entry.get('label')}\n"
+                f"  hash: {entry.get('hash')}\n"
+                f"  length: {entry.get('length')}\n"
+                f"  options: {options(entry.get('options'))}\n"
+                f"  created_at: {entry.get('created_at')}\n"
+                for entry in chunk
+            ]
+        )
+
+    return "", render
+
+
+def _columns(chunk: List[Dict[str, Any]], with_id: bool, options: Callable[[Any], str]) -> List[List[Any]]:
+    """Разложить порцию записей по колонкам таблицы и CSV."""
+    columns = [
+        [entry.get("label") for entry in chunk],
+        [entry.get("hash") for entry in chunk],
+        [entry.get("length") for entry in chunk],
+        [options(entry.get("options")) for entry in chunk],
+        [entry.get("created_at") for entry in chunk],
+    ]
+    if with_id:
+        columns.insert(0, [entry.get("id") for entry in chunk])
+    return columns
+
+
+def _table(first: List[Dict[str, Any]]) -> Tuple[str, _Renderer]:
+    with_id = "id" in first[0]
+    names = (("id",) if with_id else ()) + _COLUMNS
+    options = OptionsFormatter(",", "—").format
+    widths = [
+        max(len(name), max(len(str(value)) for value in column))
+        for name, column in zip(names, _columns(first, with_id, options))
+    ]
+    # Longer values in later chunks widen their row instead of being cut.
+    line = "  ".join(f"{{!s:<{width}}}" for width in widths[:-1]) + "  {!s}\n"
+    header = line.format(*names) + line.format(*("-" * width for width in widths))
+
+    def render(chunk: List[Dict[str, Any]]) -> str:
+        return "".join(map(line.format, *_columns(chunk, with_id, options)))
+
+    return header, render
+
+
+def _csv(first: List[Dict[str, Any]]) -> Tuple[str, _Renderer]:
+    with_id = "id" in first[0]
+    names = (("id",) if with_id else ()) + _COLUMNS
+    options = OptionsFormatter(";", "").format
+    row = ",".join(["{}"] * len(names)) + "\n"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    header = buffer.getvalue()
+
+    def render(chunk: List[Dict[str, Any]]) -> str:
+        columns = _columns(chunk, with_id, options)
+        text = "".join(map(row.format, *columns))
+        # csv.writer costs microseconds per row; it is only needed when some
+        # value has to be quoted or is None (written as an empty field).
+        if (
+            text.count(",") == (len(names) - 1) * len(chunk)
+            and text.count("\n") == len(chunk)
+            and '"' not in text
+            and "\r" not in text
+            and "None" not in text
+        ):
+            return text
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*columns))
+        return buffer.getvalue()
+
+    return header, render
+
+
+def _jsonl(first: List[Dict[str, Any]]) -> Tuple[str, _Renderer]:
+    from . import codec
+
+    dumps_line = codec.get_codec().dumps_line
+
+    def render(chunk: List[Dict[str, Any]]) -> str:
+        return b"".join([dumps_line(entry) for entry in chunk]).decode("utf-8")
+
+    return "", render
+
+
+_FORMATTERS: Dict[str, Callable[[List[Dict[str, Any]]], Tuple[str, _Renderer]]] = {
+    "text": _text,
+    "table": _table,
+    "csv": _csv,
+    "jsonl": _jsonl,
+}
+
+
+def write_entries(
+    entries: Iterable[Dict[str, Any]],
+    output: IO[str],
+    fmt: str = "text",
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Потоково вывести записи в выбранном формате.
+
+    Для пустого результата ничего не выводится, даже заголовок.
+
+    Args:
+        entries (Iterable[Dict[str, Any]]): Записи хранилища.
+        output (IO[str]): Текстовый поток вывода.
+        fmt (str): Один из :data:`FORMATS`.
+        chunk_size (int): Сколько записей форматировать за один ``write``.
+
+    Returns:
+        int: Число выведенных записей.
+
+    Raises:
+        ValueError: Если формат неизвестен или ``chunk_size`` меньше 1.
+    """
+    factory = _FORMATTERS.get(fmt)
+    if factory is None:
+        raise ValueError(f"Unknown output format {fmt!r}")
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    iterator = iter(entries)
+    render = None
+    count = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return count
+        if render is None:
+            header, render = factory(chunk)
+            if header:
+                output.write(header)
+        output.write(render(chunk))
+        count += len(chunk)
+
+
+__all__ = [
+    "FORMATS",
+    "DEFAULT_CHUNK_SIZE",
+    "OptionsFormatter",
+    "write_entries",
+]
@@ -3,27 +3,368 @@
 from __future__ import annotations
 
 import secrets
-from typing import List
+from functools import lru_cache
+from typing import Dict, Iterator, List, Sequence, Tuple
 
 from . import utils
 
+#: Сколько байтов энтропии запрашивается у ОС за один вызов.
+ENTROPY_BLOCK_SIZE = 4096
 
-def generate_password(
+#: Начиная с какого размера партии backend ``auto`` выбирает NumPy.
+NUMPY_BATCH_THRESHOLD = 10_000
+
+#: Сколько паролей NumPy-backend собирает за одну матричную операцию.
+NUMPY_CHUNK_SIZE = 8192
+
+_BACKENDS = ("auto", "python", "numpy")
+
+
+def _build_translation(alphabet: str) -> Tuple[bytes, bytes]:
+    """Построить таблицу отображения случайных байтов в символы алфавита.
+
+    Байт ``b`` меньше порога ``256 - 256 % len(alphabet)`` отображается в
+    ``alphabet[b % len(alphabet)]``, остальные байты отбрасываются. Так
+    каждый символ выпадает с одинаковой вероятностью.
+
+    Args:
+        alphabet (str): ASCII-алфавит длиной от 1 до 256 символов.
+
+    Returns:
+        Tuple[bytes, bytes]: Таблица для ``bytes.translate`` и отбрасываемые байты.
+    """
+    size = len(alphabet)
+    threshold = 256 - 256 % size
+    table = bytes(ord(alphabet[value % size]) if value < threshold else 0 for value in range(256))
+    rejected = bytes(range(threshold, 256))
+    return table, rejected
+
+
+class _RandomBytes:
+    """Буферизованный источник случайных байтов ОС."""
+
+    __slots__ = ("_block_size", "_buffer", "_pos")
+
+    def __init__(self, block_size: int = ENTROPY_BLOCK_SIZE) -> None:
+        self._block_size = block_size
+        self._buffer = b""
+        self._pos = 0
+
+    def read(self, count: int) -> bytes:
+        """Вернуть ``count`` случайных байтов, пополняя буфер блоками."""
+        end = self._pos + count
+        if end > len(self._buffer):
+            tail = self._buffer[self._pos:]
+            self._buffer = tail + secrets.token_bytes(max(self._block_size, count))
+            self._pos, end = 0, count
+        chunk = self._buffer[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def below(self, bound: int) -> int:
+        """Вернуть равномерно распределённое целое из ``range(bound)``."""
+        width = (max(bound - 1, 1).bit_length() + 7) // 8
+        space = 1 << (8 * width)
+        limit = space - space % bound
+        while True:
+            value = int.from_bytes(self.read(width), "big")
+            if value < limit:
+                return value % bound
+
+
+class _SymbolStream:
+    """Поток равномерно распределённых символов одного алфавита."""
+
+    __slots__ = ("_table", "_rejected", "_block_size", "_buffer", "_pos")
+
+    def __init__(self, table: bytes, rejected: bytes, block_size: int = ENTROPY_BLOCK_SIZE) -> None:
+        self._table = table
+        self._rejected = rejected
+        self._block_size = block_size
+        self._buffer = b""
+        self._pos = 0
+
+    def take(self, count: int) -> bytes:
+        """Вернуть ``count`` ASCII-символов алфавита."""
+        end = self._pos + count
+        if end > len(self._buffer):
+            chunks = [self._buffer[self._pos:]]
+            available = len(chunks[0])
+            while available < count:
+                raw = secrets.token_bytes(max(self._block_size, count))
+                chunk = raw.translate(self._table, self._rejected)
+                chunks.append(chunk)
+                available += len(chunk)
+            self._buffer = b"".join(chunks)
+            self._pos, end = 0, count
+        symbols = self._buffer[self._pos:end]
+        self._pos = end
+        return symbols
+
+
+def _assemble(
+    length: int,
+    merged: _SymbolStream,
+    per_class: Sequence[_SymbolStream],
+    source: _RandomBytes,
+) -> str:
+    """Собрать один пароль из потоков символов.
+
+    Позиции обязательных символов выбираются как случайная упорядоченная
+    выборка без повторений, остальные позиции заполняются из общего
+    алфавита. Распределение совпадает с «обязательные символы + shuffle».
+    """
+    chars = bytearray(merged.take(length))
+    slots = list(range(length))
+    for index, stream in enumerate(per_class):
+        pick = index + source.below(length - index)
+        slots[index], slots[pick] = slots[pick], slots[index]
+        chars[slots[index]] = stream.take(1)[0]
+    return chars.decode("ascii")
+
+
+@lru_cache(maxsize=1)
+def _load_numpy():
+    """Импортировать NumPy, если он установлен.
+
+    Returns:
+        module | None: Модуль ``numpy`` или None.
+    """
+    try:
+        import numpy  # type: ignore
+    except ImportError:
+        return None
+    return numpy
+
+
+def _np_symbols(np, table, threshold: int, count: int):
+    """Получить ``count`` равномерных символов алфавита как массив uint8."""
+    out = np.empty(count, dtype=np.uint8)
+    filled = 0
+    while filled < count:
+        need = count - filled
+        # Over-draw by the expected rejection rate to usually finish in one pass.
+        raw = np.frombuffer(secrets.token_bytes(need * 256 // threshold + 64), dtype=np.uint8)
+        accepted = raw[raw < threshold][:need]
+        out[filled:filled + accepted.size] = table[accepted]
+        filled += accepted.size
+    return out
+
+
+def _np_below(np, bound: int, count: int):
+    """Получить ``count`` равномерных целых из ``range(bound)`` как массив."""
+    limit = (1 << 32) - (1 << 32) % bound
+    out = np.empty(count, dtype=np.int64)
+    filled = 0
+    while filled < count:
+        need = count - filled
+        raw = np.frombuffer(secrets.token_bytes(4 * (need + 8)), dtype=np.uint32)
+        accepted = raw[raw < limit][:need]
+        out[filled:filled + accepted.size] = accepted % bound
+        filled += accepted.size
+    return out
+
+
+def _np_assemble(np, policy: PasswordPolicy, count: int) -> List[str]:
+    """Собрать ``count`` паролей матричными операциями NumPy.
+
+    Повторяет схему :func:`_assemble`: матрица ``(count, length)`` символов
+    общего алфавита, затем частичный Fisher–Yates по всем строкам сразу
+    выбирает позиции для обязательного символа каждого набора.
+    """
+    length = policy.length
+    merged = np.frombuffer(policy.table, dtype=np.uint8)
+    chars = _np_symbols(np, merged, policy.threshold, count * length).reshape(count, length)
+    slots = np.tile(np.arange(length, dtype=np.int64), (count, 1))
+    rows = np.arange(count)
+    for index, (table, rejected) in enumerate(policy.class_tables):
+        pick = index + _np_below(np, length - index, count)
+        current = slots[rows, index].copy()
+        slots[rows, index] = slots[rows, pick]
+        slots[rows, pick] = current
+        threshold = 256 - len(rejected)
+        symbols = _np_symbols(np, np.frombuffer(table, dtype=np.uint8), threshold, count)
+        chars[rows, slots[rows, index]] = symbols
+    text = chars.tobytes().decode("ascii")
+    return [text[start:start + length] for start in range(0, count * length, length)]
+
+
+class PasswordPolicy:
+    """Скомпилированные параметры генерации паролей.
+
+    Наборы символов, общий алфавит, таблицы отображения байтов и порог
+    отбрасывания вычисляются один раз при создании политики, после чего
+    генерация сводится к чтению энтропии и табличным преобразованиям.
+
+    Args:
+        length (int): Требуемая длина пароля.
+        use_digits (bool): Включать цифры.
+        use_special (bool): Включать спецсимволы.
+        use_uppercase (bool): Включать заглавные буквы.
+        use_lowercase (bool): Включать строчные буквы.
+
+    Raises:
+        ValueError: Если не выбран ни один набор или длина слишком мала.
+    """
+
+    __slots__ = (
+        "length",
+        "use_digits",
+        "use_special",
+        "use_uppercase",
+        "use_lowercase",
+        "charsets",
+        "alphabet",
+        "table",
+        "rejected",
+        "threshold",
+        "class_tables",
+    )
+
+    def __init__(
+        self,
+        length: int,
+        *,
+        use_digits: bool = True,
+        use_special: bool = True,
+        use_uppercase: bool = True,
+        use_lowercase: bool = True,
+    ) -> None:
+        charsets: List[str] = utils.build_charsets(
+            include_lower=use_lowercase,
+            include_upper=use_uppercase,
+            include_digits=use_digits,
+            include_special=use_special,
+        )
+        utils.validate_length(length, min_required=len(charsets))
+
+        self.length = length
+        self.use_digits = use_digits
+        self.use_special = use_special
+        self.use_uppercase = use_uppercase
+        self.use_lowercase = use_lowercase
+        self.charsets: Tuple[str, ...] = tuple(charsets)
+        self.alphabet = "".join(charsets)
+        self.table, self.rejected = _build_translation(self.alphabet)
+        self.threshold = 256 - 256 % len(self.alphabet)
+        self.class_tables: Tuple[Tuple[bytes, bytes], ...] = tuple(
+            _build_translation(charset) for charset in charsets
+        )
+
+    @property
+    def options(self) -> Dict[str, bool]:
+        """Опции генерации в формате, который сохраняется в хранилище."""
+        return {
+            "digits": self.use_digits,
+            "special": self.use_special,
+            "uppercase": self.use_uppercase,
+            "lowercase": self.use_lowercase,
+        }
+
+    def generate(self) -> str:
+        """Сгенерировать один пароль по политике."""
+        return next(self.generate_many(1))
+
+    def generate_many(self, count: int, *, backend: str = "auto") -> Iterator[str]:
+        """Лениво сгенерировать ``count`` паролей по политике.
+
+        Args:
+            count (int): Количество паролей.
+            backend (str): ``python``, ``numpy`` или ``auto`` — NumPy для
+                партий от :data:`NUMPY_BATCH_THRESHOLD`, если он установлен.
+
+        Returns:
+            Iterator[str]: Итератор по паролям.
+
+        Raises:
+            ValueError: Если ``count`` меньше 1 или backend неизвестен.
+            ImportError: Если запрошен backend ``numpy`` без установленного NumPy.
+        """
+        if count < 1:
+            raise ValueError("Count must be at least 1")
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(_BACKENDS)}")
+        if backend == "python":
+            return self._iter(count)
+        np = _load_numpy()
+        if backend == "numpy" and np is None:
+            raise ImportError("Установите пакет numpy для векторизованной генерации")
+        if np is None or (backend == "auto" and count < NUMPY_BATCH_THRESHOLD):
+            return self._iter(count)
+        return self._iter_numpy(np, count)
+
+    def _iter_numpy(self, np, count: int) -> Iterator[str]:
+        for start in range(0, count, NUMPY_CHUNK_SIZE):
+            yield from _np_assemble(np, self, min(NUMPY_CHUNK_SIZE, count - start))
+
+    def _iter(self, count: int) -> Iterator[str]:
+        # Small jobs should not pay for a full entropy block per stream.
+        block_size = min(ENTROPY_BLOCK_SIZE, max(64, 2 * count * self.length))
+        merged = _SymbolStream(self.table, self.rejected, block_size)
+        per_class = [
+            _SymbolStream(table, rejected, block_size) for table, rejected in self.class_tables
+        ]
+        source = _RandomBytes(block_size)
+        length = self.length
+        for _ in range(count):
+            yield _assemble(length, merged, per_class, source)
+
+    def __repr__(self) -> str:
+        return (
+            f"PasswordPolicy(length={self.length}, use_digits={self.use_digits}, "
+            f"use_special={self.use_special}, use_uppercase={self.use_uppercase}, "
+            f"use_lowercase={self.use_lowercase})"
+        )
+
+
+@lru_cache(maxsize=64)
+def get_policy(
     length: int,
     *,
     use_digits: bool = True,
     use_special: bool = True,
     use_uppercase: bool = True,
     use_lowercase: bool = True,
+) -> PasswordPolicy:
+    """Вернуть закэшированную политику для набора опций.
+
+    Args:
+        length (int): Требуемая длина пароля.
+        use_digits (bool): Включать цифры.
+        use_special (bool): Включать спецсимволы.
+        use_uppercase (bool): Включать заглавные буквы.
+        use_lowercase (bool): Включать строчные буквы.
+
+    Returns:
+        PasswordPolicy: Политика, общая для одинаковых опций.
+    """
+    return PasswordPolicy(
+        length,
+        use_digits=use_digits,
+        use_special=use_special,
+        use_uppercase=use_uppercase,
+        use_lowercase=use_lowercase,
+    )
+
+
+def generate_password(
+    length: int | None = None,
+    *,
+    use_digits: bool = True,
+    use_special: bool = True,
+    use_uppercase: bool = True,
+    use_lowercase: bool = True,
+    policy: PasswordPolicy | None = None,
 ) -> str:
     """Сгенерировать пароль с учётом выбранных опций.
 
     Args:
-        length (int): Требуемая длина пароля.
+        length (int | None): Требуемая длина пароля (не нужна при ``policy``).
         use_digits (bool): Включать цифры.
         use_special (bool): Включать спецсимволы.
         use_uppercase (bool): Включать заглавные буквы.
         use_lowercase (bool): Включать строчные буквы.
+        policy (PasswordPolicy | None): Готовая политика вместо отдельных опций.
 
     Returns:
         str: Случайный пароль требуемой длины.
@@ -31,27 +372,72 @@ def generate_password(
     Raises:
         ValueError: Если длина меньше количества выбранных наборов символов.
     """
-    charsets: List[str] = utils.build_charsets(
-        include_lower=use_lowercase,
-        include_upper=use_uppercase,
-        include_digits=use_digits,
-        include_special=use_special,
-    )
+    if policy is None:
+        policy = _policy_from_options(length, use_digits, use_special, use_uppercase, use_lowercase)
+    return policy.generate()
+
+
+def generate_passwords(
+    count: int,
+    length: int | None = None,
+    *,
+    use_digits: bool = True,
+    use_special: bool = True,
+    use_uppercase: bool = True,
+    use_lowercase: bool = True,
+    policy: PasswordPolicy | None = None,
+    backend: str = "auto",
+) -> Iterator[str]:
+    """Лениво сгенерировать серию паролей с общими опциями.
 
-    min_required = len(charsets)
-    utils.validate_length(length, min_required=min_required)
+    Энтропия читается из ОС крупными блоками и отображается на алфавит
+    табличной выборкой с отбрасыванием, поэтому пароли не накапливаются
+    в памяти и не требуют вызова ``rng.choice`` на каждый символ.
 
-    rng = secrets.SystemRandom()
+    Args:
+        count (int): Количество паролей.
+        length (int | None): Требуемая длина каждого пароля (не нужна при ``policy``).
+        use_digits (bool): Включать цифры.
+        use_special (bool): Включать спецсимволы.
+        use_uppercase (bool): Включать заглавные буквы.
+        use_lowercase (bool): Включать строчные буквы.
+        policy (PasswordPolicy | None): Готовая политика вместо отдельных опций.
+        backend (str): Backend генерации: ``auto``, ``python`` или ``numpy``.
+
+    Returns:
+        Iterator[str]: Итератор по сгенерированным паролям.
 
-    # Guarantee at least one character from every selected charset.
-    password_chars = [rng.choice(charset) for charset in charsets]
+    Raises:
+        ValueError: Если ``count`` меньше 1 или длина меньше количества наборов.
+    """
+    if policy is None:
+        policy = _policy_from_options(length, use_digits, use_special, use_uppercase, use_lowercase)
+    return policy.generate_many(count, backend=backend)
 
-    all_chars = "".join(charsets)
-    remaining = length - len(password_chars)
-    password_chars.extend(rng.choice(all_chars) for _ in range(remaining))
 
-    rng.shuffle(password_chars)
-    return "".join(password_chars)
+def _policy_from_options(
+    length: int | None,
+    use_digits: bool,
+    use_special: bool,
+    use_uppercase: bool,
+    use_lowercase: bool,
+) -> PasswordPolicy:
+    if length is None:
+        raise ValueError("Either length or policy must be provided")
+    return get_policy(
+        length,
+        use_digits=use_digits,
+        use_special=use_special,
+        use_uppercase=use_uppercase,
+        use_lowercase=use_lowercase,
+    )
 
 
-__all__ = ["generate_password"]
+__all__ = [
+    "ENTROPY_BLOCK_SIZE",
+    "NUMPY_BATCH_THRESHOLD",
+    "PasswordPolicy",
+    "get_policy",
+    "generate_password",
+    "generate_passwords",
+]
@@ -27,18 +27,57 @@ python3 -m passgen.main generate --length 12 --save --storage-dsn "$PASSGEN_DSN"
 from __future__ import annotations
 
 import argparse
-from typing import Optional, Sequence
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
 
-try:
-    from . import commands
-except ImportError:
-    import sys
-    from pathlib import Path
+if TYPE_CHECKING:
+    from types import ModuleType
 
-    ROOT = Path(__file__).resolve().parents[1]
-    if str(ROOT) not in sys.path:
-        sys.path.insert(0, str(ROOT))
-    from passgen import commands
+
+def _load_commands() -> "ModuleType":
+    """Импортировать модуль обработчиков подкоманд.
+
+    Обработчики и их зависимости (генератор, хранилища, hashlib) грузятся
+    только при вызове подкоманды: ``--help`` и разбор аргументов обходятся
+    без них.
+
+    Returns:
+        ModuleType: Модуль :mod:`passgen.commands`.
+    """
+    try:
+        from . import commands
+    except ImportError:
+        import sys
+        from pathlib import Path
+
+        ROOT = Path(__file__).resolve().parents[1]
+        if str(ROOT) not in sys.path:
+            sys.path.insert(0, str(ROOT))
+        from passgen import commands
+    return commands
+
+
+def __getattr__(name: str):
+    # Keeps ``passgen.main.commands`` available without an eager import.
+    if name == "commands":
+        return _load_commands()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _handler(name: str) -> Callable[[argparse.Namespace], int]:
+    """Вернуть обработчик подкоманды, который импортирует её модуль при вызове.
+
+    Args:
+        name (str): Имя функции в :mod:`passgen.commands`.
+
+    Returns:
+        Callable[[argparse.Namespace], int]: Обработчик для ``set_defaults(func=...)``.
+    """
+
+    def run(args: argparse.Namespace) -> int:
+        return getattr(_load_commands(), name)(args)
+
+    run.__name__ = run.__qualname__ = name
+    return run
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -50,6 +89,13 @@ def build_parser() -> argparse.ArgumentParser:
 
     _build_generate_subcommand(subparsers)
     _build_search_subcommand(subparsers)
+    _build_verify_subcommand(subparsers)
+    _build_export_subcommand(subparsers)
+    _build_import_subcommand(subparsers)
+    _build_compact_subcommand(subparsers)
+    _build_serve_subcommand(subparsers)
+    _build_batch_subcommand(subparsers)
+    _build_bench_subcommand(subparsers)
     return parser
 
 
@@ -69,6 +115,23 @@ def _build_generate_subcommand(subparsers: argparse._SubParsersAction) -> None:
         default=16,
         help="Длина пароля (по умолчанию 16)",
     )
+    generate.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="Количество паролей, выводимых построчно (по умолчанию 1)",
+    )
+    generate.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Число процессов для генерации больших партий (0 — по числу ядер, по умолчанию 1)",
+    )
+    generate.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Выводить шарды по готовности, а не в порядке постановки",
+    )
     _add_boolean_pair(
         generate,
         name="digits",
@@ -114,11 +177,22 @@ def _build_generate_subcommand(subparsers: argparse._SubParsersAction) -> None:
         "--storage-file",
         help="Путь к файлу для сохранения (по умолчанию passgen/passwords.json)",
     )
+    generate.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
     generate.add_argument(
         "--storage-dsn",
         help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
     )
-    generate.set_defaults(func=commands.handle_generate)
+    generate.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Сколько записей сохранять за одну запись/транзакцию при --count (по умолчанию 1000)",
+    )
+    _add_daemon_arguments(generate)
+    generate.set_defaults(func=_handler("handle_generate"))
 
 
 def _build_search_subcommand(subparsers: argparse._SubParsersAction) -> None:
@@ -144,10 +218,343 @@ def _build_search_subcommand(subparsers: argparse._SubParsersAction) -> None:
         help="Путь к файлу хранения",
     )
     search.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    search.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    search.add_argument(
+        "--limit",
+        type=int,
+        help="Вывести не больше указанного количества записей",
+    )
+    search.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Пропустить указанное количество записей (по умолчанию 0)",
+    )
+    search.add_argument(
+        "--after-id",
+        type=int,
+        help="Только для PostgreSQL: вывести записи с id больше указанного (постраничный вывод)",
+    )
+    search.add_argument(
+        "--format",
+        # Mirrors formats.FORMATS without importing the module at startup.
+        choices=("text", "table", "csv", "jsonl"),
+        default="text",
+        help="Формат вывода: text (по умолчанию), table, csv или jsonl",
+    )
+    _add_daemon_arguments(search)
+    search.set_defaults(func=_handler("handle_search"))
+
+
+def _build_verify_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `verify` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    verify = subparsers.add_parser(
+        "verify",
+        help="Проверить список паролей-кандидатов по хранилищу",
+    )
+    verify.add_argument(
+        "--from-file",
+        required=True,
+        help="Файл с кандидатами, по одному на строку (- для stdin)",
+    )
+    verify.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Число процессов для хэширования (0 — по числу ядер, по умолчанию 0)",
+    )
+    verify.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2048,
+        help="Сколько кандидатов отправлять процессу за раз (по умолчанию 2048)",
+    )
+    verify.add_argument(
+        "--storage-file",
+        help="Путь к файлу хранения",
+    )
+    verify.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    verify.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    verify.set_defaults(func=_handler("handle_verify"))
+
+
+def _build_export_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `export` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    export = subparsers.add_parser(
+        "export",
+        help="Выгрузить записи хранилища в файл JSON Lines",
+    )
+    export.add_argument(
+        "--output",
+        required=True,
+        help="Файл JSON Lines для выгрузки (- для stdout)",
+    )
+    export.add_argument(
+        "--storage-file",
+        help="Файл хранения, из которого выгружаются записи",
+    )
+    export.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    export.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    export.set_defaults(func=_handler("handle_export"))
+
+
+def _build_import_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `import` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    import_ = subparsers.add_parser(
+        "import",
+        help="Загрузить записи в хранилище из файла JSON Lines или другого хранилища",
+    )
+    source = import_.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--input",
+        help="Файл JSON Lines с записями (- для stdin)",
+    )
+    source.add_argument(
+        "--from-storage-file",
+        help="Файл хранения, из которого переносятся записи",
+    )
+    source.add_argument(
+        "--from-storage-dsn",
+        help="Строка подключения PostgreSQL, из которой переносятся записи",
+    )
+    source.add_argument(
+        "--from-storage-url",
+        help="URL хранилища, из которого переносятся записи",
+    )
+    import_.add_argument(
+        "--storage-file",
+        help="Файл хранения, в который загружаются записи",
+    )
+    import_.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    import_.add_argument(
         "--storage-dsn",
         help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
     )
-    search.set_defaults(func=commands.handle_search)
+    import_.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Сколько записей загружать за одну пачку (по умолчанию 1000)",
+    )
+    import_.set_defaults(func=_handler("handle_import"))
+
+
+def _build_compact_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `compact` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    compact = subparsers.add_parser(
+        "compact",
+        help="Удалить устаревшие записи и дубликаты и пересобрать индексы",
+    )
+    compact.add_argument(
+        "--keep-days",
+        type=float,
+        help="Срок хранения в днях: более старые записи удаляются (по умолчанию не удалять)",
+    )
+    _add_boolean_pair(
+        compact,
+        name="dedupe",
+        dest="dedupe",
+        default=True,
+        enable_help="Удалить повторы хэша в пределах одной метки (по умолчанию)",
+        disable_help="Не удалять дубликаты",
+    )
+    compact.add_argument(
+        "--storage-file",
+        help="Путь к файлу хранения",
+    )
+    compact.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    compact.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    compact.set_defaults(func=_handler("handle_compact"))
+
+
+def _build_serve_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `serve` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    serve = subparsers.add_parser(
+        "serve",
+        help="Запустить резидентный сервис на Unix-сокете",
+    )
+    serve.add_argument(
+        "--socket",
+        help="Путь к сокету (по умолчанию $PASSGEN_SOCKET или $XDG_RUNTIME_DIR/passgen.sock)",
+    )
+    serve.add_argument(
+        "--storage-file",
+        help="Путь к файлу хранения",
+    )
+    serve.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    serve.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    serve.set_defaults(func=_handler("handle_serve"))
+
+
+def _build_batch_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `batch` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    batch = subparsers.add_parser(
+        "batch",
+        help="Выполнить команды JSON Lines из stdin за один запуск (ответы — JSON Lines в stdout)",
+    )
+    batch.add_argument(
+        "--storage-file",
+        help="Путь к файлу хранения",
+    )
+    batch.add_argument(
+        "--storage-url",
+        help="URL хранилища: file://, jsonl://, sqlite://, postgresql:// (приоритетнее --storage-file и --storage-dsn)",
+    )
+    batch.add_argument(
+        "--storage-dsn",
+        help="Строка подключения PostgreSQL (альтернатива файлу JSON)",
+    )
+    batch.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Сколько сохранений копить перед записью одной пачкой (по умолчанию 1000)",
+    )
+    batch.set_defaults(func=_handler("handle_batch"))
+
+
+def _build_bench_subcommand(subparsers: argparse._SubParsersAction) -> None:
+    """Добавить подкоманду `bench` к парсеру.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Коллекция подкоманд, созданная парсером.
+    """
+    bench = subparsers.add_parser(
+        "bench",
+        help="Замерить генерацию и операции хранилищ на синтетических данных (отчёт — JSON)",
+    )
+    bench.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="Размеры синтетических хранилищ (по умолчанию 1000 10000)",
+    )
+    bench.add_argument(
+        "--rounds",
+        type=int,
+        default=200,
+        help="Сколько замеров делать на операцию хранилища (по умолчанию 200)",
+    )
+    bench.add_argument(
+        "--generate-count",
+        type=int,
+        default=20000,
+        help="Сколько паролей генерировать на замер генерации (по умолчанию 20000)",
+    )
+    bench.add_argument(
+        "--backend",
+        dest="backends",
+        action="append",
+        choices=["file", "sqlite"],
+        help="Локальное хранилище для замера, можно повторять (по умолчанию file и sqlite)",
+    )
+    bench.add_argument(
+        "--scheme",
+        dest="schemes",
+        action="append",
+        help="Схема отпечатков для замера стоимости, например scrypt:n=16384; можно повторять "
+        "(по умолчанию sha256, hmac-sha256, scrypt и argon2id)",
+    )
+    bench.add_argument(
+        "--fingerprint-rounds",
+        type=int,
+        default=5,
+        help="Сколько отпечатков вычислять на схему (по умолчанию 5)",
+    )
+    bench.add_argument(
+        "--storage-dsn",
+        help="Строка подключения пустой базы PostgreSQL для замера (замер оставляет в ней записи)",
+    )
+    bench.add_argument(
+        "--output",
+        help="Файл для отчёта JSON (по умолчанию stdout)",
+    )
+    bench.add_argument(
+        "--baseline",
+        help="Отчёт предыдущего запуска: при замедлении сверх порога команда завершается с кодом 1",
+    )
+    bench.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Допустимое замедление относительно --baseline, доля (по умолчанию 0.25)",
+    )
+    bench.set_defaults(func=_handler("handle_bench"))
+
+
+def _add_daemon_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавить параметры перенаправления команды в сервис `serve`.
+
+    Args:
+        parser (argparse.ArgumentParser): Активный парсер подкоманды.
+    """
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Выполнить команду в запущенном сервисе passgen serve (параметры хранилища берутся из сервиса)",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Путь к сокету сервиса (по умолчанию $PASSGEN_SOCKET или $XDG_RUNTIME_DIR/passgen.sock)",
+    )
 
 
 def _add_boolean_pair(
@@ -0,0 +1,113 @@
+"""Многопроцессная генерация больших партий паролей."""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from typing import Deque, Iterator, List, Set
+
+from .generator import PasswordPolicy
+
+#: Количество паролей в одном задании для рабочего процесса.
+DEFAULT_SHARD_SIZE = 10_000
+
+
+def _generate_shard(policy: PasswordPolicy, count: int) -> List[str]:
+    """Сгенерировать один шард паролей в рабочем процессе.
+
+    Каждый процесс читает собственную энтропию ОС через ``secrets``.
+    """
+    return list(policy.generate_many(count))
+
+
+def _shard_sizes(count: int, shard_size: int) -> Iterator[int]:
+    full, rest = divmod(count, shard_size)
+    for _ in range(full):
+        yield shard_size
+    if rest:
+        yield rest
+
+
+def generate_passwords_parallel(
+    count: int,
+    *,
+    policy: PasswordPolicy,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    ordered: bool = True,
+    max_pending: int | None = None,
+) -> Iterator[str]:
+    """Лениво сгенерировать пароли в пуле процессов.
+
+    Партия делится на шарды по ``shard_size`` паролей. Одновременно в
+    работе находится не больше ``max_pending`` шардов, поэтому расход
+    памяти не зависит от ``count``.
+
+    Args:
+        count (int): Общее количество паролей.
+        policy (PasswordPolicy): Политика генерации.
+        workers (int | None): Число процессов, по умолчанию ``os.cpu_count()``.
+        shard_size (int): Размер одного шарда.
+        ordered (bool): Отдавать шарды в порядке постановки (иначе — по готовности).
+        max_pending (int | None): Предел шардов в работе, по умолчанию ``2 * workers``.
+
+    Returns:
+        Iterator[str]: Итератор по паролям.
+
+    Raises:
+        ValueError: Если ``count``, ``workers`` или ``shard_size`` меньше 1.
+    """
+    if count < 1:
+        raise ValueError("Count must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Workers must be at least 1")
+    if shard_size < 1:
+        raise ValueError("Shard size must be at least 1")
+    if workers == 1:
+        return policy.generate_many(count)
+    return _iter_parallel(
+        count,
+        policy,
+        workers,
+        shard_size,
+        ordered,
+        max_pending or 2 * workers,
+    )
+
+
+def _iter_parallel(
+    count: int,
+    policy: PasswordPolicy,
+    workers: int,
+    shard_size: int,
+    ordered: bool,
+    max_pending: int,
+) -> Iterator[str]:
+    sizes = _shard_sizes(count, shard_size)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if ordered:
+            queue: Deque[Future] = deque()
+            for size in sizes:
+                queue.append(executor.submit(_generate_shard, policy, size))
+                if len(queue) >= max_pending:
+                    yield from queue.popleft().result()
+            while queue:
+                yield from queue.popleft().result()
+        else:
+            pending: Set[Future] = set()
+            for size in sizes:
+                pending.add(executor.submit(_generate_shard, policy, size))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            for future in as_completed(pending):
+                yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = ["DEFAULT_SHARD_SIZE", "generate_passwords_parallel"]
@@ -0,0 +1,313 @@
+"""Бинарный снимок файла хранения для чтения через ``mmap``.
+
+Снимок (``<имя>.snap``) строится из файла JSON Lines и состоит из:
+
+* заголовка с размером и inode исходного файла — по ним определяется,
+  актуален ли снимок;
+* записей фиксированной ширины: 32 байта дайджеста, номер префикса схемы
+  отпечатка и положение записи в куче JSON;
+* секции ``(хэш, номер записи)``, отсортированной по хэшу, для бинарного
+  поиска;
+* массива начал меток в нижнем регистре и куч строк: меток в нижнем
+  регистре и записей в JSON, как они закодированы в файле хранения;
+* таблицы префиксов схем отпечатков (см. :mod:`passgen.fingerprint`).
+
+Поиск и проверка работают прямо по отображённым в память байтам; разбираются
+только найденные записи. Запись хранится целиком, поэтому снимок отдаёт те же
+словари, что и файл хранения, включая поля вне схемы.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import codec
+from .fingerprint import split_fingerprint
+
+SNAPSHOT_SUFFIX = ".snap"
+MAGIC = b"PGSNAP\x00\x01"
+VERSION = 3
+
+_HEADER = struct.Struct("<8sIIQQQQQQQQQ")
+# Digest, fingerprint prefix id, offset and length of the entry JSON.
+_RECORD = struct.Struct("<32sBQI")
+_MAX_PREFIXES = 256
+_HASH_ROW = struct.Struct("<32sI")
+
+
+def snapshot_path(store_path: Path) -> Path:
+    """Вернуть путь к снимку для файла хранения.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+
+    Returns:
+        Path: Путь к файлу снимка.
+    """
+    return store_path.with_name(store_path.name + SNAPSHOT_SUFFIX)
+
+
+def write_snapshot(store_path: Path, entries: Iterable[Dict[str, object]]) -> Path:
+    """Записать снимок для набора записей файла хранения.
+
+    Args:
+        store_path (Path): Путь к исходному файлу хранения.
+        entries (Iterable[Dict[str, object]]): Записи в порядке сохранения.
+
+    Returns:
+        Path: Путь к созданному снимку.
+
+    Raises:
+        ValueError: Если хэш записи не является отпечатком с 32-байтным
+            дайджестом или в записях больше 256 разных схем.
+    """
+    stat = store_path.stat()
+    dumps_line = codec.get_codec().dumps_line
+    records = bytearray()
+    hash_rows = []
+    lower_starts = [0]
+    raw = bytearray()
+    lowered = bytearray()
+    prefixes: Dict[str, int] = {"": 0}
+    count = 0
+    for entry in entries:
+        try:
+            prefix, digest = split_fingerprint(str(entry["hash"]))
+        except ValueError as exc:
+            raise ValueError(f"Cannot snapshot entry with hash {entry['hash']!r}") from exc
+        prefix_id = prefixes.setdefault(prefix, len(prefixes))
+        if prefix_id >= _MAX_PREFIXES:
+            raise ValueError("Cannot snapshot more than 256 fingerprint schemes")
+        line = dumps_line(entry)[:-1]
+        records += _RECORD.pack(digest, prefix_id, len(raw), len(line))
+        hash_rows.append((digest, count))
+        raw += line
+        lowered += str(entry.get("label") or "").lower().encode("utf-8")
+        lower_starts.append(len(lowered))
+        count += 1
+
+    hash_rows.sort()
+    records_off = _HEADER.size
+    hashes_off = records_off + len(records)
+    starts_off = hashes_off + _HASH_ROW.size * count
+    raw_off = starts_off + 8 * len(lower_starts)
+    lowered_off = raw_off + len(raw)
+    prefixes_off = lowered_off + len(lowered)
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        0,
+        count,
+        stat.st_size,
+        stat.st_ino,
+        records_off,
+        hashes_off,
+        starts_off,
+        raw_off,
+        lowered_off,
+        prefixes_off,
+    )
+
+    target = snapshot_path(store_path)
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header)
+        handle.write(records)
+        for row in hash_rows:
+            handle.write(_HASH_ROW.pack(*row))
+        handle.write(struct.pack(f"<{len(lower_starts)}Q", *lower_starts))
+        handle.write(raw)
+        handle.write(lowered)
+        handle.write("\n".join(prefixes).encode("utf-8"))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, target)
+    return target
+
+
+class Snapshot:
+    """Открытый только для чтения снимок файла хранения.
+
+    Args:
+        path (Path): Путь к файлу снимка.
+
+    Raises:
+        ValueError: Если файл не является снимком поддерживаемой версии.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Snapshot {path} is truncated")
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            _,
+            self.count,
+            self.source_size,
+            self.source_inode,
+            self._records_off,
+            self._hashes_off,
+            self._starts_off,
+            self._raw_off,
+            self._lowered_off,
+            prefixes_off,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Snapshot {path} has an unsupported format")
+        self._decode = codec.get_codec().decode_entry
+        self._prefixes = self._mm[prefixes_off:].decode("utf-8").split("\n")
+        self._prefix_ids = {prefix: index for index, prefix in enumerate(self._prefixes)}
+        self._lower_starts = memoryview(self._mm)[
+            self._starts_off:self._starts_off + 8 * (self.count + 1)
+        ].cast("Q")
+
+    def close(self) -> None:
+        """Освободить отображение файла."""
+        if getattr(self, "_lower_starts", None) is not None:
+            self._lower_starts.release()
+            self._lower_starts = None
+        self._mm.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def is_fresh_for(self, store_path: Path) -> bool:
+        """Проверить, что снимок построен по текущей версии файла хранения."""
+        try:
+            stat = store_path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_size == self.source_size and stat.st_ino == self.source_inode
+
+    def entry(self, index: int) -> Dict[str, object]:
+        """Разобрать запись по её номеру."""
+        _, _, raw_off, raw_len = _RECORD.unpack_from(self._mm, self._records_off + index * _RECORD.size)
+        start = self._raw_off + raw_off
+        return self._decode(self._mm[start:start + raw_len])
+
+    def entries(self, indexes: Iterable[int] | None = None) -> List[Dict[str, object]]:
+        """Построить словари для заданных записей (по умолчанию — для всех)."""
+        if indexes is None:
+            indexes = range(self.count)
+        return [self.entry(index) for index in indexes]
+
+    def find_hash(self, digest: bytes) -> List[int]:
+        """Найти номера записей с заданным дайджестом бинарным поиском.
+
+        Схема отпечатка не учитывается (см. :meth:`find_fingerprint`).
+
+        Args:
+            digest (bytes): 32-байтный дайджест.
+
+        Returns:
+            List[int]: Номера записей в порядке сохранения.
+        """
+        mm, base, width = self._mm, self._hashes_off, _HASH_ROW.size
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * width
+            if mm[offset:offset + 32] < digest:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self.count:
+            row_digest, index = _HASH_ROW.unpack_from(mm, base + low * width)
+            if row_digest != digest:
+                break
+            found.append(index)
+            low += 1
+        return sorted(found)
+
+    def find_fingerprint(self, value: str) -> List[int]:
+        """Найти номера записей с заданным отпечатком (схема и дайджест).
+
+        Args:
+            value (str): Отпечаток, например из :func:`fingerprint.candidate_fingerprints`.
+
+        Returns:
+            List[int]: Номера записей в порядке сохранения.
+        """
+        prefix, digest = split_fingerprint(value)
+        prefix_id = self._prefix_ids.get(prefix)
+        if prefix_id is None:
+            return []
+        offset = 32  # the prefix id follows the digest
+        return [
+            index
+            for index in self.find_hash(digest)
+            if self._mm[self._records_off + index * _RECORD.size + offset] == prefix_id
+        ]
+
+    def find_label(self, label_query: str) -> List[int]:
+        """Найти номера записей, метка которых содержит подстроку.
+
+        Поиск выполняется ``mmap.find`` по куче меток в нижнем регистре, а
+        позиция совпадения сопоставляется записи бинарным поиском по
+        массиву начал меток.
+
+        Args:
+            label_query (str): Подстрока для поиска (регистр не учитывается).
+
+        Returns:
+            List[int]: Номера записей в порядке сохранения.
+        """
+        needle = label_query.lower().encode("utf-8")
+        starts = self._lower_starts
+        base = self._lowered_off
+        end = base + starts[self.count]
+        found = []
+        position = self._mm.find(needle, base, end)
+        while position != -1:
+            relative = position - base
+            index = bisect.bisect_right(starts, relative) - 1
+            label_end = starts[index + 1]
+            if relative + len(needle) <= label_end:
+                found.append(index)
+                position = self._mm.find(needle, base + label_end, end)
+            else:
+                position = self._mm.find(needle, position + 1, end)
+        return found
+
+
+def open_snapshot(store_path: Path) -> Optional[Snapshot]:
+    """Открыть снимок, если он существует и актуален.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+
+    Returns:
+        Optional[Snapshot]: Открытый снимок или None.
+    """
+    path = snapshot_path(store_path)
+    try:
+        snap = Snapshot(path)
+    except (FileNotFoundError, ValueError):
+        return None
+    if not snap.is_fresh_for(store_path):
+        snap.close()
+        return None
+    return snap
+
+
+__all__ = [
+    "SNAPSHOT_SUFFIX",
+    "snapshot_path",
+    "write_snapshot",
+    "Snapshot",
+    "open_snapshot",
+]
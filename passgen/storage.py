@@ -1,15 +1,48 @@
-"""Password storage helpers."""
+"""Password storage helpers.
+
+Записи хранятся в формате JSON Lines: каждое сохранение дописывает одну
+строку в конец файла. Файлы старого формата (один JSON-список) читаются
+как есть и один раз преобразуются при первой записи.
+
+Все изменения файла выполняются под эксклюзивной рекомендательной
+блокировкой ``<имя>.lock`` (``fcntl.flock``), поэтому несколько процессов
+могут сохранять записи в один файл одновременно.
+"""
 
 from __future__ import annotations
 
-import json
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
-from . import utils
+from . import codec, fingerprint, snapshot, storage_index, utils
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PasswordPolicy
 
 DEFAULT_STORAGE_FILE = Path(__file__).resolve().parent / "passwords.json"
 
+#: Сколько записей дописывается за один ``write`` в :func:`store_entries`.
+DEFAULT_BATCH_SIZE = 1000
+
+#: Суффикс файла блокировки рядом с файлом хранения.
+LOCK_SUFFIX = ".lock"
+
+#: Старый формат: весь файл — один JSON-список.
+FORMAT_JSON = "json"
+#: Текущий формат: одна запись JSON на строку, новые записи дописываются в конец.
+FORMAT_JSONL = "jsonl"
+
 
 def resolve_storage_file(storage_file: str | None) -> Path:
     """Определить файл для хранения паролей.
@@ -25,8 +58,158 @@ def resolve_storage_file(storage_file: str | None) -> Path:
     return DEFAULT_STORAGE_FILE
 
 
+def lock_path(path: Path) -> Path:
+    """Вернуть путь к файлу блокировки для файла хранения.
+
+    Args:
+        path (Path): Путь к файлу хранения.
+
+    Returns:
+        Path: Путь к файлу блокировки.
+    """
+    return path.with_name(path.name + LOCK_SUFFIX)
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Удерживать эксклюзивную блокировку файла хранения.
+
+    Блокируется отдельный файл ``<имя>.lock``, а не сам файл хранения: тот
+    подменяется через ``os.replace``, и блокировка на старом inode не
+    защищала бы новый. На платформах без ``fcntl`` блокировка не берётся.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the flock.
+        os.close(fd)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Сбросить на диск запись каталога после ``os.replace``."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _detect_format(path: Path) -> str:
+    """Определить формат файла хранения.
+
+    Args:
+        path (Path): Путь к файлу.
+
+    Returns:
+        str: :data:`FORMAT_JSON` для старого JSON-списка, иначе :data:`FORMAT_JSONL`.
+    """
+    try:
+        with path.open("rb") as handle:
+            head = handle.read(64).lstrip()
+    except FileNotFoundError:
+        return FORMAT_JSONL
+    return FORMAT_JSON if head.startswith(b"[") else FORMAT_JSONL
+
+
+def _load_legacy_entries(path: Path) -> List[Dict[str, object]]:
+    """Прочитать записи из JSON-списка старого формата."""
+    try:
+        data = codec.get_codec().loads(path.read_bytes())
+    except ValueError as exc:
+        raise ValueError(f"Cannot read storage file {path}: {exc}") from exc
+    if not isinstance(data, list):
+        raise ValueError(f"Storage file {path} is corrupted; expected a list")
+    return data
+
+
+def _decode_line(
+    path: Path,
+    number: int,
+    line: bytes,
+    decode: Callable[[bytes], Dict[str, object]] | None = None,
+) -> Dict[str, object]:
+    """Разобрать одну строку JSON Lines.
+
+    Args:
+        path (Path): Файл, из которого прочитана строка (для сообщений).
+        number (int): Номер строки.
+        line (bytes): Строка.
+        decode (Callable[[bytes], Dict[str, object]] | None): ``decode_entry``
+            кодека. При разборе многих строк передавайте его, а не полагайтесь
+            на значение по умолчанию: выбор кодека каждый раз читает окружение.
+
+    Raises:
+        ValueError: Если строка не является записью хранилища.
+    """
+    try:
+        return (decode or codec.get_codec().decode_entry)(line)
+    except ValueError as exc:
+        raise _line_error(path, number, exc) from exc
+
+
+def _line_error(path: Path, number: int, exc: ValueError) -> ValueError:
+    if isinstance(exc, codec.SchemaError):
+        return ValueError(f"Storage file {path} is corrupted; line {number} is not an entry: {exc}")
+    return ValueError(f"Cannot read storage file {path}, line {number}: {exc}")
+
+
+def _iter_entries(path: Path) -> Iterator[Dict[str, object]]:
+    """Последовательно прочитать записи из файла хранения.
+
+    JSON Lines читается построчно, старый JSON-список загружается целиком.
+
+    Args:
+        path (Path): Путь к файлу.
+
+    Yields:
+        Dict[str, object]: Записи в порядке сохранения.
+
+    Raises:
+        ValueError: При повреждённом JSON или неверной структуре.
+    """
+    if not path.exists():
+        return
+    if _detect_format(path) == FORMAT_JSON:
+        yield from _load_legacy_entries(path)
+        return
+    decode = codec.get_codec().decode_entry
+    with path.open("rb") as handle:
+        for number, line in enumerate(handle, start=1):
+            if line.strip():
+                try:
+                    entry = decode(line)
+                except ValueError as exc:
+                    raise _line_error(path, number, exc) from exc
+                yield entry
+
+
+def iter_entries(storage_file: str | None = None) -> Iterator[Dict[str, object]]:
+    """Потоково прочитать все записи файла хранения.
+
+    Файл в формате JSON Lines читается построчно с постоянным расходом
+    памяти; файл старого формата загружается целиком.
+
+    Args:
+        storage_file (str | None): Файл хранения.
+
+    Returns:
+        Iterator[Dict[str, object]]: Записи в порядке сохранения.
+
+    Raises:
+        ValueError: При повреждённом JSON или неверной структуре.
+    """
+    return _iter_entries(resolve_storage_file(storage_file))
+
+
 def _load_entries(path: Path) -> List[Dict[str, object]]:
-    """Прочитать записи из JSON файла.
+    """Прочитать записи из файла хранения.
 
     Args:
         path (Path): Путь к файлу.
@@ -37,64 +220,326 @@ def _load_entries(path: Path) -> List[Dict[str, object]]:
     Raises:
         ValueError: При повреждённом JSON или неверной структуре.
     """
-    if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8") as handle:
-        try:
-            data = json.load(handle)
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"Cannot read storage file {path}: {exc}") from exc
-    if not isinstance(data, list):
-        raise ValueError(f"Storage file {path} is corrupted; expected a list")
-    return data
+    return list(_iter_entries(path))
+
+
+def _encode_entry(entry: Dict[str, object]) -> bytes:
+    """Сериализовать запись в одну строку JSON Lines (см. :mod:`passgen.codec`)."""
+    return codec.get_codec().encode_entry(entry)
 
 
 def _write_entries(path: Path, entries: Iterable[Dict[str, object]]) -> None:
-    """Записать список записей в файл.
+    """Переписать файл хранения целиком в формате JSON Lines.
+
+    Данные пишутся во временный файл рядом с целевым и атомарно подменяют
+    его через ``os.replace``, поэтому сбой посреди записи не портит файл.
+    Вызывающий код должен удерживать блокировку :func:`_locked`.
 
     Args:
         path (Path): Путь к файлу.
         entries (Iterable[Dict[str, object]]): Коллекция записей для сохранения.
     """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(list(entries), handle, indent=2)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with tmp_path.open("wb") as handle:
+            for entry in entries:
+                handle.write(_encode_entry(entry))
+            handle.flush()
+            os.fsync(handle.fileno())
+    except BaseException:
+        # Streamed input may fail midway; the original file is still intact.
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+def _append_entries(path: Path, entries: Iterable[Dict[str, object]]) -> None:
+    """Дописать записи в конец файла одним вызовом ``write`` и ``fsync``.
+
+    Запись выполняется под блокировкой файла, так что строки параллельных
+    процессов не перемешиваются и не теряются при миграции старого формата.
+
+    Args:
+        path (Path): Путь к файлу.
+        entries (Iterable[Dict[str, object]]): Записи для добавления.
+    """
+    payload = b"".join(_encode_entry(entry) for entry in entries)
+    with _locked(path):
+        if _detect_format(path) == FORMAT_JSON:
+            _write_entries(path, _load_legacy_entries(path))
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def migrate_storage(storage_file: str | None = None) -> bool:
+    """Перевести файл из старого JSON-списка в формат JSON Lines.
+
+    Args:
+        storage_file (str | None): Файл хранения.
+
+    Returns:
+        bool: True, если файл был преобразован, False — если он уже в JSON Lines.
+
+    Raises:
+        ValueError: При повреждённом JSON или неверной структуре.
+    """
+    path = resolve_storage_file(storage_file)
+    with _locked(path):
+        if _detect_format(path) != FORMAT_JSON:
+            return False
+        _write_entries(path, _load_legacy_entries(path))
+    return True
+
+
+def build_snapshot(storage_file: str | None = None) -> Path:
+    """Построить бинарный снимок файла хранения для чтения через ``mmap``.
+
+    Пока файл хранения не меняется, ``search_passwords`` и
+    ``verify_password`` читают снимок вместо разбора JSON. После новых
+    сохранений снимок считается устаревшим и игнорируется до пересборки.
+
+    Args:
+        storage_file (str | None): Файл хранения.
+
+    Returns:
+        Path: Путь к файлу снимка.
+
+    Raises:
+        ValueError: При повреждённом файле хранения.
+    """
+    path = resolve_storage_file(storage_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch(exist_ok=True)
+    return snapshot.write_snapshot(path, _iter_entries(path))
+
+
+def _compacted(
+    entries: Iterable[Dict[str, object]],
+    stats: Dict[str, int],
+    *,
+    cutoff: datetime | None,
+    dedupe: bool,
+) -> Iterator[Dict[str, object]]:
+    """Отфильтровать поток записей для :func:`compact_storage`, считая удалённые."""
+    # 16-byte keys instead of (label, hash) tuples keep the seen-set small.
+    seen = set()
+    for entry in entries:
+        if cutoff is not None:
+            created = utils.parse_timestamp(entry.get("created_at"))
+            if created is not None and created < cutoff:
+                stats["expired"] += 1
+                continue
+        if dedupe:
+            key = hashlib.blake2b(
+                f"{entry.get('label') or ''}\0{entry['hash']}".encode("utf-8", "surrogatepass"),
+                digest_size=16,
+            ).digest()
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+        stats["kept"] += 1
+        yield entry
+
+
+def compact_storage(
+    storage_file: str | None = None,
+    *,
+    retention: timedelta | None = None,
+    dedupe: bool = True,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """Сжать файл хранения: удалить устаревшие записи и дубликаты.
+
+    Файл читается потоково и переписывается в JSON Lines без отступов через
+    временный файл и ``os.replace``. Из одинаковых пар (метка, хэш)
+    остаётся самая ранняя запись. Записи без отметки времени по сроку не
+    удаляются. После перезаписи индекс перестраивается, а снимок, если он
+    был, строится заново.
+
+    Args:
+        storage_file (str | None): Файл хранения.
+        retention (timedelta | None): Срок хранения; более старые записи
+            удаляются. None — не удалять по сроку.
+        dedupe (bool): Удалять повторы хэша в пределах одной метки.
+        now (datetime | None): Текущее время для расчёта срока (по умолчанию UTC now).
+
+    Returns:
+        Dict[str, int]: Счётчики ``expired``, ``duplicates`` и ``kept``.
+
+    Raises:
+        ValueError: При повреждённом файле хранения.
+    """
+    path = resolve_storage_file(storage_file)
+    stats = {"expired": 0, "duplicates": 0, "kept": 0}
+    if not path.exists():
+        return stats
+    cutoff = None if retention is None else (now or datetime.now(tz=timezone.utc)) - retention
+    with _locked(path):
+        _write_entries(path, _compacted(_iter_entries(path), stats, cutoff=cutoff, dedupe=dedupe))
+        try:
+            storage_index.rebuild_index(path)
+        except sqlite3.Error:
+            # The index notices the new inode and rebuilds on next use.
+            pass
+        if snapshot.snapshot_path(path).exists():
+            snapshot.write_snapshot(path, _iter_entries(path))
+    return stats
 
 
 def store_password(
     password: str,
     *,
     label: str,
-    length: int,
-    options: Dict[str, bool],
+    length: int | None = None,
+    options: Dict[str, bool] | None = None,
     storage_file: str | None = None,
+    policy: PasswordPolicy | None = None,
 ) -> Tuple[Dict[str, object], Path]:
     """Сохранить хэш пароля с метаданными.
 
     Args:
         password (str): Пароль в открытом виде.
         label (str): Метка записи.
-        length (int): Длина сгенерированного пароля.
-        options (Dict[str, bool]): Использованные опции генерации.
+        length (int | None): Длина сгенерированного пароля.
+        options (Dict[str, bool] | None): Использованные опции генерации.
         storage_file (str | None): Кастомный путь к файлу хранения.
+        policy (PasswordPolicy | None): Политика, из которой берутся длина и опции.
 
     Returns:
         Tuple[Dict[str, object], Path]: Созданная запись и путь к файлу.
     """
+    length, options = utils.resolve_metadata(length, options, policy)
     path = resolve_storage_file(storage_file)
-    entries = _load_entries(path)
-    entry = {
-        "label": label,
-        "hash": utils.hash_password(password),
-        "length": length,
-        "options": options,
-        "created_at": utils.current_timestamp(),
-    }
-    entries.append(entry)
-    _write_entries(path, entries)
+    entry = utils.build_entry(password, label=label, length=length, options=options)
+    _append_entries(path, [entry])
+    _update_index(path)
     return entry, path
 
 
+def store_entries(
+    entries: Iterable[Dict[str, object]],
+    *,
+    storage_file: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[int, Path]:
+    """Сохранить поток готовых записей пачками.
+
+    Каждая пачка дописывается одним ``write`` и одним ``fsync``, индекс
+    обновляется один раз после всех пачек. Поток читается лениво.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи (см. :func:`utils.build_entry`).
+        storage_file (str | None): Кастомный путь к файлу хранения.
+        batch_size (int): Количество записей в одной пачке.
+
+    Returns:
+        Tuple[int, Path]: Количество сохранённых записей и путь к файлу.
+    """
+    path = resolve_storage_file(storage_file)
+    total = 0
+    for batch in utils.chunked(entries, batch_size):
+        _append_entries(path, batch)
+        total += len(batch)
+    if total:
+        _update_index(path)
+    return total, path
+
+
+class GroupCommitWriter:
+    """Объединять сохранения из нескольких потоков в общие дописывания.
+
+    Каждый вызов :meth:`append` возвращается только после того, как запись
+    попала на диск. Пока один поток (лидер) держит блокировку файла и
+    выполняет ``write`` и ``fsync``, записи остальных потоков копятся в
+    следующей пачке; её дописывает первый освободившийся поток. Так
+    ``fsync`` и блокировка делятся между всеми одновременными писателями.
+
+    Args:
+        storage_file (str | None): Файл хранения.
+        update_index (bool): Обновлять ли индекс после каждой пачки.
+    """
+
+    def __init__(self, storage_file: str | None = None, *, update_index: bool = True) -> None:
+        self.path = resolve_storage_file(storage_file)
+        self.update_index = update_index
+        self.commits = 0
+        self._cond = threading.Condition()
+        self._batch = _PendingBatch()
+        self._flushing = False
+
+    def append(self, entry: Dict[str, object]) -> None:
+        """Сохранить запись, дождавшись записи её пачки на диск.
+
+        Args:
+            entry (Dict[str, object]): Запись (см. :func:`utils.build_entry`).
+
+        Raises:
+            OSError: Если пачку с записью не удалось записать.
+        """
+        with self._cond:
+            batch = self._batch
+            batch.entries.append(entry)
+            while self._flushing and not batch.done:
+                self._cond.wait()
+            if batch.done:
+                if batch.error is not None:
+                    raise batch.error
+                return
+            self._flushing = True
+            self._batch = _PendingBatch()
+
+        try:
+            _append_entries(self.path, batch.entries)
+            if self.update_index:
+                _update_index(self.path)
+        except BaseException as exc:
+            batch.error = exc
+            raise
+        finally:
+            with self._cond:
+                batch.done = True
+                self.commits += 1
+                self._flushing = False
+                self._cond.notify_all()
+
+    def store_password(
+        self,
+        password: str,
+        *,
+        label: str,
+        length: int | None = None,
+        options: Dict[str, bool] | None = None,
+        policy: PasswordPolicy | None = None,
+    ) -> Dict[str, object]:
+        """Сохранить хэш пароля, как :func:`store_password`, но через общую пачку.
+
+        Returns:
+            Dict[str, object]: Созданная запись.
+        """
+        length, options = utils.resolve_metadata(length, options, policy)
+        entry = utils.build_entry(password, label=label, length=length, options=options)
+        self.append(entry)
+        return entry
+
+
+class _PendingBatch:
+    __slots__ = ("entries", "done", "error")
+
+    def __init__(self) -> None:
+        self.entries: List[Dict[str, object]] = []
+        self.done = False
+        self.error: BaseException | None = None
+
+
 def search_passwords(
     *,
     label_query: str | None = None,
@@ -110,10 +555,22 @@ def search_passwords(
         Tuple[List[Dict[str, object]], Path]: Отфильтрованные записи и путь к файлу.
     """
     path = resolve_storage_file(storage_file)
-    entries = _load_entries(path)
-    if label_query:
+    if not path.exists():
+        return [], path
+    snap = snapshot.open_snapshot(path)
+    if snap is not None:
+        with snap:
+            indexes = snap.find_label(label_query) if label_query else None
+            return snap.entries(indexes), path
+    if not label_query:
+        return list(_iter_entries(path)), path
+    if _detect_format(path) == FORMAT_JSON:
         lowered = label_query.lower()
-        entries = [entry for entry in entries if lowered in str(entry.get("label", "")).lower()]
+        entries = [entry for entry in _iter_entries(path) if lowered in str(entry.get("label", "")).lower()]
+        return entries, path
+    entries = storage_index.lookup_entries(
+        path, lambda conn: storage_index.find_label_offsets(conn, label_query)
+    )
     return entries, path
 
 
@@ -133,16 +590,58 @@ def verify_password(
     Returns:
         Tuple[List[Dict[str, object]], Path]: Совпадающие записи и путь к файлу.
     """
-    target_hash = utils.hash_password(password)
-    entries, path = search_passwords(label_query=label_query, storage_file=storage_file)
-    matches = [entry for entry in entries if entry.get("hash") == target_hash]
+    candidates = fingerprint.candidate_fingerprints(password)
+    path = resolve_storage_file(storage_file)
+    if not path.exists():
+        return [], path
+    snap = snapshot.open_snapshot(path)
+    if snap is not None:
+        with snap:
+            indexes = sorted({index for value in candidates for index in snap.find_fingerprint(value)})
+            matches = snap.entries(indexes)
+    elif _detect_format(path) == FORMAT_JSON:
+        matches = [entry for entry in _iter_entries(path) if entry.get("hash") in candidates]
+    else:
+        matches = storage_index.lookup_entries(
+            path,
+            lambda conn: sorted(
+                {offset for value in candidates for offset in storage_index.find_hash_offsets(conn, value)}
+            ),
+        )
+    if label_query:
+        lowered = label_query.lower()
+        matches = [entry for entry in matches if lowered in str(entry.get("label", "")).lower()]
     return matches, path
 
 
+def _update_index(path: Path) -> None:
+    """Дописать в индекс только что сохранённые записи.
+
+    Ошибки SQLite не прерывают сохранение: индекс догонит файл при
+    следующем обращении.
+    """
+    try:
+        with storage_index.open_index(path):
+            pass
+    except sqlite3.Error:
+        pass
+
+
 __all__ = [
     "DEFAULT_STORAGE_FILE",
+    "FORMAT_JSON",
+    "FORMAT_JSONL",
+    "LOCK_SUFFIX",
     "resolve_storage_file",
+    "lock_path",
+    "migrate_storage",
+    "build_snapshot",
+    "compact_storage",
+    "DEFAULT_BATCH_SIZE",
     "store_password",
+    "store_entries",
+    "GroupCommitWriter",
+    "iter_entries",
     "search_passwords",
     "verify_password",
 ]
@@ -0,0 +1,405 @@
+"""Индекс файла хранения в соседней базе SQLite.
+
+Индекс лежит рядом с файлом хранения (``<имя>.idx``) и сопоставляет
+отпечаток пароля смещению строки JSON Lines в файле, а также хранит
+триграммы меток для поиска по подстроке. Отпечаток хранится как префикс
+схемы и сырой 32-байтный дайджест (BLOB), а не как hex-строка.
+
+Индекс обновляется инкрементально: при каждом обращении индексируется
+только хвост файла, дописанный после последней синхронизации. Если файл
+был переписан целиком, индекс перестраивается с нуля.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from .fingerprint import split_fingerprint
+
+INDEX_SUFFIX = ".idx"
+
+#: Версия схемы индекса; при несовпадении индекс перестраивается.
+SCHEMA_VERSION = 3
+
+#: Длина n-граммы в индексе меток.
+GRAM_SIZE = 3
+
+# Lock-free lookups that keep losing the race with compaction before the
+# last attempt, which reads under the store lock.
+_LOOKUP_ATTEMPTS = 3
+
+
+def index_path(store_path: Path) -> Path:
+    """Вернуть путь к файлу индекса для файла хранения.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+
+    Returns:
+        Path: Путь к базе SQLite с индексом.
+    """
+    return store_path.with_name(store_path.name + INDEX_SUFFIX)
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """Создать таблицы индекса при первом использовании.
+
+    Таблицы индекса старой схемы удаляются: индекс будет построен заново.
+    """
+    if _read_schema_version(conn) not in (None, SCHEMA_VERSION):
+        conn.executescript(
+            """
+            DROP TABLE IF EXISTS hashes;
+            DROP TABLE IF EXISTS labels;
+            DROP TABLE IF EXISTS trigrams;
+            DROP TABLE IF EXISTS meta;
+            """
+        )
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS hashes (
+            digest BLOB NOT NULL,
+            scheme TEXT NOT NULL,
+            offset INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS hashes_digest ON hashes (digest);
+        CREATE TABLE IF NOT EXISTS labels (
+            offset INTEGER PRIMARY KEY,
+            label TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS trigrams (
+            gram TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            PRIMARY KEY (gram, offset)
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+def label_grams(text: str) -> Set[str]:
+    """Разбить строку на множество n-грамм длины :data:`GRAM_SIZE`.
+
+    Args:
+        text (str): Метка или запрос в нижнем регистре.
+
+    Returns:
+        Set[str]: Множество n-грамм (пустое для строк короче n-граммы).
+    """
+    return {text[start:start + GRAM_SIZE] for start in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _hash_key(value: str) -> Tuple[bytes, str]:
+    """Разложить отпечаток на дайджест и префикс схемы для индекса.
+
+    Строки, не являющиеся отпечатками, индексируются целиком в поле схемы
+    с пустым дайджестом и находятся только по точному совпадению.
+    """
+    try:
+        prefix, digest = split_fingerprint(value)
+    except ValueError:
+        return b"", value
+    return digest, prefix
+
+
+def _read_schema_version(conn: sqlite3.Connection) -> int | None:
+    """Прочитать версию схемы существующего индекса (None для нового файла)."""
+    try:
+        return _get_meta(conn, "schema_version")
+    except sqlite3.OperationalError:
+        return None
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> int | None:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: int) -> None:
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _clear(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM hashes")
+    conn.execute("DELETE FROM labels")
+    conn.execute("DELETE FROM trigrams")
+    conn.execute("DELETE FROM meta")
+
+
+def _index_tail(conn: sqlite3.Connection, store_path: Path, start: int) -> int:
+    """Проиндексировать строки файла начиная со смещения ``start``.
+
+    Returns:
+        int: Смещение конца последней полной строки.
+    """
+    from . import codec
+    from .storage import _decode_line
+
+    decode = codec.get_codec().decode_entry
+    hashes = []
+    labels = []
+    grams = []
+    offset = start
+    with store_path.open("rb") as handle:
+        handle.seek(start)
+        for number, line in enumerate(handle, start=1):
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                entry = _decode_line(store_path, number, line, decode)
+                label = str(entry.get("label") or "").lower()
+                hashes.append((*_hash_key(str(entry["hash"])), offset))
+                labels.append((offset, label))
+                grams.extend((gram, offset) for gram in label_grams(label))
+            offset += len(line)
+    conn.executemany("INSERT INTO hashes (digest, scheme, offset) VALUES (?, ?, ?)", hashes)
+    conn.executemany("INSERT INTO labels (offset, label) VALUES (?, ?)", labels)
+    conn.executemany("INSERT INTO trigrams (gram, offset) VALUES (?, ?)", grams)
+    return offset
+
+
+def _is_current(conn: sqlite3.Connection, store_path: Path) -> bool:
+    """Проверить без блокировки записи, что индекс уже догнал файл."""
+    try:
+        stat = store_path.stat()
+    except FileNotFoundError:
+        return False
+    return (
+        _get_meta(conn, "schema_version") == SCHEMA_VERSION
+        and _get_meta(conn, "inode") == stat.st_ino
+        and _get_meta(conn, "indexed_size") == stat.st_size
+    )
+
+
+def sync_index(conn: sqlite3.Connection, store_path: Path) -> None:
+    """Привести индекс в соответствие с файлом хранения.
+
+    Args:
+        conn (sqlite3.Connection): Подключение к базе индекса.
+        store_path (Path): Путь к файлу хранения в формате JSON Lines.
+
+    Raises:
+        ValueError: Если в дописанной части файла встретилась повреждённая строка.
+    """
+    if _is_current(conn, store_path):
+        return
+    with conn:
+        # Take the write lock before looking at the file and the metadata so
+        # that concurrent writers never index the same tail twice.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stat = store_path.stat()
+        except FileNotFoundError:
+            stat = None
+        size = stat.st_size if stat else 0
+        inode = stat.st_ino if stat else 0
+        indexed = _get_meta(conn, "indexed_size") or 0
+        stale = (
+            _get_meta(conn, "schema_version") != SCHEMA_VERSION
+            or _get_meta(conn, "inode") != inode
+            or size < indexed
+        )
+        if stale:
+            _clear(conn)
+            indexed = 0
+        if size > indexed:
+            indexed = _index_tail(conn, store_path, indexed)
+        _set_meta(conn, "schema_version", SCHEMA_VERSION)
+        _set_meta(conn, "inode", inode)
+        _set_meta(conn, "indexed_size", indexed)
+
+
+@contextmanager
+def open_index(store_path: Path) -> Iterator[sqlite3.Connection]:
+    """Открыть синхронизированный индекс файла хранения.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+
+    Yields:
+        sqlite3.Connection: Подключение к актуальному индексу.
+    """
+    conn = sqlite3.connect(index_path(store_path))
+    try:
+        _ensure_schema(conn)
+        sync_index(conn, store_path)
+        yield conn
+    finally:
+        conn.close()
+
+
+def find_hash_offsets(conn: sqlite3.Connection, target_hash: str) -> List[int]:
+    """Найти смещения записей с заданным хэшем.
+
+    Args:
+        conn (sqlite3.Connection): Подключение к индексу.
+        target_hash (str): Отпечаток пароля.
+
+    Returns:
+        List[int]: Смещения строк в порядке сохранения.
+    """
+    digest, scheme = _hash_key(target_hash)
+    rows = conn.execute(
+        "SELECT offset FROM hashes WHERE digest = ? AND scheme = ? ORDER BY offset",
+        (digest, scheme),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def find_label_offsets(conn: sqlite3.Connection, label_query: str) -> List[int]:
+    """Найти смещения записей, метка которых содержит подстроку.
+
+    Для запросов от :data:`GRAM_SIZE` символов кандидаты отбираются по
+    пересечению n-грамм, более короткие запросы проверяются по таблице
+    меток внутри SQLite. Регистр не учитывается.
+
+    Args:
+        conn (sqlite3.Connection): Подключение к индексу.
+        label_query (str): Подстрока для поиска в метке.
+
+    Returns:
+        List[int]: Смещения строк в порядке сохранения.
+    """
+    lowered = label_query.lower()
+    grams = sorted(label_grams(lowered))
+    if not grams:
+        rows = conn.execute(
+            "SELECT offset FROM labels WHERE instr(label, ?) > 0 ORDER BY offset",
+            (lowered,),
+        ).fetchall()
+        return [row[0] for row in rows]
+    placeholders = ", ".join("?" for _ in grams)
+    rows = conn.execute(
+        f"""
+        SELECT labels.offset FROM labels
+        WHERE labels.offset IN (
+            SELECT offset FROM trigrams
+            WHERE gram IN ({placeholders})
+            GROUP BY offset
+            HAVING COUNT(*) = ?
+        )
+        AND instr(labels.label, ?) > 0
+        ORDER BY labels.offset
+        """,
+        (*grams, len(grams), lowered),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def read_entries_at(store_path: Path, offsets: Iterable[int]) -> List[Dict[str, object]]:
+    """Прочитать записи по смещениям строк, не разбирая остальной файл.
+
+    Смещения должны относиться к текущему файлу; чтобы не разойтись с
+    ``compact``, ищите записи через :func:`lookup_entries`.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+        offsets (Iterable[int]): Смещения строк.
+
+    Returns:
+        List[Dict[str, object]]: Записи в порядке смещений.
+    """
+    with store_path.open("rb") as handle:
+        return _read_lines(store_path, handle, offsets)
+
+
+def _read_lines(store_path: Path, handle: BinaryIO, offsets: Iterable[int]) -> List[Dict[str, object]]:
+    """Разобрать строки открытого файла хранения по смещениям."""
+    from . import codec
+    from .storage import _decode_line
+
+    decode = codec.get_codec().decode_entry
+    entries = []
+    for offset in offsets:
+        handle.seek(offset)
+        entries.append(_decode_line(store_path, 0, handle.readline(), decode))
+    return entries
+
+
+def _lookup_once(
+    store_path: Path, find: Callable[[sqlite3.Connection], List[int]]
+) -> List[Dict[str, object]] | None:
+    """Найти и прочитать записи, если индекс описывает открытый файл.
+
+    Returns:
+        List[Dict[str, object]] | None: Записи или None, если файл успели
+        подменить между открытием и синхронизацией индекса.
+    """
+    with store_path.open("rb") as handle:
+        inode = os.fstat(handle.fileno()).st_ino
+        with open_index(store_path) as conn:
+            if _get_meta(conn, "inode") != inode:
+                return None
+            offsets = find(conn)
+        # The handle pins the indexed inode: a later os.replace does not
+        # move the lines under these offsets.
+        return _read_lines(store_path, handle, offsets)
+
+
+def lookup_entries(
+    store_path: Path, find: Callable[[sqlite3.Connection], List[int]]
+) -> List[Dict[str, object]]:
+    """Найти смещения по индексу и прочитать записи из того же файла.
+
+    ``compact`` подменяет файл через ``os.replace``, поэтому смещения из
+    индекса читаются только из файла с inode, записанным в индексе. Если
+    файл подменили, поиск повторяется; последняя попытка выполняется под
+    блокировкой файла хранения.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+        find (Callable[[sqlite3.Connection], List[int]]): Поиск смещений
+            в синхронизированном индексе.
+
+    Returns:
+        List[Dict[str, object]]: Записи в порядке найденных смещений.
+    """
+    from .storage import _locked
+
+    for _ in range(_LOOKUP_ATTEMPTS - 1):
+        entries = _lookup_once(store_path, find)
+        if entries is not None:
+            return entries
+    with _locked(store_path):
+        entries = _lookup_once(store_path, find)
+    # Under the lock the file cannot be replaced, so this is not expected.
+    return entries if entries is not None else []
+
+
+def rebuild_index(store_path: Path) -> None:
+    """Перестроить индекс файла хранения с нуля.
+
+    Args:
+        store_path (Path): Путь к файлу хранения.
+    """
+    conn = sqlite3.connect(index_path(store_path))
+    try:
+        _ensure_schema(conn)
+        with conn:
+            _clear(conn)
+        sync_index(conn, store_path)
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "INDEX_SUFFIX",
+    "SCHEMA_VERSION",
+    "GRAM_SIZE",
+    "index_path",
+    "open_index",
+    "sync_index",
+    "label_grams",
+    "find_hash_offsets",
+    "find_label_offsets",
+    "read_entries_at",
+    "lookup_entries",
+    "rebuild_index",
+]
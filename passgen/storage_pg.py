@@ -2,68 +2,233 @@
 
 from __future__ import annotations
 
+import io
 import json
-from typing import Dict, List, Tuple
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Set, Tuple
 
-from . import utils
+from . import fingerprint, utils
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PasswordPolicy
 
-def _get_connection(dsn: str):
-    """Создать подключение к БД."""
+#: Минимальный размер пула соединений на один DSN.
+POOL_MIN_SIZE = int(os.environ.get("PASSGEN_PG_POOL_MIN", "1"))
+#: Максимальный размер пула соединений на один DSN.
+POOL_MAX_SIZE = int(os.environ.get("PASSGEN_PG_POOL_MAX", "10"))
+#: Сколько записей вставляется одной транзакцией в :func:`store_passwords_postgres`.
+DEFAULT_BATCH_SIZE = 1000
+#: Через сколько секунд простоя соединение проверяется запросом ``SELECT 1``.
+HEALTHCHECK_INTERVAL = float(os.environ.get("PASSGEN_PG_HEALTHCHECK", "30"))
+
+_pools: Dict[str, Any] = {}
+# ThreadedConnectionPool raises PoolError instead of waiting when all
+# connections are checked out, so callers queue on a semaphore sized like the pool.
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_pools_lock = threading.Lock()
+_schema_ready: Set[str] = set()
+_last_used: Dict[int, float] = {}
+
+
+def _import_psycopg2():
+    """Импортировать psycopg2 с понятным сообщением об ошибке."""
     try:
         import psycopg2  # type: ignore
     except ImportError as exc:
         raise ImportError("Установите пакет psycopg2-binary для хранения в PostgreSQL") from exc
-    return psycopg2.connect(dsn)
+    return psycopg2
+
+
+def configure_pool(*, min_size: int | None = None, max_size: int | None = None) -> None:
+    """Задать размеры пулов соединений.
+
+    Новые размеры применяются к пулам, созданным после вызова; уже открытые
+    пулы можно пересоздать через :func:`close_pools`.
+
+    Args:
+        min_size (int | None): Минимум открытых соединений на DSN.
+        max_size (int | None): Максимум соединений на DSN.
+
+    Raises:
+        ValueError: Если размеры некорректны.
+    """
+    global POOL_MIN_SIZE, POOL_MAX_SIZE
+    new_min = POOL_MIN_SIZE if min_size is None else min_size
+    new_max = POOL_MAX_SIZE if max_size is None else max_size
+    if new_min < 0 or new_max < 1 or new_min > new_max:
+        raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+    POOL_MIN_SIZE, POOL_MAX_SIZE = new_min, new_max
+
+
+def _get_pool(dsn: str) -> Tuple[Any, threading.BoundedSemaphore]:
+    """Вернуть общий для процесса пул соединений для DSN и семафор его слотов."""
+    pool = _pools.get(dsn)
+    if pool is not None:
+        return pool, _slots[dsn]
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            _import_psycopg2()
+            from psycopg2.pool import ThreadedConnectionPool  # type: ignore
+
+            pool = ThreadedConnectionPool(POOL_MIN_SIZE, POOL_MAX_SIZE, dsn)
+            _slots[dsn] = threading.BoundedSemaphore(POOL_MAX_SIZE)
+            _pools[dsn] = pool
+        return pool, _slots[dsn]
+
+
+def close_pools() -> None:
+    """Закрыть все пулы соединений и сбросить кэш проверки схемы."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+        _slots.clear()
+        _schema_ready.clear()
+        _last_used.clear()
+
+
+def _is_healthy(conn) -> bool:
+    """Проверить соединение перед выдачей из пула.
+
+    Закрытые соединения и соединения в неизвестном состоянии отбрасываются
+    без запроса к серверу; ``SELECT 1`` выполняется только для ранее
+    выданных соединений, простаивавших дольше :data:`HEALTHCHECK_INTERVAL`.
+    """
+    psycopg2 = _import_psycopg2()
+    from psycopg2 import extensions  # type: ignore
+
+    if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    except psycopg2.Error:
+        return False
+    return True
+
+
+@contextmanager
+def _connection(dsn: str) -> Iterator[Any]:
+    """Взять соединение из пула, убедившись в готовности схемы.
+
+    Если все :data:`POOL_MAX_SIZE` соединений заняты, вызов ждёт
+    освобождения одного из них. Соединение, на котором произошла ошибка
+    связи, закрывается и не возвращается в пул.
+    """
+    psycopg2 = _import_psycopg2()
+    pool, slots = _get_pool(dsn)
+    with slots:
+        conn = pool.getconn()
+        while not _is_healthy(conn):
+            _last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        broken = False
+        try:
+            if dsn not in _schema_ready:
+                _ensure_schema(conn)
+                _schema_ready.add(dsn)
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if broken:
+                _last_used.pop(id(conn), None)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+            pool.putconn(conn, close=broken)
+
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS passgen_passwords (
+    id SERIAL PRIMARY KEY,
+    label TEXT,
+    hash TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    options JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL
+)
+"""
+
+_COLUMNS = "label, hash, length, options, created_at"
+_SELECT_SQL = f"SELECT {_COLUMNS} FROM passgen_passwords"
+# The placeholders differ between drivers: "%s" for psycopg2, "$1".. for asyncpg.
+_INSERT_SQL = f"INSERT INTO passgen_passwords ({_COLUMNS}) VALUES ({{}}) RETURNING {_COLUMNS}"
+
+_CREATE_TRGM_SQL = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+_CREATE_LABEL_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS passgen_passwords_label_trgm
+ON passgen_passwords USING gin (label gin_trgm_ops)
+"""
 
 
 def _ensure_schema(conn) -> None:
     """Создать таблицу при первом использовании."""
     with conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS passgen_passwords (
-                    id SERIAL PRIMARY KEY,
-                    label TEXT,
-                    hash TEXT NOT NULL,
-                    length INTEGER NOT NULL,
-                    options JSONB NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL
-                )
-                """
-            )
+            cur.execute(_CREATE_TABLE_SQL)
+    _ensure_label_index(conn)
+
+
+def _ensure_label_index(conn) -> None:
+    """Создать GIN-индекс pg_trgm для поиска по подстроке метки.
+
+    Индекс ускоряет ``label ILIKE '%...%'``. Если расширение ``pg_trgm``
+    недоступно (например, нет прав на ``CREATE EXTENSION``), поиск
+    продолжает работать без индекса.
+    """
+    import psycopg2  # type: ignore
+
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(_CREATE_TRGM_SQL)
+                cur.execute(_CREATE_LABEL_INDEX_SQL)
+    except psycopg2.Error:
+        pass
+
+
+def _row_to_entry(row) -> Dict[str, object]:
+    """Преобразовать строку результата в словарь записи."""
+    return {
+        "label": row[0],
+        "hash": row[1],
+        "length": row[2],
+        "options": row[3],
+        "created_at": row[4].isoformat().replace("+00:00", "Z") if hasattr(row[4], "isoformat") else row[4],
+    }
 
 
 def store_password_postgres(
     password: str,
     *,
     label: str,
-    length: int,
-    options: Dict[str, bool],
+    length: int | None = None,
+    options: Dict[str, bool] | None = None,
     dsn: str,
+    policy: PasswordPolicy | None = None,
 ) -> Tuple[Dict[str, object], str]:
     """Сохранить хэш пароля и метаданные в PostgreSQL."""
-    conn = _get_connection(dsn)
-    try:
-        _ensure_schema(conn)
-        entry = {
-            "label": label,
-            "hash": utils.hash_password(password),
-            "length": length,
-            "options": options,
-            "created_at": utils.current_timestamp(),
-        }
+    length, options = utils.resolve_metadata(length, options, policy)
+    entry = utils.build_entry(password, label=label, length=length, options=options)
+    with _connection(dsn) as conn:
         with conn:
             with conn.cursor() as cur:
                 from psycopg2.extras import Json  # type: ignore
 
                 cur.execute(
-                    """
-                    INSERT INTO passgen_passwords (label, hash, length, options, created_at)
-                    VALUES (%s, %s, %s, %s, %s)
-                    RETURNING label, hash, length, options, created_at
-                    """,
+                    _INSERT_SQL.format("%s, %s, %s, %s, %s"),
                     (
                         entry["label"],
                         entry["hash"],
@@ -73,17 +238,174 @@ def store_password_postgres(
                     ),
                 )
                 row = cur.fetchone()
-        if row:
-            entry = {
-                "label": row[0],
-                "hash": row[1],
-                "length": row[2],
-                "options": row[3],
-                "created_at": row[4].isoformat().replace("+00:00", "Z") if hasattr(row[4], "isoformat") else row[4],
-            }
-        return entry, dsn
-    finally:
-        conn.close()
+    if row:
+        entry = _row_to_entry(row)
+    return entry, dsn
+
+
+def store_passwords_postgres(
+    entries: Iterable[Dict[str, object]],
+    *,
+    dsn: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[int, str]:
+    """Сохранить поток готовых записей пачками через ``execute_values``.
+
+    Каждая пачка вставляется одним многострочным INSERT и фиксируется
+    отдельным коммитом; при ошибке откатывается только текущая пачка.
+    Недостающие поля заполняются как в :func:`_load_row`.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи (см. :func:`utils.build_entry`).
+        dsn (str): Строка подключения.
+        batch_size (int): Количество записей в одной транзакции.
+
+    Returns:
+        Tuple[int, str]: Количество сохранённых записей и DSN.
+
+    Raises:
+        ValueError: Если у записи нет длины; предыдущие пачки уже сохранены.
+    """
+    total = 0
+    loaded_at = utils.current_timestamp()
+    with _connection(dsn) as conn:
+        from psycopg2.extras import Json, execute_values  # type: ignore
+
+        with conn.cursor() as cur:
+            for batch in utils.chunked(entries, batch_size):
+                rows = []
+                for number, entry in enumerate(batch, start=total + 1):
+                    label, hash_value, length, options, created_at = _load_row(entry, number, loaded_at)
+                    rows.append((label, hash_value, length, Json(options), created_at))
+                try:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO passgen_passwords (label, hash, length, options, created_at)
+                        VALUES %s
+                        """,
+                        rows,
+                        page_size=len(rows),
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                total += len(rows)
+    return total, dsn
+
+
+def _load_row(entry: Dict[str, object], number: int, loaded_at: str) -> Tuple[object, ...]:
+    """Подготовить значения столбцов для пакетной загрузки записи.
+
+    Записи из файлов JSON Lines могут не содержать необязательных полей:
+    метка остаётся NULL, опции заменяются на ``{}``, а время создания —
+    на время загрузки. Длину подставить нечем, а столбец ``length`` не
+    допускает NULL.
+
+    Args:
+        entry (Dict[str, object]): Запись.
+        number (int): Номер записи в потоке (с 1) для сообщения об ошибке.
+        loaded_at (str): Отметка времени загрузки.
+
+    Returns:
+        Tuple[object, ...]: Метка, хэш, длина, опции и время создания.
+
+    Raises:
+        ValueError: Если у записи нет длины.
+    """
+    length = entry.get("length")
+    if length is None:
+        raise ValueError(f"Entry {number} has no 'length', which PostgreSQL storage requires")
+    return (
+        entry.get("label"),
+        entry["hash"],
+        length,
+        entry.get("options") or {},
+        entry.get("created_at") or loaded_at,
+    )
+
+
+def _copy_field(value: object) -> str:
+    """Экранировать значение для текстового формата COPY."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_entries_postgres(
+    entries: Iterable[Dict[str, object]],
+    *,
+    dsn: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[int, str]:
+    """Загрузить поток записей через ``COPY FROM STDIN``.
+
+    Записи сериализуются пачками в текстовый формат COPY; каждая пачка
+    загружается и фиксируется отдельно, поэтому в памяти держится не
+    больше одной пачки. Недостающие поля заполняются как в :func:`_load_row`.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи (см. :func:`utils.build_entry`).
+        dsn (str): Строка подключения.
+        batch_size (int): Количество записей в одной пачке COPY.
+
+    Returns:
+        Tuple[int, str]: Количество загруженных записей и DSN.
+
+    Raises:
+        ValueError: Если у записи нет длины; предыдущие пачки уже загружены.
+    """
+    total = 0
+    loaded_at = utils.current_timestamp()
+    with _connection(dsn) as conn:
+        with conn.cursor() as cur:
+            for batch in utils.chunked(entries, batch_size):
+                buffer = io.StringIO()
+                for number, entry in enumerate(batch, start=total + 1):
+                    label, hash_value, length, options, created_at = _load_row(entry, number, loaded_at)
+                    fields = (label, hash_value, length, json.dumps(options), created_at)
+                    buffer.write("\t".join(_copy_field(field) for field in fields))
+                    buffer.write("\n")
+                buffer.seek(0)
+                try:
+                    cur.copy_expert(
+                        "COPY passgen_passwords (label, hash, length, options, created_at) FROM STDIN",
+                        buffer,
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                total += len(batch)
+    return total, dsn
+
+
+def iter_entries_postgres(*, dsn: str, itersize: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, object]]:
+    """Потоково прочитать все записи таблицы через серверный курсор.
+
+    Args:
+        dsn (str): Строка подключения.
+        itersize (int): Сколько строк курсор получает с сервера за раз.
+
+    Yields:
+        Dict[str, object]: Записи в порядке ``id``.
+    """
+    with _connection(dsn) as conn:
+        with conn:
+            with conn.cursor(name="passgen_iter_entries") as cur:
+                cur.itersize = itersize
+                cur.execute(
+                    "SELECT label, hash, length, options, created_at FROM passgen_passwords ORDER BY id"
+                )
+                for row in cur:
+                    yield _row_to_entry(row)
 
 
 def search_passwords_postgres(
@@ -92,37 +414,81 @@ def search_passwords_postgres(
     dsn: str,
 ) -> Tuple[List[Dict[str, object]], str]:
     """Получить записи из PostgreSQL с фильтром по метке."""
-    conn = _get_connection(dsn)
-    try:
-        _ensure_schema(conn)
-        with conn.cursor() as cur:
-            if label_query:
-                cur.execute(
-                    """
-                    SELECT label, hash, length, options, created_at
-                    FROM passgen_passwords
-                    WHERE label ILIKE %s
-                    """,
-                    (f"%{label_query}%",),
-                )
-            else:
-                cur.execute(
-                    "SELECT label, hash, length, options, created_at FROM passgen_passwords"
-                )
-            rows = cur.fetchall()
-        entries = [
-            {
-                "label": row[0],
-                "hash": row[1],
-                "length": row[2],
-                "options": row[3],
-                "created_at": row[4].isoformat().replace("+00:00", "Z") if hasattr(row[4], "isoformat") else row[4],
-            }
-            for row in rows
-        ]
-        return entries, dsn
-    finally:
-        conn.close()
+    with _connection(dsn) as conn:
+        with conn:
+            with conn.cursor() as cur:
+                if label_query:
+                    cur.execute(
+                        """
+                        SELECT label, hash, length, options, created_at
+                        FROM passgen_passwords
+                        WHERE label ILIKE %s
+                        """,
+                        (f"%{label_query}%",),
+                    )
+                else:
+                    cur.execute(
+                        "SELECT label, hash, length, options, created_at FROM passgen_passwords"
+                    )
+                rows = cur.fetchall()
+    return [_row_to_entry(row) for row in rows], dsn
+
+
+def iter_search_passwords_postgres(
+    *,
+    label_query: str | None = None,
+    dsn: str,
+    limit: int | None = None,
+    offset: int = 0,
+    after_id: int | None = None,
+    itersize: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Dict[str, object]]:
+    """Потоково искать записи через серверный курсор.
+
+    Строки приходят с сервера порциями по ``itersize`` и отдаются по мере
+    получения. Записи упорядочены по ``id`` и содержат его в поле ``id``,
+    чтобы следующую страницу можно было запросить через ``after_id``
+    (keyset-пагинация, не требующая пропуска строк на сервере).
+
+    Args:
+        label_query (str | None): Подстрока для поиска в метке.
+        dsn (str): Строка подключения.
+        limit (int | None): Максимальное количество записей.
+        offset (int): Сколько записей пропустить.
+        after_id (int | None): Вернуть только записи с ``id`` больше заданного.
+        itersize (int): Сколько строк курсор получает с сервера за раз.
+
+    Yields:
+        Dict[str, object]: Найденные записи.
+    """
+    conditions = []
+    params: List[object] = []
+    if label_query:
+        conditions.append("label ILIKE %s")
+        params.append(f"%{label_query}%")
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    query = "SELECT label, hash, length, options, created_at, id FROM passgen_passwords"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    if offset:
+        query += " OFFSET %s"
+        params.append(offset)
+
+    with _connection(dsn) as conn:
+        with conn:
+            with conn.cursor(name="passgen_search") as cur:
+                cur.itersize = itersize
+                cur.execute(query, params)
+                for row in cur:
+                    entry = _row_to_entry(row)
+                    entry["id"] = row[5]
+                    yield entry
 
 
 def verify_password_postgres(
@@ -132,47 +498,151 @@ def verify_password_postgres(
     dsn: str,
 ) -> Tuple[List[Dict[str, object]], str]:
     """Найти записи по совпадающему хэшу пароля."""
-    target_hash = utils.hash_password(password)
-    conn = _get_connection(dsn)
-    try:
-        _ensure_schema(conn)
-        with conn.cursor() as cur:
-            if label_query:
-                cur.execute(
-                    """
-                    SELECT label, hash, length, options, created_at
-                    FROM passgen_passwords
-                    WHERE hash = %s AND label ILIKE %s
-                    """,
-                    (target_hash, f"%{label_query}%",),
-                )
-            else:
-                cur.execute(
-                    """
-                    SELECT label, hash, length, options, created_at
-                    FROM passgen_passwords
-                    WHERE hash = %s
-                    """,
-                    (target_hash,),
-                )
-            rows = cur.fetchall()
-        entries = [
-            {
-                "label": row[0],
-                "hash": row[1],
-                "length": row[2],
-                "options": row[3],
-                "created_at": row[4].isoformat().replace("+00:00", "Z") if hasattr(row[4], "isoformat") else row[4],
-            }
-            for row in rows
-        ]
-        return entries, dsn
-    finally:
-        conn.close()
+    candidates = fingerprint.candidate_fingerprints(password)
+    with _connection(dsn) as conn:
+        with conn:
+            with conn.cursor() as cur:
+                if label_query:
+                    cur.execute(
+                        """
+                        SELECT label, hash, length, options, created_at
+                        FROM passgen_passwords
+                        WHERE hash = ANY(%s) AND label ILIKE %s
+                        """,
+                        (candidates, f"%{label_query}%",),
+                    )
+                else:
+                    cur.execute(
+                        """
+                        SELECT label, hash, length, options, created_at
+                        FROM passgen_passwords
+                        WHERE hash = ANY(%s)
+                        """,
+                        (candidates,),
+                    )
+                rows = cur.fetchall()
+    return [_row_to_entry(row) for row in rows], dsn
+
+
+_DELETE_EXPIRED_SQL = """
+DELETE FROM passgen_passwords WHERE id IN (
+    SELECT id FROM passgen_passwords WHERE created_at < %s LIMIT %s
+)
+"""
+
+# Duplicates are found in one row_number() pass (a sort over the table)
+# and parked in a session-local table, so each batch only walks its primary
+# key instead of re-running a correlated lookup per row. PARTITION BY puts
+# all NULL labels in one group, matching "IS NOT DISTINCT FROM".
+_COLLECT_DUPLICATES_SQL = """
+DROP TABLE IF EXISTS pg_temp.passgen_duplicates;
+CREATE TEMP TABLE passgen_duplicates (id INTEGER PRIMARY KEY);
+INSERT INTO passgen_duplicates (id)
+SELECT id FROM (
+    SELECT id, row_number() OVER (PARTITION BY label, hash ORDER BY id) AS position
+    FROM passgen_passwords
+) AS ranked
+WHERE position > 1
+"""
+
+_DELETE_DUPLICATES_SQL = """
+WITH batch AS (
+    DELETE FROM passgen_duplicates WHERE id IN (
+        SELECT id FROM passgen_duplicates ORDER BY id LIMIT %s
+    )
+    RETURNING id
+)
+DELETE FROM passgen_passwords WHERE id IN (SELECT id FROM batch)
+"""
+
+_DROP_DUPLICATES_SQL = "DROP TABLE IF EXISTS pg_temp.passgen_duplicates"
+
+
+def _delete_in_batches(conn, query: str, params: Tuple[object, ...], batch_size: int) -> int:
+    """Выполнять ``DELETE`` пачками, фиксируя каждую пачку отдельно."""
+    total = 0
+    while True:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (*params, batch_size))
+                deleted = cur.rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def compact_postgres(
+    *,
+    dsn: str,
+    retention: timedelta | None = None,
+    dedupe: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    vacuum: bool = True,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """Удалить устаревшие записи и дубликаты из таблицы.
+
+    Строки удаляются пачками по ``batch_size`` в отдельных транзакциях,
+    поэтому блокировки держатся недолго, а журнал не растёт одним большим
+    куском. После удаления выполняется ``VACUUM (ANALYZE)``: место мёртвых
+    строк становится доступно для новых вставок, а планировщик получает
+    свежую статистику. Из одинаковых пар (метка, хэш) остаётся запись с
+    наименьшим ``id``; дубликаты находятся за один проход ``row_number()``
+    и складываются во временную таблицу, из которой берутся пачки.
+
+    Args:
+        dsn (str): Строка подключения.
+        retention (timedelta | None): Срок хранения; None — не удалять по сроку.
+        dedupe (bool): Удалять повторы хэша в пределах одной метки.
+        batch_size (int): Сколько строк удалять за одну транзакцию.
+        vacuum (bool): Выполнить ``VACUUM (ANALYZE)`` после удаления.
+        now (datetime | None): Текущее время для расчёта срока.
+
+    Returns:
+        Dict[str, int]: Счётчики ``expired``, ``duplicates`` и ``kept``.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1")
+    stats = {"expired": 0, "duplicates": 0, "kept": 0}
+    with _connection(dsn) as conn:
+        if retention is not None:
+            cutoff = (now or datetime.now(tz=timezone.utc)) - retention
+            stats["expired"] = _delete_in_batches(conn, _DELETE_EXPIRED_SQL, (cutoff,), batch_size)
+        if dedupe:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(_COLLECT_DUPLICATES_SQL)
+            try:
+                stats["duplicates"] = _delete_in_batches(conn, _DELETE_DUPLICATES_SQL, (), batch_size)
+            finally:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(_DROP_DUPLICATES_SQL)
+        if vacuum and (stats["expired"] or stats["duplicates"]):
+            # VACUUM cannot run inside a transaction block.
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("VACUUM (ANALYZE) passgen_passwords")
+            finally:
+                conn.autocommit = False
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT count(*) FROM passgen_passwords")
+                stats["kept"] = cur.fetchone()[0]
+    return stats
 
 
 __all__ = [
+    "configure_pool",
+    "close_pools",
+    "DEFAULT_BATCH_SIZE",
     "store_password_postgres",
+    "store_passwords_postgres",
+    "copy_entries_postgres",
+    "iter_entries_postgres",
     "search_passwords_postgres",
+    "iter_search_passwords_postgres",
     "verify_password_postgres",
+    "compact_postgres",
 ]
@@ -0,0 +1,426 @@
+"""Хранилище паролей в базе SQLite.
+
+Подходит для установки на одном хосте: база работает в режиме WAL (читатели
+не блокируют писателя), поиск по хэшу идёт по B-дереву, а поиск подстроки
+метки — по триграммному полнотекстовому индексу FTS5 (таблица
+``passgen_labels``). Каждый поток держит своё
+соединение, поэтому подготовленные выражения из кэша ``sqlite3``
+переиспользуются между вызовами; :func:`close_connections` закрывает
+соединения всех потоков.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Set, Tuple
+
+from . import fingerprint, utils
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PasswordPolicy
+
+#: Сколько записей вставляется одной транзакцией в :func:`store_entries_sqlite`.
+DEFAULT_BATCH_SIZE = 1000
+
+#: Размер кэша подготовленных выражений на соединение.
+STATEMENT_CACHE_SIZE = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS passgen_passwords (
+    id INTEGER PRIMARY KEY,
+    label TEXT,
+    label_lower TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    length INTEGER,
+    options TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS passgen_passwords_hash ON passgen_passwords (hash);
+"""
+
+# An external-content FTS5 table over label_lower: the trigram tokenizer
+# turns a quoted phrase into an indexed substring match. Deletes and updates
+# are mirrored by triggers; inserts are indexed by the insert functions with
+# one INSERT ... SELECT per batch, since a per-row FTS5 trigger makes bulk
+# inserts about four times slower.
+_LABEL_INDEX = """
+CREATE VIRTUAL TABLE passgen_labels USING fts5(
+    label_lower, content='passgen_passwords', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER passgen_labels_delete AFTER DELETE ON passgen_passwords BEGIN
+    INSERT INTO passgen_labels (passgen_labels, rowid, label_lower) VALUES ('delete', old.id, old.label_lower);
+END;
+CREATE TRIGGER passgen_labels_update AFTER UPDATE OF label_lower ON passgen_passwords BEGIN
+    INSERT INTO passgen_labels (passgen_labels, rowid, label_lower) VALUES ('delete', old.id, old.label_lower);
+    INSERT INTO passgen_labels (rowid, label_lower) VALUES (new.id, new.label_lower);
+END;
+INSERT INTO passgen_labels (passgen_labels) VALUES ('rebuild');
+"""
+
+#: Минимальная длина запроса, при которой поиск идёт по триграммному индексу.
+GRAM_SIZE = 3
+
+_INSERT = """
+INSERT INTO passgen_passwords (label, label_lower, hash, length, options, created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+_SELECT = "SELECT label, hash, length, options, created_at, id FROM passgen_passwords"
+_INDEX_LABELS = """
+INSERT INTO passgen_labels (rowid, label_lower)
+SELECT id, label_lower FROM passgen_passwords WHERE id > ?
+"""
+
+# julianday() understands both the "Z" suffix and "+HH:MM" offsets; NULL
+# timestamps compare as NULL and are never expired.
+_DELETE_EXPIRED = """
+DELETE FROM passgen_passwords WHERE id IN (
+    SELECT id FROM passgen_passwords WHERE julianday(created_at) < julianday(?) LIMIT ?
+)
+"""
+_DELETE_DUPLICATES = """
+DELETE FROM passgen_passwords WHERE id IN (
+    SELECT p.id FROM passgen_passwords AS p
+    WHERE EXISTS (
+        SELECT 1 FROM passgen_passwords AS q
+        WHERE q.hash = p.hash AND q.label IS p.label AND q.id < p.id
+    )
+    LIMIT ?
+)
+"""
+
+_local = threading.local()
+
+# Every open connection with its database, so that close_connections() can
+# reach the ones owned by other threads (e.g. asyncio.to_thread workers).
+_open: Dict[sqlite3.Connection, Path] = {}
+_open_lock = threading.Lock()
+# Databases whose connection found the trigram label index available.
+_label_index: Set[Path] = set()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Вернуть соединение текущего потока с базой, создав схему при первом обращении."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is not None and conn not in _open:
+        # Closed by close_connections() from another thread.
+        conn = None
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Used by one thread only; check_same_thread=False lets
+        # close_connections() close it from another thread.
+        conn = sqlite3.connect(path, timeout=30, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        if _ensure_label_index(conn):
+            _label_index.add(path)
+        connections[path] = conn
+        with _open_lock:
+            _open[conn] = path
+    return conn
+
+
+def _ensure_label_index(conn: sqlite3.Connection) -> bool:
+    """Создать триграммный индекс меток, если его нет.
+
+    Returns:
+        bool: ``False``, если SQLite собран без FTS5 или токенизатора
+        ``trigram`` (до 3.34) — тогда поиск по метке идёт перебором.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'passgen_labels'").fetchone():
+        return True
+    try:
+        conn.executescript(f"BEGIN; {_LABEL_INDEX} COMMIT;")
+    except sqlite3.OperationalError:
+        if conn.in_transaction:
+            conn.rollback()
+        # Another connection may have created it first.
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'passgen_labels'").fetchone() is not None
+    return True
+
+
+def close_connections(path: str | Path | None = None) -> None:
+    """Закрыть соединения всех потоков с базой (по умолчанию — со всеми базами).
+
+    Вызывайте, когда операций с базой больше нет (например, при остановке
+    сервиса): поток, чьё соединение закрыто, при следующем обращении
+    откроет новое.
+
+    Args:
+        path (str | Path | None): Путь к базе.
+    """
+    target = None if path is None else _resolve(path)
+    with _open_lock:
+        closing = [conn for conn, database in _open.items() if target is None or database == target]
+        for conn in closing:
+            del _open[conn]
+    for conn in closing:
+        conn.close()
+
+
+def _resolve(path: str | Path) -> Path:
+    return Path(path).expanduser().resolve()
+
+
+def _entry_row(entry: Dict[str, object]) -> Tuple[object, ...]:
+    label = entry.get("label")
+    return (
+        label,
+        str(label or "").lower(),
+        entry["hash"],
+        entry.get("length"),
+        json.dumps(entry.get("options") or {}),
+        entry.get("created_at"),
+    )
+
+
+def _row_to_entry(row) -> Dict[str, object]:
+    """Преобразовать строку результата в словарь записи."""
+    return {
+        "label": row[0],
+        "hash": row[1],
+        "length": row[2],
+        "options": json.loads(row[3]),
+        "created_at": row[4],
+    }
+
+
+def store_password_sqlite(
+    password: str,
+    *,
+    label: str,
+    length: int | None = None,
+    options: Dict[str, bool] | None = None,
+    path: str | Path,
+    policy: PasswordPolicy | None = None,
+) -> Tuple[Dict[str, object], Path]:
+    """Сохранить хэш пароля и метаданные в SQLite.
+
+    Args:
+        password (str): Пароль в открытом виде.
+        label (str): Метка записи.
+        length (int | None): Длина сгенерированного пароля.
+        options (Dict[str, bool] | None): Использованные опции генерации.
+        path (str | Path): Путь к базе.
+        policy (PasswordPolicy | None): Политика, из которой берутся длина и опции.
+
+    Returns:
+        Tuple[Dict[str, object], Path]: Созданная запись и путь к базе.
+    """
+    length, options = utils.resolve_metadata(length, options, policy)
+    entry = utils.build_entry(password, label=label, length=length, options=options)
+    path = _resolve(path)
+    conn = _connect(path)
+    with conn:
+        _insert_rows(conn, path, [_entry_row(entry)])
+    return entry, path
+
+
+def store_entries_sqlite(
+    entries: Iterable[Dict[str, object]],
+    *,
+    path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[int, Path]:
+    """Сохранить поток готовых записей пачками через ``executemany``.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи (см. :func:`utils.build_entry`).
+        path (str | Path): Путь к базе.
+        batch_size (int): Количество записей в одной транзакции.
+
+    Returns:
+        Tuple[int, Path]: Количество сохранённых записей и путь к базе.
+    """
+    path = _resolve(path)
+    conn = _connect(path)
+    total = 0
+    for batch in utils.chunked(entries, batch_size):
+        with conn:
+            _insert_rows(conn, path, [_entry_row(entry) for entry in batch])
+        total += len(batch)
+    return total, path
+
+
+def _insert_rows(conn: sqlite3.Connection, path: Path, rows: List[Tuple[object, ...]]) -> None:
+    """Вставить строки и добавить их метки в триграммный индекс.
+
+    Вызывается внутри ``with conn``: ``BEGIN IMMEDIATE`` берёт блокировку
+    записи до чтения ``max(id)``, поэтому новые строки — ровно строки с
+    большим ``id``.
+    """
+    if path not in _label_index:
+        conn.executemany(_INSERT, rows)
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute("SELECT coalesce(max(id), 0) FROM passgen_passwords").fetchone()[0]
+    conn.executemany(_INSERT, rows)
+    conn.execute(_INDEX_LABELS, (last_id,))
+
+
+def iter_entries_sqlite(*, path: str | Path) -> Iterator[Dict[str, object]]:
+    """Потоково прочитать все записи базы в порядке сохранения.
+
+    Args:
+        path (str | Path): Путь к базе.
+
+    Yields:
+        Dict[str, object]: Записи хранилища.
+    """
+    conn = _connect(_resolve(path))
+    for row in conn.execute(f"{_SELECT} ORDER BY id"):
+        yield _row_to_entry(row)
+
+
+def iter_search_passwords_sqlite(
+    *,
+    label_query: str | None = None,
+    path: str | Path,
+    limit: int | None = None,
+    offset: int = 0,
+    after_id: int | None = None,
+) -> Iterator[Dict[str, object]]:
+    """Потоково искать записи по подстроке метки.
+
+    Записи упорядочены по ``id`` и содержат его в поле ``id``, чтобы
+    следующую страницу можно было запросить через ``after_id``.
+
+    Args:
+        label_query (str | None): Подстрока для поиска в метке (регистр не учитывается).
+        path (str | Path): Путь к базе.
+        limit (int | None): Максимальное количество записей.
+        offset (int): Сколько записей пропустить.
+        after_id (int | None): Вернуть только записи с ``id`` больше заданного.
+
+    Yields:
+        Dict[str, object]: Найденные записи.
+    """
+    path = _resolve(path)
+    conn = _connect(path)
+    conditions = []
+    params: List[object] = []
+    if label_query:
+        lowered = label_query.lower()
+        if len(lowered) >= GRAM_SIZE and path in _label_index:
+            # Quoted, the query is one phrase: consecutive trigrams, i.e. a substring.
+            conditions.append("id IN (SELECT rowid FROM passgen_labels WHERE passgen_labels MATCH ?)")
+            params.append('"' + lowered.replace('"', '""') + '"')
+        conditions.append("instr(label_lower, ?) > 0")
+        params.append(lowered)
+    if after_id is not None:
+        conditions.append("id > ?")
+        params.append(after_id)
+    query = _SELECT
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id LIMIT ? OFFSET ?"
+    params.extend((-1 if limit is None else limit, offset))
+
+    for row in conn.execute(query, params):
+        entry = _row_to_entry(row)
+        entry["id"] = row[5]
+        yield entry
+
+
+def verify_password_sqlite(
+    password: str,
+    *,
+    label_query: str | None = None,
+    path: str | Path,
+) -> Tuple[List[Dict[str, object]], Path]:
+    """Найти записи по совпадающему хэшу пароля.
+
+    Args:
+        password (str): Проверяемый пароль в открытом виде.
+        label_query (str | None): Необязательный фильтр по метке.
+        path (str | Path): Путь к базе.
+
+    Returns:
+        Tuple[List[Dict[str, object]], Path]: Совпадающие записи и путь к базе.
+    """
+    path = _resolve(path)
+    candidates = fingerprint.candidate_fingerprints(password)
+    placeholders = ", ".join("?" for _ in candidates)
+    rows = _connect(path).execute(
+        f"{_SELECT} WHERE hash IN ({placeholders}) ORDER BY id",
+        candidates,
+    ).fetchall()
+    entries = [_row_to_entry(row) for row in rows]
+    if label_query:
+        lowered = label_query.lower()
+        entries = [entry for entry in entries if lowered in str(entry.get("label") or "").lower()]
+    return entries, path
+
+
+def _delete_in_batches(conn: sqlite3.Connection, query: str, params: Tuple[object, ...], batch_size: int) -> int:
+    """Выполнять ``DELETE ... LIMIT`` короткими транзакциями, пока есть что удалять."""
+    total = 0
+    while True:
+        with conn:
+            deleted = conn.execute(query, (*params, batch_size)).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def compact_sqlite(
+    *,
+    path: str | Path,
+    retention: timedelta | None = None,
+    dedupe: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    vacuum: bool = True,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """Удалить устаревшие записи и дубликаты из базы SQLite.
+
+    Удаление идёт пачками по ``batch_size`` строк, каждая в своей
+    транзакции, чтобы не держать блокировку записи долго. Из одинаковых пар
+    (метка, хэш) остаётся запись с наименьшим ``id``.
+
+    Args:
+        path (str | Path): Путь к базе.
+        retention (timedelta | None): Срок хранения; None — не удалять по сроку.
+        dedupe (bool): Удалять повторы хэша в пределах одной метки.
+        batch_size (int): Сколько строк удалять за одну транзакцию.
+        vacuum (bool): Вернуть освободившееся место системе (``VACUUM``).
+        now (datetime | None): Текущее время для расчёта срока.
+
+    Returns:
+        Dict[str, int]: Счётчики ``expired``, ``duplicates`` и ``kept``.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1")
+    conn = _connect(_resolve(path))
+    stats = {"expired": 0, "duplicates": 0, "kept": 0}
+    if retention is not None:
+        cutoff = (now or datetime.now(tz=timezone.utc)) - retention
+        stats["expired"] = _delete_in_batches(conn, _DELETE_EXPIRED, (cutoff.isoformat(),), batch_size)
+    if dedupe:
+        stats["duplicates"] = _delete_in_batches(conn, _DELETE_DUPLICATES, (), batch_size)
+    if vacuum and (stats["expired"] or stats["duplicates"]):
+        conn.execute("VACUUM")
+    conn.execute("PRAGMA optimize")
+    stats["kept"] = conn.execute("SELECT count(*) FROM passgen_passwords").fetchone()[0]
+    return stats
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "STATEMENT_CACHE_SIZE",
+    "GRAM_SIZE",
+    "close_connections",
+    "store_password_sqlite",
+    "store_entries_sqlite",
+    "iter_entries_sqlite",
+    "iter_search_passwords_sqlite",
+    "verify_password_sqlite",
+    "compact_sqlite",
+]
@@ -0,0 +1,226 @@
+"""Потоковый перенос записей между хранилищами.
+
+Записи передаются цепочкой генераторов: источник (файл хранения, файл JSON
+Lines или PostgreSQL) читается лениво, приёмник пишет пачками, поэтому
+расход памяти не зависит от количества записей.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, Tuple
+
+from . import backends, codec, storage
+
+#: Обозначение stdin/stdout вместо пути к файлу.
+STDIO = "-"
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, object]]:
+    """Потоково прочитать записи из файла JSON Lines.
+
+    Args:
+        path (str): Путь к файлу или ``-`` для stdin.
+
+    Yields:
+        Dict[str, object]: Записи в порядке следования в файле.
+
+    Raises:
+        ValueError: Если строка не является записью хранилища.
+    """
+    if path == STDIO:
+        yield from _read_lines(Path("<stdin>"), sys.stdin.buffer)
+        return
+    source = Path(path).expanduser()
+    with source.open("rb") as handle:
+        yield from _read_lines(source, handle)
+
+
+def _read_lines(source: Path, handle: IO[bytes]) -> Iterator[Dict[str, object]]:
+    decode = codec.get_codec().decode_entry
+    for number, line in enumerate(handle, start=1):
+        if line.strip():
+            yield storage._decode_line(source, number, line, decode)
+
+
+def write_jsonl(entries: Iterable[Dict[str, object]], path: str) -> int:
+    """Записать поток записей в файл JSON Lines через буферизованный вывод.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи для выгрузки.
+        path (str): Путь к файлу или ``-`` для stdout.
+
+    Returns:
+        int: Количество записанных записей.
+    """
+    if path == STDIO:
+        return _write_lines(entries, sys.stdout.buffer)
+    target = Path(path).expanduser()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("wb", buffering=1 << 20) as handle:
+        return _write_lines(entries, handle)
+
+
+def _write_lines(entries: Iterable[Dict[str, object]], handle: IO[bytes]) -> int:
+    count = 0
+    for entry in entries:
+        handle.write(storage._encode_entry(entry))
+        count += 1
+    handle.flush()
+    return count
+
+
+def read_store(
+    *,
+    storage_url: str | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+) -> Iterator[Dict[str, object]]:
+    """Потоково прочитать записи из хранилища.
+
+    Args:
+        storage_url (str | None): URL хранилища (имеет наивысший приоритет).
+        storage_file (str | None): Файл хранения.
+        storage_dsn (str | None): Строка подключения PostgreSQL (приоритетнее файла).
+
+    Returns:
+        Iterator[Dict[str, object]]: Записи хранилища.
+    """
+    backend = backends.resolve_backend(
+        storage_url=storage_url,
+        storage_file=storage_file,
+        storage_dsn=storage_dsn,
+    )
+    return backend.iter_entries()
+
+
+def write_store(
+    entries: Iterable[Dict[str, object]],
+    *,
+    storage_url: str | None = None,
+    storage_file: str | None = None,
+    storage_dsn: str | None = None,
+    batch_size: int = storage.DEFAULT_BATCH_SIZE,
+    source: object = None,
+) -> Tuple[int, object]:
+    """Записать поток записей в хранилище пачками.
+
+    Используется самый быстрый способ загрузки хранилища: в PostgreSQL
+    записи загружаются через ``COPY``, в файл — буферизованными
+    дописываниями по ``batch_size`` записей.
+
+    Args:
+        entries (Iterable[Dict[str, object]]): Записи для загрузки.
+        storage_url (str | None): URL хранилища (имеет наивысший приоритет).
+        storage_file (str | None): Файл хранения.
+        storage_dsn (str | None): Строка подключения PostgreSQL (приоритетнее файла).
+        batch_size (int): Размер пачки.
+        source (object): Путь или DSN, из которого читается ``entries``.
+            Загрузка хранилища в само себя не завершилась бы: чтение
+            доходило бы до только что дописанных пачек.
+
+    Returns:
+        Tuple[int, object]: Количество записей и путь/DSN приёмника.
+
+    Raises:
+        ValueError: Если ``source`` совпадает с приёмником.
+    """
+    backend = backends.resolve_backend(
+        storage_url=storage_url,
+        storage_file=storage_file,
+        storage_dsn=storage_dsn,
+    )
+    if source is not None and same_location(source, backend.location):
+        raise ValueError(f"Cannot import storage {backend.location} into itself")
+    return backend.load_entries(entries, batch_size=batch_size), backend.location
+
+
+def same_location(first: object, second: object) -> bool:
+    """Проверить, указывают ли два пути или DSN на одно хранилище.
+
+    Пути сравниваются после раскрытия ``~`` и символических ссылок, а для
+    существующих файлов — по устройству и inode (жёсткие ссылки).
+
+    Args:
+        first (object): Путь или DSN.
+        second (object): Путь или DSN.
+
+    Returns:
+        bool: ``True`` для одного и того же хранилища.
+    """
+    if isinstance(first, Path) or isinstance(second, Path):
+        first_path = Path(str(first)).expanduser().resolve()
+        second_path = Path(str(second)).expanduser().resolve()
+        if first_path == second_path:
+            return True
+        try:
+            return os.path.samefile(first_path, second_path)
+        except OSError:
+            return False
+    return str(first) == str(second)
+
+
+class Progress:
+    """Счётчик обработанных записей с периодическим выводом скорости.
+
+    Args:
+        action (str): Название операции для вывода.
+        stream (IO[str] | None): Поток для сообщений, по умолчанию stderr.
+        interval (float): Минимальный интервал между сообщениями в секундах.
+    """
+
+    def __init__(self, action: str, *, stream: IO[str] | None = None, interval: float = 1.0) -> None:
+        self.action = action
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.count = 0
+        self._started = time.monotonic()
+        self._reported = self._started
+
+    def track(self, entries: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+        """Пропустить поток записей через счётчик.
+
+        Args:
+            entries (Iterable[Dict[str, object]]): Исходный поток.
+
+        Yields:
+            Dict[str, object]: Те же записи.
+        """
+        for entry in entries:
+            self.count += 1
+            yield entry
+            if self.count % 1024 == 0:
+                now = time.monotonic()
+                if now - self._reported >= self.interval:
+                    self._reported = now
+                    self._report(now)
+
+    def finish(self) -> None:
+        """Вывести итоговую строку со временем и средней скоростью."""
+        self._report(time.monotonic(), final=True)
+
+    @property
+    def rate(self) -> float:
+        """Средняя скорость в записях в секунду."""
+        elapsed = time.monotonic() - self._started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def _report(self, now: float, *, final: bool = False) -> None:
+        elapsed = now - self._started
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        suffix = f" за {elapsed:.1f} с" if final else ""
+        print(f"{self.action}: {self.count} записей{suffix} ({rate:.0f} зап/с)", file=self.stream)
+
+
+__all__ = [
+    "STDIO",
+    "read_jsonl",
+    "write_jsonl",
+    "read_store",
+    "write_store",
+    "same_location",
+    "Progress",
+]
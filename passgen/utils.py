@@ -5,10 +5,19 @@ from __future__ import annotations
 import hashlib
 import string
 from datetime import datetime, timezone
-from typing import List
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+from . import fingerprint
+
+T = TypeVar("T")
 
 SPECIAL_CHARACTERS = "!@#$%^&*()-_=+[]{};:,.?/<>|~"
 
+#: Флаги политики генерации (ключи ``PasswordPolicy.options``) в порядке
+#: битов маски, которой их кодируют форматы вывода.
+OPTION_NAMES = ("digits", "special", "uppercase", "lowercase")
+
 
 def build_charsets(
     *,
@@ -66,6 +75,34 @@ def validate_length(length: int, *, min_required: int = 1) -> int:
     return length
 
 
+def resolve_metadata(
+    length: int | None,
+    options: Dict[str, bool] | None,
+    policy: Any = None,
+) -> Tuple[int, Dict[str, bool]]:
+    """Определить длину и опции записи по явным значениям или политике.
+
+    Args:
+        length (int | None): Явно заданная длина пароля.
+        options (Dict[str, bool] | None): Явно заданные опции генерации.
+        policy (PasswordPolicy | None): Политика, из которой берутся недостающие значения.
+
+    Returns:
+        Tuple[int, Dict[str, bool]]: Длина и опции для сохранения.
+
+    Raises:
+        ValueError: Если длину не удалось определить.
+    """
+    if policy is not None:
+        if length is None:
+            length = policy.length
+        if options is None:
+            options = policy.options
+    if length is None:
+        raise ValueError("Either length or policy must be provided")
+    return length, options if options is not None else {}
+
+
 def hash_password(password: str, *, algorithm: str = "sha256") -> str:
     """Посчитать безопасный хэш пароля.
 
@@ -86,6 +123,78 @@ def current_timestamp() -> str:
     return datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+def parse_timestamp(value: object) -> datetime | None:
+    """Разобрать отметку времени записи.
+
+    Args:
+        value (object): Строка ISO-8601 (с ``Z`` или смещением) или None.
+
+    Returns:
+        datetime | None: Время с часовым поясом (UTC, если пояс не указан)
+        или None, если отметки нет или она не разбирается.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def build_entry(
+    password: str,
+    *,
+    label: str,
+    length: int,
+    options: Dict[str, bool],
+) -> Dict[str, object]:
+    """Сформировать запись хранилища для пароля.
+
+    Args:
+        password (str): Пароль в открытом виде.
+        label (str): Метка записи.
+        length (int): Длина пароля.
+        options (Dict[str, bool]): Использованные опции генерации.
+
+    Returns:
+        Dict[str, object]: Запись с отпечатком пароля (см. :mod:`passgen.fingerprint`)
+        и метаданными.
+    """
+    return {
+        "label": label,
+        "hash": fingerprint.fingerprint_password(password),
+        "length": length,
+        "options": options,
+        "created_at": current_timestamp(),
+    }
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Разбить поток на списки не длиннее ``size`` элементов.
+
+    Args:
+        items (Iterable[T]): Исходный поток.
+        size (int): Максимальный размер пачки.
+
+    Yields:
+        List[T]: Очередная пачка.
+
+    Raises:
+        ValueError: Если ``size`` меньше 1.
+    """
+    if size < 1:
+        raise ValueError("Batch size must be at least 1")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def default_label() -> str:
     """Сформировать метку по умолчанию.
 
@@ -97,9 +206,14 @@ def default_label() -> str:
 
 __all__ = [
     "SPECIAL_CHARACTERS",
+    "OPTION_NAMES",
     "build_charsets",
     "validate_length",
+    "resolve_metadata",
     "hash_password",
     "current_timestamp",
+    "parse_timestamp",
+    "build_entry",
+    "chunked",
     "default_label",
 ]
@@ -0,0 +1,126 @@
+import asyncio
+import types
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import aio, storage
+
+
+class AsyncFileStorageTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_file = str(Path(self.tmpdir.name) / "passwords.json")
+
+    async def test_concurrent_stores_are_coalesced(self):
+        with mock.patch("passgen.aio.storage._append_entries", wraps=storage._append_entries) as append:
+            results = await asyncio.gather(
+                *(
+                    aio.store_password(f"secret-{index}", label=f"item-{index}", length=8, storage_file=self.storage_file)
+                    for index in range(50)
+                )
+            )
+
+        self.assertEqual(len(results), 50)
+        self.assertLess(append.call_count, 50)
+        entries = list(storage.iter_entries(self.storage_file))
+        self.assertEqual(sorted(entry["label"] for entry in entries), sorted(f"item-{index}" for index in range(50)))
+
+    async def test_search_and_verify(self):
+        await aio.store_password("alpha-secret", label="Alpha", length=12, storage_file=self.storage_file)
+        await aio.store_password("beta-secret", label="beta", length=12, storage_file=self.storage_file)
+
+        entries, _ = await aio.search_passwords(label_query="alp", storage_file=self.storage_file)
+        self.assertEqual([entry["label"] for entry in entries], ["Alpha"])
+
+        checks = await asyncio.gather(
+            *(aio.verify_password("beta-secret", storage_file=self.storage_file) for _ in range(20))
+        )
+        self.assertTrue(all([entry["label"] for entry in found] == ["beta"] for found, _ in checks))
+
+    async def test_write_errors_reach_every_waiter(self):
+        with mock.patch("passgen.aio.storage._append_entries", side_effect=OSError("disk full")):
+            results = await asyncio.gather(
+                aio.store_password("a", label="a", length=8, storage_file=self.storage_file),
+                aio.store_password("b", label="b", length=8, storage_file=self.storage_file),
+                return_exceptions=True,
+            )
+        self.assertTrue(all(isinstance(result, OSError) for result in results))
+
+    async def test_postgres_requires_asyncpg(self):
+        with mock.patch.dict("sys.modules", {"asyncpg": None}):
+            with self.assertRaises(ImportError):
+                await aio.verify_password("secret", storage_dsn="dbname=test")
+
+
+class FakeAsyncPool:
+    def __init__(self):
+        self.calls = []
+        self.executed = []
+        self.closed = False
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+
+    async def fetchrow(self, query, *args):
+        self.calls.append((" ".join(query.split()), args))
+        return args
+
+    async def fetch(self, query, *args):
+        self.calls.append((" ".join(query.split()), args))
+        return [("Alpha", "00" * 32, 12, {}, datetime(2024, 1, 1, tzinfo=timezone.utc))]
+
+    async def close(self):
+        self.closed = True
+
+
+class AsyncPostgresTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = FakeAsyncPool()
+        asyncpg = types.ModuleType("asyncpg")
+        asyncpg.PostgresError = type("PostgresError", (Exception,), {})
+        asyncpg.create_pool = mock.AsyncMock(return_value=self.pool)
+        patcher = mock.patch.dict("sys.modules", {"asyncpg": asyncpg})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create_pool = asyncpg.create_pool
+
+    async def asyncTearDown(self):
+        await aio.close_pools()
+
+    async def test_store_and_search_share_one_pool(self):
+        entry, dsn = await aio.store_password("secret", label="Alpha", length=12, storage_dsn="dbname=test")
+        found, _ = await aio.search_passwords(label_query="alp", storage_dsn="dbname=test")
+
+        self.assertEqual(dsn, "dbname=test")
+        self.create_pool.assert_awaited_once()
+        self.assertIn("CREATE TABLE IF NOT EXISTS passgen_passwords", self.pool.executed[0])
+        (insert, params), (select, search_params) = self.pool.calls
+        self.assertTrue(insert.startswith("INSERT INTO passgen_passwords"))
+        self.assertIn("VALUES ($1, $2, $3, $4, $5)", insert)
+        self.assertEqual((entry["label"], entry["length"]), ("Alpha", 12))
+        self.assertEqual(params[1], entry["hash"])
+        self.assertEqual(search_params, ("%alp%",))
+        self.assertEqual(found[0]["created_at"], "2024-01-01T00:00:00Z")
+
+        await aio.close_pools()
+        self.assertTrue(self.pool.closed)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
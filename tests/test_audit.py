@@ -0,0 +1,92 @@
+import io
+import os
+import unittest
+from array import array
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import audit, fingerprint, main, storage, utils
+
+
+class AuditTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.root = Path(self.tmpdir.name)
+        self.storage_file = str(self.root / "passwords.json")
+        entries = [utils.build_entry(f"secret-{index}", label=f"item-{index}", length=8, options={}) for index in range(5)]
+        storage.store_entries(entries, storage_file=self.storage_file)
+
+    def _stored(self):
+        return audit.StoredFingerprints.from_entries(storage.iter_entries(self.storage_file))
+
+    def test_matches_are_streamed_in_candidate_order(self):
+        candidates = ["nope", "secret-3", "secret-0", "other"]
+        found = list(audit.audit_candidates(candidates, self._stored(), workers=1, chunk_size=2))
+        self.assertEqual(found, [("secret-3", ["item-3"]), ("secret-0", ["item-0"])])
+
+    def test_process_pool_gives_same_matches(self):
+        with mock.patch.dict(os.environ, {fingerprint.SCHEME_ENV: "scrypt:n=1024", fingerprint.PEPPER_ENV: "pepper"}):
+            storage.store_password("slow-secret", label="slow", length=8, storage_file=self.storage_file)
+            candidates = ["slow-secret"] + [f"secret-{index}" for index in range(0, 10, 2)]
+            with mock.patch("passgen.audit._iter_local") as local:
+                found = list(audit.audit_candidates(candidates, self._stored(), workers=2, chunk_size=1))
+        local.assert_not_called()
+        self.assertEqual([candidate for candidate, _ in found], ["slow-secret", "secret-0", "secret-2", "secret-4"])
+
+    def test_mixed_schemes_are_all_checked(self):
+        with mock.patch.dict(os.environ, {fingerprint.SCHEME_ENV: "scrypt:n=1024", fingerprint.PEPPER_ENV: "pepper"}):
+            storage.store_password("peppered", label="new", length=8, storage_file=self.storage_file)
+            stored = self._stored()
+            self.assertEqual(len(stored.prefixes), 2)
+            found = dict(audit.audit_candidates(["peppered", "secret-1"], stored, workers=1))
+        self.assertEqual(found, {"peppered": ["new"], "secret-1": ["item-1"]})
+
+    def test_duplicate_digests_keep_all_labels(self):
+        entries = [{"hash": utils.hash_password(f"pw-{index}"), "label": f"l-{index}"} for index in range(300)]
+        entries.append({"hash": utils.hash_password("pw-7"), "label": "again"})
+        stored = audit.StoredFingerprints.from_entries(entries)
+        digests = [bytes.fromhex(utils.hash_password(f"pw-{index}")) for index in (0, 7, 299)]
+        digests += [b"\xff" * 32, b"\x00" * 32]
+        matched = stored.match_chunk([("", digests), ("scrypt$", digests)], len(digests))
+        self.assertEqual([sorted(labels) for labels in matched], [["l-0"], ["again", "l-7"], ["l-299"], [], []])
+
+    def test_digest_column_finds_every_copy(self):
+        digests = bytearray()
+        for index in (5, 1, 5, 9):
+            digests.extend(index.to_bytes(32, "big"))
+        column = audit._DigestColumn(digests, array("I", [0, 1, 2, 3]))
+        found = column.find_many([(5).to_bytes(32, "big"), (9).to_bytes(32, "big"), (2).to_bytes(32, "big")])
+        self.assertEqual([sorted(ids) for ids in found], [[0, 2], [3], []])
+
+    def test_digest_many_matches_digest(self):
+        for fingerprinter in (
+            fingerprint.Fingerprinter("sha256"),
+            fingerprint.Fingerprinter("hmac-sha256", pepper="pepper"),
+            fingerprint.Fingerprinter("scrypt", pepper="pepper", params={"n": 1024}),
+        ):
+            passwords = ["a", "пароль", "b\udcff"]
+            self.assertEqual(fingerprinter.digest_many(passwords), [fingerprinter.digest(p) for p in passwords])
+
+    def test_missing_pepper_is_reported(self):
+        stored = audit.StoredFingerprints.from_entries([{"hash": "hmac-sha256$" + "00" * 32}])
+        with mock.patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                audit.audit_candidates(["x"], stored, workers=1)
+
+    def test_verify_command_prints_matches(self):
+        candidates = self.root / "candidates.txt"
+        candidates.write_text("secret-1\n\nwrong\nsecret-4\n", encoding="utf-8")
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                status = main.main(
+                    ["verify", "--from-file", str(candidates), "--storage-file", self.storage_file, "--workers", "1"]
+                )
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.getvalue(), "secret-1\titem-1\nsecret-4\titem-4\n")
+        self.assertIn("Совпадений: 2 из 3", stderr.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import backends, main, storage_sqlite
+
+
+class RegistryTests(unittest.TestCase):
+    def test_schemes_select_backends(self):
+        self.assertIsInstance(backends.open_backend("file:///tmp/p.json"), backends.FileBackend)
+        self.assertIsInstance(backends.open_backend("jsonl://p.json"), backends.FileBackend)
+        self.assertIsInstance(backends.open_backend("/tmp/p.json"), backends.FileBackend)
+        self.assertIsInstance(backends.open_backend("sqlite:///tmp/p.db"), backends.SQLiteBackend)
+        backend = backends.open_backend("postgresql://user@localhost/db")
+        self.assertIsInstance(backend, backends.PostgresBackend)
+        self.assertEqual(backend.location, "postgresql://user@localhost/db")
+        self.assertEqual(backends.open_backend("file:///tmp/p.json").location, Path("/tmp/p.json"))
+
+    def test_unknown_scheme_raises(self):
+        with self.assertRaises(ValueError):
+            backends.open_backend("redis://localhost")
+
+    def test_resolve_backend_prefers_url(self):
+        backend = backends.resolve_backend(storage_url="sqlite:///tmp/p.db", storage_dsn="dbname=x")
+        self.assertIsInstance(backend, backends.SQLiteBackend)
+        self.assertIsInstance(backends.resolve_backend(storage_dsn="dbname=x"), backends.PostgresBackend)
+        self.assertIsInstance(backends.resolve_backend(), backends.FileBackend)
+
+    def test_register_custom_backend(self):
+        sentinel = object()
+        backends.register_backend("memory", lambda url: sentinel)
+        self.addCleanup(backends._REGISTRY.pop, "memory")
+        self.assertIs(backends.open_backend("memory://"), sentinel)
+        self.assertIn("memory", backends.registered_schemes())
+
+    def test_backends_implement_protocol(self):
+        self.assertIsInstance(backends.FileBackend(), backends.StorageBackend)
+        self.assertIsInstance(backends.SQLiteBackend("/tmp/p.db"), backends.StorageBackend)
+        self.assertIsInstance(backends.PostgresBackend("dbname=x"), backends.StorageBackend)
+
+
+class BackendCliTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(storage_sqlite.close_connections)
+        self.root = Path(self.tmpdir.name)
+
+    def _run(self, argv):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                status = main.main(argv)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_generate_and_search_through_sqlite_url(self):
+        url = f"sqlite://{self.root / 'store.db'}"
+        status, _, _ = self._run(
+            ["generate", "--count", "3", "--save", "--label", "svc", "--storage-url", url]
+        )
+        self.assertEqual(status, 0)
+
+        status, output, _ = self._run(["search", "--label", "svc-2", "--storage-url", url])
+        self.assertEqual(status, 0)
+        self.assertIn("label: svc-2", output)
+        self.assertNotIn("svc-1", output)
+
+    def test_import_from_file_url_into_sqlite_url(self):
+        source = self.root / "source.json"
+        self._run(["generate", "--count", "4", "--save", "--label", "job", "--storage-file", str(source)])
+        status, _, _ = self._run(
+            ["import", "--from-storage-url", f"file://{source}", "--storage-url", f"sqlite://{self.root / 'copy.db'}"]
+        )
+        self.assertEqual(status, 0)
+        status, output, _ = self._run(["search", "--storage-url", f"sqlite://{self.root / 'copy.db'}", "--limit", "2"])
+        self.assertEqual(output.count("label: job-"), 2)
+
+    def test_compact_through_file_and_sqlite_urls(self):
+        source = self.root / "store.json"
+        for url in (f"file://{source}", f"sqlite://{self.root / 'store.db'}"):
+            backend = backends.open_backend(url)
+            for _ in range(3):
+                backend.store_password("same", label="svc", length=4)
+            status, output, _ = self._run(["compact", "--keep-days", "30", "--storage-url", url])
+            self.assertEqual(status, 0)
+            self.assertIn("дубликатов 2, осталось 1", output)
+            self.assertEqual(len(list(backend.iter_entries())), 1)
+
+    def test_compact_rejects_non_positive_retention(self):
+        status, _, stderr = self._run(["compact", "--keep-days", "0", "--storage-file", str(self.root / "s.json")])
+        self.assertEqual(status, 1)
+        self.assertIn("Ошибка:", stderr)
+
+    def test_compact_reports_unreadable_store(self):
+        store = self.root / "dir.json"
+        store.mkdir()
+        status, _, stderr = self._run(["compact", "--storage-file", str(store)])
+        self.assertEqual(status, 1)
+        self.assertIn("Ошибка:", stderr)
+
+    def test_unknown_scheme_is_reported(self):
+        status, _, stderr = self._run(["search", "--storage-url", "redis://localhost"])
+        self.assertEqual(status, 1)
+        self.assertIn("Ошибка:", stderr)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
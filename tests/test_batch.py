@@ -0,0 +1,154 @@
+import io
+import json
+import sqlite3
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import backends, batch, main
+
+
+def _lines(*commands):
+    return [json.dumps(command).encode("utf-8") if isinstance(command, dict) else command for command in commands]
+
+
+class BatchRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "store.json"
+        self.backend = backends.FileBackend(str(self.storage_path))
+
+    def test_responses_follow_command_order_and_reads_see_earlier_writes(self):
+        runner = batch.BatchRunner(self.backend)
+        responses = list(
+            runner.run(
+                _lines(
+                    {"op": "store", "password": "secret", "label": "mail"},
+                    b"   ",
+                    {"op": "generate", "length": 10, "count": 2, "save": True, "label": "db"},
+                    b"{broken",
+                    {"op": "verify", "password": "secret"},
+                    {"op": "search", "label": "db"},
+                    {"op": "explode"},
+                    {"op": "verify", "pasword": "typo"},
+                )
+            )
+        )
+
+        self.assertEqual([response["ok"] for response in responses], [True, True, False, True, True, False, False])
+        self.assertEqual(responses[0]["result"]["entry"]["length"], 6)
+        self.assertEqual(responses[1]["result"]["labels"], ["db-1", "db-2"])
+        self.assertIn("Invalid JSON", responses[2]["error"])
+        self.assertEqual([entry["label"] for entry in responses[3]["result"]["entries"]], ["mail"])
+        self.assertEqual(len(responses[4]["result"]["entries"]), 2)
+        self.assertIn("Unknown operation", responses[5]["error"])
+        self.assertIn("Invalid parameters", responses[6]["error"])
+        self.assertEqual((runner.commands, runner.failed, runner.saved), (7, 3, 3))
+
+    def test_writes_are_grouped_into_batches(self):
+        runner = batch.BatchRunner(self.backend, batch_size=2)
+        commands = [{"op": "store", "password": f"p{index}", "label": f"l{index}"} for index in range(5)]
+        with mock.patch.object(self.backend, "store_entries", wraps=self.backend.store_entries) as store:
+            responses = list(runner.run(_lines(*commands)))
+
+        self.assertTrue(all(response["ok"] for response in responses))
+        self.assertEqual([len(call.args[0]) for call in store.call_args_list], [2, 2, 1])
+        self.assertEqual(sum(1 for _ in self.backend.iter_entries()), 5)
+
+    def test_failed_batch_reports_only_its_writes(self):
+        runner = batch.BatchRunner(self.backend)
+        with mock.patch.object(self.backend, "store_entries", side_effect=OSError("disk full")):
+            responses = list(
+                runner.run(
+                    _lines(
+                        {"op": "store", "password": "a", "label": "a"},
+                        {"op": "generate", "length": 8},
+                        {"op": "generate", "length": 8, "save": True},
+                    )
+                )
+            )
+
+        self.assertEqual([response["ok"] for response in responses], [False, True, False])
+        self.assertEqual(responses[0]["error"], "disk full")
+        self.assertEqual((runner.failed, runner.saved), (2, 0))
+
+    def test_backend_errors_fail_only_their_command(self):
+        runner = batch.BatchRunner(self.backend)
+        with mock.patch.object(self.backend, "search", side_effect=sqlite3.OperationalError("database is locked")):
+            with mock.patch.object(self.backend, "verify", side_effect=ImportError("no driver")):
+                responses = list(
+                    runner.run(
+                        _lines(
+                            {"op": "store", "password": "a", "label": "a"},
+                            {"op": "search"},
+                            {"op": "verify", "password": "a"},
+                            {"op": "store", "password": "b", "label": "b"},
+                        )
+                    )
+                )
+
+        self.assertEqual([response["ok"] for response in responses], [True, False, False, True])
+        self.assertEqual(responses[1]["error"], "database is locked")
+        self.assertEqual(runner.saved, 2)
+
+    def test_parameters_are_validated_before_running(self):
+        runner = batch.BatchRunner(self.backend)
+        responses = list(
+            runner.run(
+                _lines(
+                    {"op": "generate", "length": True},
+                    {"op": "store", "label": "x"},
+                    {"op": "search", "limit": "10"},
+                )
+            )
+        )
+        errors = [response["error"] for response in responses]
+        self.assertIn("'length' must be int", errors[0])
+        self.assertIn("missing 'password'", errors[1])
+        self.assertIn("'limit' must be int or null", errors[2])
+        self.assertTrue(all(error.startswith("Invalid parameters") for error in errors))
+
+    def test_internal_type_error_is_not_blamed_on_the_caller(self):
+        runner = batch.BatchRunner(self.backend)
+        with mock.patch.object(self.backend, "verify", side_effect=TypeError("bug")):
+            (response,) = runner.run(_lines({"op": "verify", "password": "a"}))
+        self.assertEqual(response["error"], "Internal error: TypeError('bug')")
+
+    def test_batch_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            batch.BatchRunner(self.backend, batch_size=0)
+
+
+class BatchCommandTests(unittest.TestCase):
+    def _run(self, argv, stdin: bytes):
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        with mock.patch("sys.stdin", io.TextIOWrapper(io.BytesIO(stdin), encoding="utf-8")):
+            with mock.patch("sys.stdout", stdout), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                status = main.main(argv)
+        return status, stdout.buffer.getvalue().decode("utf-8").splitlines(), stderr.getvalue()
+
+    def test_cli_writes_jsonl_results_and_summary(self):
+        with TemporaryDirectory() as tmpdir:
+            storage_file = str(Path(tmpdir) / "store.json")
+            stdin = b'{"op": "generate", "length": 12, "save": true, "label": "svc"}\n{"op": "search", "label": "svc"}\n'
+            status, lines, stderr = self._run(["batch", "--storage-file", storage_file], stdin)
+
+        self.assertEqual(status, 0)
+        generated, found = [json.loads(line) for line in lines]
+        self.assertEqual(len(generated["result"]["passwords"][0]), 12)
+        self.assertEqual([entry["label"] for entry in found["result"]["entries"]], ["svc"])
+        self.assertIn("записей сохранено: 1", stderr)
+
+    def test_cli_fails_when_any_command_fails(self):
+        with TemporaryDirectory() as tmpdir:
+            storage_file = str(Path(tmpdir) / "store.json")
+            status, lines, _ = self._run(["batch", "--storage-file", storage_file], b'{"op": "generate", "length": 0}\n')
+
+        self.assertEqual(status, 1)
+        self.assertFalse(json.loads(lines[0])["ok"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import backends, bench, main
+
+
+class MeasureTests(unittest.TestCase):
+    def test_generation_rows_cover_every_policy(self):
+        report = bench.measure_generation(count=50, policies={"pin": bench.POLICIES["pin"]})
+        self.assertEqual([(row["benchmark"], row["policy"]) for row in report], [("generate_password", "pin"), ("generate_passwords", "pin")])
+        self.assertTrue(all(row["ops"] == 50 and row["mean_us"] > 0 for row in report))
+
+    def test_backend_is_grown_to_each_size(self):
+        with TemporaryDirectory() as tmpdir:
+            backend = backends.FileBackend(str(Path(tmpdir) / "store.json"))
+            report = bench.measure_backend(backend, "file", [20, 5], rounds=3)
+            entries = list(backend.iter_entries())
+            found = list(backend.search("bench-000000007"))
+
+        self.assertEqual([(row["benchmark"], row["size"]) for row in report][::4], [("store_password", 5), ("store_password", 20)])
+        self.assertTrue(all(row["ops"] == 3 and row["min_us"] <= row["median_us"] <= row["p95_us"] for row in report))
+        # 20 synthetic entries plus one stored entry per store_password round.
+        self.assertEqual(len(entries), 20 + 2 * 3)
+        self.assertEqual([entry["label"] for entry in found], ["bench-000000007"])
+
+    def test_fingerprint_cost_rows_and_missing_packages(self):
+        with mock.patch.dict("sys.modules", {"argon2": None}):
+            report, skipped = bench.measure_fingerprints(["sha256", "scrypt:n=1024", "argon2id"], rounds=2)
+        self.assertEqual(
+            [(row["benchmark"], row["scheme"]) for row in report],
+            [
+                ("fingerprint", "sha256"),
+                ("fingerprint_cached", "sha256"),
+                ("fingerprint", "scrypt:n=1024"),
+                ("fingerprint_cached", "scrypt:n=1024"),
+            ],
+        )
+        self.assertTrue(all(row["ops"] == 2 and row["mean_us"] > 0 for row in report))
+        self.assertEqual([item["scheme"] for item in skipped], ["argon2id"])
+
+    def test_invalid_parameters_are_rejected(self):
+        with self.assertRaises(ValueError):
+            bench.measure_generation(count=0)
+        with self.assertRaises(ValueError):
+            bench.run_benchmarks(sizes=[5], rounds=1, generate_count=1, backends=["redis"])
+
+
+class CompareTests(unittest.TestCase):
+    @staticmethod
+    def _report(*rows):
+        return {"version": bench.REPORT_VERSION, "results": list(rows)}
+
+    def test_only_rows_slower_than_threshold_are_reported(self):
+        baseline = self._report(
+            {"benchmark": "search", "backend": "file", "size": 10, "median_us": 100.0},
+            {"benchmark": "verify_hit", "backend": "file", "size": 10, "median_us": 100.0},
+            {"benchmark": "generate_passwords", "policy": "pin", "mean_us": 2.0},
+        )
+        current = self._report(
+            {"benchmark": "search", "backend": "file", "size": 10, "median_us": 120.0},
+            {"benchmark": "verify_hit", "backend": "file", "size": 10, "median_us": 200.0},
+            {"benchmark": "generate_passwords", "policy": "pin", "mean_us": 3.0},
+            {"benchmark": "search", "backend": "sqlite", "size": 10, "median_us": 999.0},
+        )
+        regressions = bench.compare(baseline, current, threshold=0.25)
+        self.assertEqual([(item["benchmark"], item["ratio"]) for item in regressions], [("verify_hit", 2.0), ("generate_passwords", 1.5)])
+
+    def test_incompatible_reports_are_rejected(self):
+        with self.assertRaises(ValueError):
+            bench.compare({"version": 0, "results": []}, self._report())
+        with self.assertRaises(ValueError):
+            bench.compare([], self._report())
+
+
+class BenchCommandTests(unittest.TestCase):
+    def test_cli_writes_report_and_fails_on_regression(self):
+        argv = [
+            "bench", "--sizes", "5", "--rounds", "2", "--generate-count", "10", "--backend", "sqlite",
+            "--scheme", "sha256", "--scheme", "scrypt:n=1024", "--fingerprint-rounds", "2",
+        ]
+        with TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "report.json"
+            with mock.patch("sys.stderr", new_callable=io.StringIO):
+                status = main.main([*argv, "--output", str(output)])
+            report = json.loads(output.read_text(encoding="utf-8"))
+
+            self.assertEqual(status, 0)
+            self.assertEqual(report["config"]["sizes"], [5])
+            self.assertEqual({row.get("backend") for row in report["results"]}, {None, "sqlite"})
+            self.assertEqual({row.get("scheme") for row in report["results"]}, {None, "sha256", "scrypt:n=1024"})
+
+            for row in report["results"]:
+                for field in ("median_us", "mean_us"):
+                    if field in row:
+                        row[field] = 1e-6
+            baseline = Path(tmpdir) / "baseline.json"
+            baseline.write_text(json.dumps(report), encoding="utf-8")
+            with mock.patch("sys.stdout", new_callable=io.StringIO), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                status = main.main([*argv, "--baseline", str(baseline)])
+
+        self.assertEqual(status, 1)
+        self.assertIn("Регрессия", stderr.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
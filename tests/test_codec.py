@@ -0,0 +1,67 @@
+import os
+import unittest
+from unittest import mock
+
+from passgen import codec
+
+
+ENTRY = {
+    "label": "пароль\n\t\"x\"",
+    "hash": "ab" * 32,
+    "length": 12,
+    "options": {"digits": True, "special": False},
+    "created_at": "2024-01-01T00:00:00Z",
+}
+
+
+class CodecTests(unittest.TestCase):
+    def test_installed_codecs_write_identical_bytes(self):
+        expected = codec.get_codec("json").encode_entry(ENTRY)
+        self.assertTrue(expected.endswith(b"\n"))
+        self.assertIn("пароль".encode("utf-8"), expected)
+        for name in codec.available_codecs():
+            with self.subTest(codec=name):
+                current = codec.get_codec(name)
+                self.assertEqual(current.encode_entry(ENTRY), expected)
+                self.assertEqual(current.decode_entry(expected), ENTRY)
+
+    def test_schema_violations_are_rejected(self):
+        bad_lines = [b"[1, 2]", b'{"label": "a"}', b'{"hash": 1}', b'{"hash": "x", "length": "12"}', b'{"hash": "x", "length": true}']
+        for name in codec.available_codecs():
+            current = codec.get_codec(name)
+            for line in bad_lines:
+                with self.subTest(codec=name, line=line):
+                    with self.assertRaises(codec.SchemaError):
+                        current.decode_entry(line)
+            with self.assertRaises(ValueError):
+                current.decode_entry(b"{broken")
+
+    def test_unknown_fields_survive_every_codec(self):
+        line = b'{"hash":"ab","label":"x","source":"vault","tags":["a"]}\n'
+        for name in codec.available_codecs():
+            with self.subTest(codec=name):
+                current = codec.get_codec(name)
+                entry = current.decode_entry(line)
+                self.assertEqual(entry["source"], "vault")
+                self.assertEqual(current.encode_entry(entry), line)
+
+    def test_codec_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            codec.Codec()
+
+    def test_codec_is_selected_from_environment(self):
+        with mock.patch.dict(os.environ, {codec.CODEC_ENV: "json"}):
+            self.assertEqual(codec.get_codec().name, "json")
+        with mock.patch.dict(os.environ, {codec.CODEC_ENV: "auto"}):
+            self.assertEqual(codec.get_codec().name, codec.available_codecs()[0])
+        with self.assertRaises(ValueError):
+            codec.get_codec("yaml")
+
+    def test_measure_codecs_reports_every_codec(self):
+        report = codec.measure_codecs(sizes=[50], codecs=["json"])
+        self.assertEqual([(row["codec"], row["entries"]) for row in report], [("json", 50)])
+        self.assertGreater(report[0]["load_peak_mb"], 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -25,7 +25,7 @@ class HandleGenerateTests(unittest.TestCase):
             label="custom-label",
             storage_file=str(self.storage_path),
         )
-        with mock.patch("passgen.commands.generate_password", return_value="abc12345"):
+        with mock.patch("passgen.generator.generate_passwords", return_value=iter(["abc12345"])):
             with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
                 status = commands.handle_generate(args)
 
@@ -39,6 +39,30 @@ class HandleGenerateTests(unittest.TestCase):
             stored = handle.read()
         self.assertIn("custom-label", stored)
 
+    def test_generate_count_streams_and_saves_each_password(self):
+        args = SimpleNamespace(
+            length=10,
+            count=3,
+            use_digits=True,
+            use_special=True,
+            use_uppercase=True,
+            use_lowercase=True,
+            save=True,
+            label="svc",
+            storage_file=str(self.storage_path),
+        )
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with mock.patch("sys.stderr", new_callable=io.StringIO):
+                status = commands.handle_generate(args)
+
+        self.assertEqual(status, 0)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(len(line) == 10 for line in lines))
+        stored = self.storage_path.read_text(encoding="utf-8")
+        for label in ("svc-1", "svc-2", "svc-3"):
+            self.assertIn(label, stored)
+
     def test_generate_handles_validation_error(self):
         args = SimpleNamespace(
             length=1,
@@ -50,7 +74,7 @@ class HandleGenerateTests(unittest.TestCase):
             label=None,
             storage_file=None,
         )
-        with mock.patch("passgen.commands.generate_password", side_effect=ValueError("too short")):
+        with mock.patch("passgen.generator.PasswordPolicy", side_effect=ValueError("too short")):
             with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
                 status = commands.handle_generate(args)
 
@@ -68,7 +92,7 @@ class HandleSearchTests(unittest.TestCase):
             "created_at": "2024-01-01T00:00:00Z",
         }
         args = SimpleNamespace(label=None, password=None, storage_file=None)
-        with mock.patch("passgen.commands.storage.search_passwords", return_value=([entry], Path("file.json"))):
+        with mock.patch("passgen.storage.search_passwords", return_value=([entry], Path("file.json"))):
             with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
                 status = commands.handle_search(args)
 
@@ -77,15 +101,72 @@ class HandleSearchTests(unittest.TestCase):
         self.assertIn("label: alpha", output)
         self.assertIn("options: digits", output)
 
+    def test_search_writes_requested_format(self):
+        entries = [{"label": "alpha", "hash": "ab", "length": 4, "options": {}, "created_at": "2024-01-01T00:00:00Z"}]
+        args = SimpleNamespace(label=None, password=None, storage_file=None, format="csv")
+        with mock.patch("passgen.storage.search_passwords", return_value=(entries, Path("file.json"))):
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                status = commands.handle_search(args)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.getvalue(), "label,hash,length,options,created_at\nalpha,ab,4,,2024-01-01T00:00:00Z\n")
+
+    def test_machine_formats_report_no_results_on_stderr(self):
+        args = SimpleNamespace(label="query", password=None, storage_file=None, format="jsonl")
+        with mock.patch("passgen.storage.search_passwords", return_value=([], Path("file.json"))):
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                    status = commands.handle_search(args)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("Ничего не найдено", stderr.getvalue())
+
     def test_search_handles_no_results(self):
         args = SimpleNamespace(label="query", password="secret", storage_file=None)
-        with mock.patch("passgen.commands.storage.verify_password", return_value=([], Path("file.json"))):
+        with mock.patch("passgen.storage.verify_password", return_value=([], Path("file.json"))):
             with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
                 status = commands.handle_search(args)
 
         self.assertEqual(status, 0)
         self.assertIn("Ничего не найдено", stdout.getvalue())
 
+    def test_search_applies_offset_and_limit(self):
+        entries = [{"label": f"item-{index}", "options": {}} for index in range(5)]
+        args = SimpleNamespace(label=None, password=None, storage_file=None, limit=2, offset=1)
+        with mock.patch("passgen.storage.search_passwords", return_value=(entries, Path("file.json"))):
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                status = commands.handle_search(args)
+
+        self.assertEqual(status, 0)
+        output = stdout.getvalue()
+        self.assertNotIn("item-0", output)
+        self.assertIn("item-1", output)
+        self.assertIn("item-2", output)
+        self.assertNotIn("item-3", output)
+
+    def test_search_streams_postgres_entries(self):
+        entry = {"id": 7, "label": "alpha", "options": {}}
+        args = SimpleNamespace(
+            label="al", password=None, storage_file=None, storage_dsn="dbname=test",
+            limit=10, offset=0, after_id=3,
+        )
+        with mock.patch("passgen.storage_pg.iter_search_passwords_postgres", return_value=iter([entry])) as search:
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                status = commands.handle_search(args)
+
+        self.assertEqual(status, 0)
+        search.assert_called_once_with(label_query="al", dsn="dbname=test", limit=10, offset=0, after_id=3)
+        self.assertIn("id: 7", stdout.getvalue())
+
+    def test_search_rejects_after_id_for_file_storage(self):
+        args = SimpleNamespace(label=None, password=None, storage_file=None, after_id=3)
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            status = commands.handle_search(args)
+
+        self.assertEqual(status, 1)
+        self.assertIn("Ошибка:", stderr.getvalue())
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import io
+import os
+import socket
+import sqlite3
+import stat
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import backends, client, daemon, main
+
+
+class DaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "store.json"
+        self.socket_path = str(Path(self.tmpdir.name) / "passgen.sock")
+        ready = threading.Event()
+        backend = backends.FileBackend(self.storage_path)
+        self.thread = threading.Thread(
+            target=asyncio.run,
+            args=(daemon.serve(backend, self.socket_path, ready=lambda path: ready.set()),),
+            daemon=True,
+        )
+        self.thread.start()
+        self.assertTrue(ready.wait(10))
+        self.addCleanup(self._shutdown)
+
+    def _shutdown(self):
+        if self.thread.is_alive():
+            client.request("shutdown", socket_path=self.socket_path, timeout=5)
+            self.thread.join(10)
+
+    def test_store_verify_and_search_share_one_connection(self):
+        with client.DaemonClient(self.socket_path, timeout=5) as conn:
+            self.assertEqual(conn.request("ping")["location"], str(self.storage_path))
+            stored = conn.request("store", password="secret", label="mail")
+            self.assertEqual(stored["entry"]["label"], "mail")
+            found = conn.request("verify", password="secret")
+            self.assertEqual([entry["label"] for entry in found["entries"]], ["mail"])
+            self.assertEqual(conn.request("verify", password="other")["entries"], [])
+            self.assertEqual(len(conn.request("search", label="mai")["entries"]), 1)
+
+    def test_generate_with_save_persists_every_password(self):
+        result = client.request("generate", socket_path=self.socket_path, length=12, count=3, save=True, label="svc")
+        self.assertEqual(len(result["passwords"]), 3)
+        self.assertTrue(all(len(password) == 12 for password in result["passwords"]))
+        self.assertEqual(result["labels"], ["svc-1", "svc-2", "svc-3"])
+        for password in result["passwords"]:
+            found = client.request("verify", socket_path=self.socket_path, password=password)
+            self.assertEqual(len(found["entries"]), 1)
+
+    def test_errors_are_reported_without_dropping_the_connection(self):
+        with client.DaemonClient(self.socket_path, timeout=5) as conn:
+            with self.assertRaisesRegex(ValueError, "Unknown operation"):
+                conn.request("explode")
+            with self.assertRaisesRegex(ValueError, "Invalid parameters"):
+                conn.request("verify", pasword="typo")
+            with self.assertRaisesRegex(ValueError, "Length"):
+                conn.request("generate", length=0)
+            conn._sock.sendall(b"{broken\n")
+            self.assertIn(b"Invalid JSON", conn._reader.readline())
+            self.assertIn("requests", conn.request("ping"))
+
+    def test_backend_failures_are_answered(self):
+        with client.DaemonClient(self.socket_path, timeout=5) as conn:
+            with mock.patch.object(backends.FileBackend, "verify", side_effect=sqlite3.DatabaseError("disk image is malformed")):
+                with self.assertRaisesRegex(ValueError, "malformed"):
+                    conn.request("verify", password="secret")
+            with mock.patch.object(backends.FileBackend, "search", side_effect=RuntimeError("bug")):
+                with self.assertRaisesRegex(ValueError, "Internal error"):
+                    conn.request("search")
+            self.assertIn("requests", conn.request("ping"))
+
+    def test_concurrent_clients_store_into_one_file(self):
+        errors = []
+
+        def worker(index):
+            try:
+                with client.DaemonClient(self.socket_path, timeout=10) as conn:
+                    for item in range(5):
+                        conn.request("store", password=f"p{index}-{item}", label=f"w{index}")
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(1 for _ in backends.FileBackend(self.storage_path).iter_entries()), 20)
+
+    def test_cli_commands_run_via_daemon(self):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            status = main.main(
+                ["generate", "--length", "10", "--save", "--label", "cli", "--via-daemon", "--socket", self.socket_path]
+            )
+        self.assertEqual(status, 0)
+        password = stdout.getvalue().splitlines()[0]
+        self.assertIn(f"file={self.storage_path}", stdout.getvalue())
+
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            status = main.main(["search", f"--password={password}", "--via-daemon", "--socket", self.socket_path])
+        self.assertEqual(status, 0)
+        self.assertIn("label: cli", stdout.getvalue())
+
+    def test_second_service_on_live_socket_is_refused(self):
+        with self.assertRaisesRegex(OSError, "already running"):
+            daemon._remove_stale_socket(Path(self.socket_path))
+
+    def test_socket_is_private(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+
+    def test_shutdown_removes_socket(self):
+        client.request("shutdown", socket_path=self.socket_path, timeout=5)
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(Path(self.socket_path).exists())
+
+
+class SocketPathTests(unittest.TestCase):
+    def test_stale_socket_is_replaced_and_regular_file_is_kept(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "stale.sock"
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(str(path))
+            listener.close()
+            daemon._remove_stale_socket(path)
+            self.assertFalse(path.exists())
+
+            path.write_text("data")
+            with self.assertRaises(ValueError):
+                daemon._remove_stale_socket(path)
+
+    def test_socket_path_resolution_order(self):
+        with mock.patch.dict("os.environ", {client.SOCKET_ENV: "/run/a.sock", "XDG_RUNTIME_DIR": "/run/user/1"}):
+            self.assertEqual(client.resolve_socket_path(), Path("/run/a.sock"))
+            self.assertEqual(client.resolve_socket_path("/x.sock"), Path("/x.sock"))
+        with mock.patch.dict("os.environ", {client.SOCKET_ENV: "", "XDG_RUNTIME_DIR": "/run/user/1"}):
+            self.assertEqual(client.resolve_socket_path(), Path("/run/user/1/passgen.sock"))
+
+    def test_fallback_socket_lives_in_a_private_directory(self):
+        with TemporaryDirectory() as tmpdir:
+            with mock.patch.dict("os.environ", {client.SOCKET_ENV: "", "XDG_RUNTIME_DIR": ""}):
+                with mock.patch("tempfile.gettempdir", return_value=tmpdir):
+                    path = client.resolve_socket_path()
+                    self.assertEqual(path.parent, client.fallback_socket_dir())
+                    daemon._prepare_socket_dir(path.parent)
+                    self.assertEqual(stat.S_IMODE(os.stat(path.parent).st_mode), 0o700)
+
+                    path.parent.chmod(0o755)
+                    with self.assertRaisesRegex(OSError, "mode 0700"):
+                        daemon._prepare_socket_dir(path.parent)
+
+    def test_client_refuses_foreign_or_open_sockets(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "passgen.sock"
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.addCleanup(listener.close)
+            listener.bind(str(path))
+            listener.listen()
+            os.chmod(path, 0o600)
+            client.check_socket(path)
+
+            os.chmod(path, 0o666)
+            with self.assertRaisesRegex(OSError, "other users"):
+                client.DaemonClient(str(path), timeout=1)
+            os.chmod(path, 0o600)
+            with mock.patch("os.getuid", return_value=os.getuid() + 1):
+                with self.assertRaisesRegex(OSError, "owned by uid"):
+                    client.DaemonClient(str(path), timeout=1)
+
+    def test_unreachable_service_fails_in_cli(self):
+        with TemporaryDirectory() as tmpdir:
+            with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                status = main.main(["search", "--via-daemon", "--socket", str(Path(tmpdir) / "none.sock")])
+        self.assertEqual(status, 1)
+        self.assertIn("Ошибка", stderr.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import fingerprint, snapshot, storage
+
+
+class FingerprinterTests(unittest.TestCase):
+    def test_legacy_scheme_is_bare_sha256(self):
+        value = fingerprint.Fingerprinter().fingerprint("secret")
+        self.assertEqual(value, hashlib.sha256(b"secret").hexdigest())
+
+    def test_hmac_scheme_depends_on_pepper(self):
+        first = fingerprint.Fingerprinter("hmac-sha256", pepper="one").fingerprint("secret")
+        second = fingerprint.Fingerprinter("hmac-sha256", pepper="two").fingerprint("secret")
+        self.assertTrue(first.startswith("hmac-sha256$"))
+        self.assertNotEqual(first, second)
+        with self.assertRaises(ValueError):
+            fingerprint.Fingerprinter("hmac-sha256")
+
+    def test_scrypt_spec_is_encoded_in_prefix(self):
+        fingerprinter = fingerprint.Fingerprinter.from_spec("scrypt:n=1024,r=8,p=1", pepper="pepper")
+        value = fingerprinter.fingerprint("secret")
+        self.assertTrue(value.startswith("scrypt$n=1024,r=8,p=1$"))
+        prefix, digest = fingerprint.split_fingerprint(value)
+        self.assertEqual(prefix, "scrypt$n=1024,r=8,p=1$")
+        self.assertEqual(len(digest), 32)
+        self.assertEqual(fingerprinter.candidates("secret"), [value, hashlib.sha256(b"secret").hexdigest()])
+
+    def test_undecodable_bytes_hash_the_same_in_every_path(self):
+        password = b"caf\xe9".decode("utf-8", "surrogateescape")
+        legacy = hashlib.sha256(b"caf\xe9").hexdigest()
+        self.assertEqual(fingerprint.Fingerprinter().fingerprint(password), legacy)
+        fingerprinter = fingerprint.Fingerprinter.from_spec("scrypt:n=1024", pepper="pepper")
+        candidates = fingerprinter.candidates(password)
+        self.assertEqual(candidates, [fingerprinter.fingerprint(password), legacy])
+
+    def test_measure_cost_reports_cold_and_cached_latency(self):
+        report = fingerprint.measure_cost(["sha256", "scrypt:n=1024"], rounds=2)
+        self.assertEqual([row["scheme"] for row in report], ["sha256", "scrypt:n=1024"])
+        self.assertTrue(all(row["cold_ms"] > 0 and row["cached_ms"] > 0 for row in report))
+        scrypt = report[1]
+        self.assertLess(scrypt["cached_ms"], scrypt["cold_ms"])
+
+    def test_invalid_specs_raise(self):
+        for spec in ("md5", "scrypt:n=abc", "scrypt:q=1"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    fingerprint.Fingerprinter.from_spec(spec)
+
+    def test_slow_scheme_uses_cache(self):
+        fingerprinter = fingerprint.Fingerprinter.from_spec("scrypt:n=1024", pepper="pepper")
+        with mock.patch("hashlib.scrypt", wraps=hashlib.scrypt) as scrypt:
+            first = fingerprinter.fingerprint("secret")
+            second = fingerprinter.fingerprint("secret")
+        self.assertEqual(first, second)
+        self.assertEqual(scrypt.call_count, 1)
+        self.assertEqual(fingerprinter.cache.hits, 1)
+
+    def test_environment_selects_scheme(self):
+        with mock.patch.dict(os.environ, {fingerprint.PEPPER_ENV: "pepper"}, clear=False):
+            os.environ.pop(fingerprint.SCHEME_ENV, None)
+            self.assertEqual(fingerprint.get_fingerprinter().scheme, "hmac-sha256")
+
+
+class VerificationCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = fingerprint.VerificationCache(maxsize=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire(self):
+        cache = fingerprint.VerificationCache(ttl=10)
+        with mock.patch("passgen.fingerprint.time.monotonic", return_value=100.0):
+            cache.put("a", "1")
+        with mock.patch("passgen.fingerprint.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), "1")
+        with mock.patch("passgen.fingerprint.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_invalid_limits_raise(self):
+        with self.assertRaises(ValueError):
+            fingerprint.VerificationCache(maxsize=0)
+        with self.assertRaises(ValueError):
+            fingerprint.VerificationCache(ttl=0)
+
+
+class MixedStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_file = str(Path(self.tmpdir.name) / "passwords.json")
+        storage.store_password("legacy-secret", label="old", length=8, storage_file=self.storage_file)
+        patcher = mock.patch.dict(
+            os.environ,
+            {fingerprint.SCHEME_ENV: "scrypt:n=1024", fingerprint.PEPPER_ENV: "pepper"},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        storage.store_password("new-secret", label="new", length=8, storage_file=self.storage_file)
+
+    def test_index_verifies_legacy_and_peppered_entries(self):
+        for password, label in (("legacy-secret", "old"), ("new-secret", "new")):
+            found, _ = storage.verify_password(password, storage_file=self.storage_file)
+            self.assertEqual([entry["label"] for entry in found], [label])
+        stored = [entry["hash"] for entry in storage.iter_entries(self.storage_file)]
+        self.assertTrue(stored[1].startswith("scrypt$"))
+
+    def test_snapshot_keeps_scheme_prefixes(self):
+        storage.build_snapshot(self.storage_file)
+        path = Path(self.storage_file)
+        with snapshot.open_snapshot(path) as snap:
+            self.assertEqual([entry["hash"] for entry in snap.entries()], [entry["hash"] for entry in storage.iter_entries(self.storage_file)])
+        found, _ = storage.verify_password("new-secret", storage_file=self.storage_file)
+        self.assertEqual([entry["label"] for entry in found], ["new"])
+        found, _ = storage.verify_password("legacy-secret", storage_file=self.storage_file)
+        self.assertEqual([entry["label"] for entry in found], ["old"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import unittest
+
+from passgen import formats
+
+
+ENTRIES = [
+    {
+        "label": "mail, work",
+        "hash": "ab" * 32,
+        "length": 12,
+        "options": {"digits": True, "special": False, "uppercase": True, "lowercase": True},
+        "created_at": "2024-01-01T00:00:00Z",
+    },
+    {
+        "label": "db",
+        "hash": "deadbeef",
+        "length": 8,
+        "options": {},
+        "created_at": "2024-01-02T00:00:00Z",
+    },
+]
+
+
+def _render(entries, fmt, **kwargs):
+    output = io.StringIO()
+    count = formats.write_entries(entries, output, fmt, **kwargs)
+    return count, output.getvalue()
+
+
+class OptionsFormatterTests(unittest.TestCase):
+    def test_every_mask_matches_a_plain_join(self):
+        formatter = formats.OptionsFormatter(", ", "—")
+        for mask in range(16):
+            options = {name: bool(mask >> bit & 1) for bit, name in enumerate(formats.OPTION_NAMES)}
+            expected = ", ".join(name for name, enabled in options.items() if enabled) or "—"
+            self.assertEqual(formatter.format(options), expected)
+
+    def test_unknown_options_take_the_generic_path(self):
+        formatter = formats.OptionsFormatter(";", "")
+        self.assertEqual(formatter.format({"digits": True, "special": True, "uppercase": False, "emoji": True}), "digits;special;emoji")
+        self.assertEqual(formatter.format(None), "")
+
+
+class WriteEntriesTests(unittest.TestCase):
+    def test_text_format_keeps_the_record_layout(self):
+        count, output = _render([{"id": 7, **ENTRIES[1]}], "text")
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            output,
+            "id: 7\n"
+            "label: db\n"
+            "  hash: deadbeef\n"
+            "  length: 8\n"
+            "  options: —\n"
+            "  created_at: 2024-01-02T00:00:00Z\n",
+        )
+
+    def test_csv_format_quotes_fields_and_adds_id_column(self):
+        _, output = _render([{"id": 1, **ENTRIES[0]}, {"id": 2, **ENTRIES[1]}], "csv")
+        rows = list(csv.reader(io.StringIO(output)))
+        self.assertEqual(rows[0], ["id", "label", "hash", "length", "options", "created_at"])
+        self.assertEqual(rows[1], ["1", "mail, work", "ab" * 32, "12", "digits;uppercase;lowercase", "2024-01-01T00:00:00Z"])
+        self.assertEqual(rows[2][2:4], ["deadbeef", "8"])
+
+    def test_jsonl_format_round_trips_entries(self):
+        _, output = _render(ENTRIES, "jsonl")
+        decoded = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(decoded[0], ENTRIES[0])
+        self.assertEqual(decoded[1]["hash"], "deadbeef")
+
+    def test_table_format_aligns_columns(self):
+        _, output = _render(ENTRIES, "table")
+        header, rule, first, second = output.splitlines()
+        self.assertTrue(header.startswith("label       hash"))
+        self.assertEqual(first.index("ab"), header.index("hash"))
+        self.assertEqual(second.index("deadbeef"), header.index("hash"))
+        self.assertEqual(set(rule.replace(" ", "")), {"-"})
+
+    def test_output_does_not_depend_on_chunk_size(self):
+        # The first chunk already holds the widest table values.
+        entries = ENTRIES * 5
+        for fmt in formats.FORMATS:
+            with self.subTest(fmt=fmt):
+                self.assertEqual(_render(entries, fmt, chunk_size=3), _render(entries, fmt))
+
+    def test_empty_result_writes_nothing(self):
+        for fmt in formats.FORMATS:
+            self.assertEqual(_render([], fmt), (0, ""))
+
+    def test_invalid_arguments_are_rejected(self):
+        with self.assertRaises(ValueError):
+            _render(ENTRIES, "yaml")
+        with self.assertRaises(ValueError):
+            _render(ENTRIES, "csv", chunk_size=0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,5 +1,6 @@
 import string
 import unittest
+from unittest import mock
 
 from passgen import generator
 
@@ -39,5 +40,101 @@ class GeneratePasswordTests(unittest.TestCase):
         self.assertTrue(any(char in string.ascii_uppercase for char in password))
 
 
+class GeneratePasswordsTests(unittest.TestCase):
+    def test_generates_requested_count(self):
+        passwords = list(generator.generate_passwords(50, 12))
+        self.assertEqual(len(passwords), 50)
+        self.assertTrue(all(len(password) == 12 for password in passwords))
+        self.assertEqual(len(set(passwords)), 50)
+
+    def test_every_password_covers_each_charset(self):
+        passwords = generator.generate_passwords(
+            200,
+            3,
+            use_digits=True,
+            use_special=True,
+            use_uppercase=False,
+            use_lowercase=True,
+        )
+        for password in passwords:
+            self.assertTrue(any(char in string.digits for char in password))
+            self.assertTrue(any(char in string.ascii_lowercase for char in password))
+            self.assertTrue(any(char in generator.utils.SPECIAL_CHARACTERS for char in password))
+
+    def test_rejects_non_positive_count(self):
+        with self.assertRaises(ValueError):
+            generator.generate_passwords(0, 12)
+
+    def test_translation_table_is_unbiased(self):
+        table, rejected = generator._build_translation("abc")
+        accepted = [value for value in range(256) if value not in rejected]
+        self.assertEqual(len(accepted), 255)
+        counts = {char: 0 for char in "abc"}
+        for value in accepted:
+            counts[chr(table[value])] += 1
+        self.assertEqual(set(counts.values()), {85})
+
+
+class PasswordPolicyTests(unittest.TestCase):
+    def test_policy_precomputes_alphabets(self):
+        policy = generator.PasswordPolicy(
+            8,
+            use_digits=True,
+            use_special=False,
+            use_uppercase=False,
+            use_lowercase=True,
+        )
+        self.assertEqual(policy.charsets, (string.ascii_lowercase, string.digits))
+        self.assertEqual(policy.alphabet, string.ascii_lowercase + string.digits)
+        self.assertEqual(policy.threshold, 252)
+        self.assertEqual(len(policy.rejected), 4)
+        self.assertFalse(hasattr(policy, "__dict__"))
+
+    def test_policy_generates_matching_passwords(self):
+        policy = generator.PasswordPolicy(5, use_special=False, use_uppercase=False)
+        for password in generator.generate_passwords(20, policy=policy):
+            self.assertEqual(len(password), 5)
+            self.assertTrue(set(password) <= set(policy.alphabet))
+
+    def test_policy_options_match_storage_format(self):
+        policy = generator.PasswordPolicy(12, use_special=False)
+        self.assertEqual(
+            policy.options,
+            {"digits": True, "special": False, "uppercase": True, "lowercase": True},
+        )
+
+    def test_get_policy_is_cached(self):
+        self.assertIs(generator.get_policy(12), generator.get_policy(12))
+
+
+class BackendSelectionTests(unittest.TestCase):
+    def setUp(self):
+        self.policy = generator.PasswordPolicy(4, use_special=False)
+
+    def test_unknown_backend_raises(self):
+        with self.assertRaises(ValueError):
+            self.policy.generate_many(5, backend="gpu")
+
+    def test_auto_falls_back_without_numpy(self):
+        with mock.patch("passgen.generator._load_numpy", return_value=None):
+            passwords = list(self.policy.generate_many(generator.NUMPY_BATCH_THRESHOLD))
+        self.assertEqual(len(passwords), generator.NUMPY_BATCH_THRESHOLD)
+
+    def test_numpy_backend_requires_numpy(self):
+        with mock.patch("passgen.generator._load_numpy", return_value=None):
+            with self.assertRaises(ImportError):
+                self.policy.generate_many(5, backend="numpy")
+
+    @unittest.skipUnless(generator._load_numpy(), "numpy is not installed")
+    def test_numpy_backend_respects_contract(self):
+        passwords = list(self.policy.generate_many(generator.NUMPY_CHUNK_SIZE + 7, backend="numpy"))
+        self.assertEqual(len(passwords), generator.NUMPY_CHUNK_SIZE + 7)
+        for password in passwords:
+            self.assertEqual(len(password), 4)
+            self.assertTrue(any(char in string.digits for char in password))
+            self.assertTrue(any(char in string.ascii_lowercase for char in password))
+            self.assertTrue(any(char in string.ascii_uppercase for char in password))
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -1,5 +1,9 @@
 import io
+import os
+import subprocess
+import sys
 import unittest
+from pathlib import Path
 from unittest import mock
 
 from passgen import main
@@ -37,5 +41,51 @@ class MainDispatchTests(unittest.TestCase):
         handler.assert_called_once()
 
 
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that only the subcommand handlers need.
+HEAVY_MODULES = {"passgen.commands", "passgen.storage", "passgen.generator", "hashlib", "sqlite3", "asyncio"}
+
+
+def _import_times(*args: str) -> dict:
+    """Run Python with ``-X importtime`` and return cumulative times in microseconds."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+class StartupTests(unittest.TestCase):
+    def test_help_does_not_import_handlers(self):
+        loaded = set(_import_times("-m", "passgen.main", "--help"))
+        self.assertIn("argparse", loaded)
+        self.assertEqual(loaded & HEAVY_MODULES, set())
+
+    def test_via_daemon_imports_only_the_client(self):
+        loaded = set(_import_times("-m", "passgen.main", "search", "--via-daemon", "--socket", str(ROOT / "missing.sock")))
+        self.assertIn("passgen.client", loaded)
+        self.assertEqual(loaded & HEAVY_MODULES, {"passgen.commands"})
+        self.assertNotIn("passgen.backends", loaded)
+        self.assertNotIn("orjson", loaded)
+
+    def test_commands_module_is_reachable_from_main(self):
+        from passgen import commands
+
+        self.assertIs(main.commands, commands)
+        with self.assertRaises(AttributeError):
+            main.missing
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,57 @@
+import string
+import unittest
+
+from passgen import generator, parallel
+
+
+class GeneratePasswordsParallelTests(unittest.TestCase):
+    def setUp(self):
+        self.policy = generator.PasswordPolicy(
+            6,
+            use_digits=True,
+            use_special=False,
+            use_uppercase=True,
+            use_lowercase=False,
+        )
+
+    def test_ordered_output_has_requested_count(self):
+        passwords = list(
+            parallel.generate_passwords_parallel(
+                25,
+                policy=self.policy,
+                workers=2,
+                shard_size=4,
+                max_pending=2,
+            )
+        )
+        self.assertEqual(len(passwords), 25)
+        for password in passwords:
+            self.assertEqual(len(password), 6)
+            self.assertTrue(any(char in string.digits for char in password))
+            self.assertTrue(any(char in string.ascii_uppercase for char in password))
+
+    def test_unordered_output_has_requested_count(self):
+        passwords = list(
+            parallel.generate_passwords_parallel(
+                17,
+                policy=self.policy,
+                workers=2,
+                shard_size=5,
+                ordered=False,
+            )
+        )
+        self.assertEqual(len(passwords), 17)
+
+    def test_single_worker_runs_in_process(self):
+        passwords = parallel.generate_passwords_parallel(3, policy=self.policy, workers=1)
+        self.assertEqual(len(list(passwords)), 3)
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            parallel.generate_passwords_parallel(0, policy=self.policy, workers=2)
+        with self.assertRaises(ValueError):
+            parallel.generate_passwords_parallel(5, policy=self.policy, workers=2, shard_size=0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
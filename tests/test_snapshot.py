@@ -0,0 +1,75 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import snapshot, storage, utils
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "passwords.json"
+        self.stored = []
+        for password, label in (("one", "Alpha"), ("two", "beta"), ("one", "alphabet"), ("x", "")):
+            entry, _ = storage.store_password(
+                password,
+                label=label,
+                length=len(password),
+                options={"digits": True, "special": False},
+                storage_file=str(self.storage_path),
+            )
+            self.stored.append(entry)
+        storage.build_snapshot(str(self.storage_path))
+
+    def test_roundtrip_preserves_entries(self):
+        with snapshot.open_snapshot(self.storage_path) as snap:
+            self.assertEqual(snap.count, 4)
+            self.assertEqual(snap.entries(), self.stored)
+
+    def test_entries_are_returned_exactly_as_stored(self):
+        odd = [
+            {"label": "wide", "hash": "ab" * 32, "length": 70000, "options": {"digits": True, "emoji": False}},
+            {"label": None, "hash": "cd" * 32, "length": None, "created_at": "2024-01-01T12:00:00.123456+03:00"},
+            {"hash": "ef" * 32, "source": "vault"},
+        ]
+        storage.store_entries(odd, storage_file=str(self.storage_path))
+        expected = list(storage.iter_entries(str(self.storage_path)))
+        storage.build_snapshot(str(self.storage_path))
+        with snapshot.open_snapshot(self.storage_path) as snap:
+            self.assertEqual(snap.entries(), expected)
+        matches, _ = storage.verify_password("one", storage_file=str(self.storage_path))
+        self.assertEqual(matches, [self.stored[0], self.stored[2]])
+
+    def test_search_and_verify_read_snapshot(self):
+        with mock.patch("passgen.storage._iter_entries") as scan:
+            with mock.patch("passgen.storage.storage_index.open_index") as index:
+                found, _ = storage.search_passwords(label_query="ALPHA", storage_file=str(self.storage_path))
+                matches, _ = storage.verify_password("one", storage_file=str(self.storage_path))
+        scan.assert_not_called()
+        index.assert_not_called()
+        self.assertEqual([entry["label"] for entry in found], ["Alpha", "alphabet"])
+        self.assertEqual([entry["label"] for entry in matches], ["Alpha", "alphabet"])
+
+    def test_label_match_does_not_span_entries(self):
+        with snapshot.open_snapshot(self.storage_path) as snap:
+            self.assertEqual(snap.find_label("haal"), [])
+            self.assertEqual(snap.find_label("abet"), [2])
+            self.assertEqual(snap.find_hash(bytes.fromhex(utils.hash_password("missing"))), [])
+
+    def test_snapshot_is_ignored_after_store_changes(self):
+        storage.store_password(
+            "three",
+            label="gamma",
+            length=5,
+            options={},
+            storage_file=str(self.storage_path),
+        )
+        self.assertIsNone(snapshot.open_snapshot(self.storage_path))
+        matches, _ = storage.verify_password("three", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in matches], ["gamma"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,9 +1,20 @@
 import json
+import multiprocessing
+import threading
 import unittest
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest import mock
 
-from passgen import storage, utils
+from passgen import generator, storage, utils
+
+
+def _store_many(storage_file, worker, count):
+    for index in range(count):
+        storage.store_password(
+            f"secret-{worker}-{index}", label=f"w{worker}", length=12, storage_file=storage_file
+        )
 
 
 class StorageTests(unittest.TestCase):
@@ -53,6 +64,108 @@ class StorageTests(unittest.TestCase):
         entries, _ = storage.search_passwords(label_query="alp", storage_file=str(self.storage_path))
         self.assertEqual([entry["label"] for entry in entries], ["alpha"])
 
+    def test_store_password_accepts_policy(self):
+        policy = generator.PasswordPolicy(10, use_special=False)
+        entry, _ = storage.store_password(
+            "secret",
+            label="with-policy",
+            storage_file=str(self.storage_path),
+            policy=policy,
+        )
+        self.assertEqual(entry["length"], 10)
+        self.assertEqual(entry["options"], policy.options)
+
+    def test_store_appends_one_json_line_per_entry(self):
+        for label in ("one", "two"):
+            storage.store_password(
+                "secret",
+                label=label,
+                length=6,
+                options={},
+                storage_file=str(self.storage_path),
+            )
+        lines = self.storage_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["label"] for line in lines], ["one", "two"])
+
+    def test_legacy_list_is_migrated_on_first_store(self):
+        legacy = [{"label": "old", "hash": utils.hash_password("old"), "length": 3, "options": {}}]
+        self.storage_path.write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+
+        entries, _ = storage.verify_password("old", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in entries], ["old"])
+
+        storage.store_password(
+            "new",
+            label="new",
+            length=3,
+            options={},
+            storage_file=str(self.storage_path),
+        )
+        lines = self.storage_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["label"] for line in lines], ["old", "new"])
+        self.assertFalse(storage.migrate_storage(str(self.storage_path)))
+
+    def test_migrate_storage_converts_legacy_file(self):
+        self.storage_path.write_text(json.dumps([{"label": "a", "hash": "00"}]), encoding="utf-8")
+        self.assertTrue(storage.migrate_storage(str(self.storage_path)))
+        self.assertEqual(self.storage_path.read_text(encoding="utf-8"), '{"label":"a","hash":"00"}\n')
+
+    def test_store_entries_writes_batches(self):
+        entries = (
+            utils.build_entry(f"secret-{index}", label=f"bulk-{index}", length=8, options={})
+            for index in range(5)
+        )
+        with mock.patch("passgen.storage._append_entries", wraps=storage._append_entries) as append:
+            saved, path = storage.store_entries(entries, storage_file=str(self.storage_path), batch_size=2)
+
+        self.assertEqual(saved, 5)
+        self.assertEqual(path, self.storage_path.resolve())
+        self.assertEqual(append.call_count, 3)
+        found, _ = storage.verify_password("secret-3", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in found], ["bulk-3"])
+
+    def test_compact_drops_expired_entries_and_duplicates(self):
+        old = {"label": "a", "hash": utils.hash_password("old"), "length": 3, "options": {}, "created_at": "2020-01-01T00:00:00Z"}
+        fresh = {"label": "a", "hash": utils.hash_password("new"), "length": 3, "options": {}, "created_at": "2024-06-01T00:00:00Z"}
+        other_label = dict(fresh, label="b")
+        undated = {"label": "c", "hash": utils.hash_password("x"), "length": 1, "options": {}}
+        self.storage_path.write_text(json.dumps([old, fresh, fresh, other_label, undated], indent=2), encoding="utf-8")
+
+        stats = storage.compact_storage(
+            str(self.storage_path),
+            retention=timedelta(days=30),
+            now=datetime(2024, 6, 10, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(stats, {"expired": 1, "duplicates": 1, "kept": 3})
+        lines = self.storage_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [fresh, other_label, undated])
+        self.assertNotIn(": ", lines[0])
+        self.assertEqual(storage.verify_password("old", storage_file=str(self.storage_path))[0], [])
+
+    def test_compact_rebuilds_snapshot(self):
+        for label in ("a", "a", "b"):
+            storage.store_password("secret", label=label, length=6, storage_file=str(self.storage_path))
+        storage.build_snapshot(str(self.storage_path))
+
+        storage.compact_storage(str(self.storage_path))
+
+        with mock.patch("passgen.storage.storage_index.open_index") as index:
+            found, _ = storage.verify_password("secret", storage_file=str(self.storage_path))
+        index.assert_not_called()
+        self.assertEqual([entry["label"] for entry in found], ["a", "b"])
+
+    def test_compact_keeps_file_when_store_is_corrupted(self):
+        storage.store_password("secret", label="a", length=6, storage_file=str(self.storage_path))
+        with self.storage_path.open("a", encoding="utf-8") as handle:
+            handle.write("{broken\n")
+        before = self.storage_path.read_bytes()
+
+        with self.assertRaises(ValueError):
+            storage.compact_storage(str(self.storage_path))
+        self.assertEqual(self.storage_path.read_bytes(), before)
+        self.assertEqual(list(self.storage_path.parent.glob(".*.tmp")), [])
+
     def test_invalid_json_raises_value_error(self):
         self.storage_path.write_text("{invalid json", encoding="utf-8")
         with self.assertRaises(ValueError):
@@ -64,5 +177,61 @@ class StorageTests(unittest.TestCase):
             storage.search_passwords(storage_file=str(self.storage_path))
 
 
+
+class ConcurrentStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "passwords.json"
+
+    def test_concurrent_processes_do_not_lose_entries(self):
+        self.storage_path.write_text(json.dumps([{"label": "old", "hash": "h"}]), encoding="utf-8")
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_store_many, args=(str(self.storage_path), worker, 20))
+            for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+        entries = list(storage.iter_entries(str(self.storage_path)))
+        self.assertEqual(len(entries), 81)
+        self.assertEqual(entries[0]["label"], "old")
+        found, _ = storage.verify_password("secret-3-19", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in found], ["w3"])
+
+    def test_group_commit_writer_batches_concurrent_appends(self):
+        writer = storage.GroupCommitWriter(str(self.storage_path))
+        barrier = threading.Barrier(8)
+
+        def work(worker):
+            barrier.wait()
+            for index in range(25):
+                writer.store_password(f"secret-{worker}-{index}", label=f"w{worker}", length=12)
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        entries = list(storage.iter_entries(str(self.storage_path)))
+        self.assertEqual(len(entries), 200)
+        self.assertLessEqual(writer.commits, 200)
+        found, _ = storage.verify_password("secret-7-24", storage_file=str(self.storage_path))
+        self.assertEqual(len(found), 1)
+
+    def test_group_commit_writer_reports_errors_to_every_writer(self):
+        writer = storage.GroupCommitWriter(str(self.storage_path))
+        with mock.patch("passgen.storage._append_entries", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                writer.append({"label": "a", "hash": "h"})
+        writer.append({"label": "b", "hash": "h"})
+        self.assertEqual([entry["label"] for entry in storage.iter_entries(str(self.storage_path))], ["b"])
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
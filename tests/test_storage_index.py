@@ -0,0 +1,154 @@
+import sqlite3
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import storage, storage_index, utils
+
+
+class StorageIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "passwords.json"
+
+    def _store(self, password, label):
+        return storage.store_password(
+            password,
+            label=label,
+            length=len(password),
+            options={},
+            storage_file=str(self.storage_path),
+        )
+
+    def test_store_updates_index_incrementally(self):
+        self._store("first", "a")
+        self._store("second", "b")
+        self.assertTrue(storage_index.index_path(self.storage_path).exists())
+
+        with storage_index.open_index(self.storage_path) as conn:
+            offsets = storage_index.find_hash_offsets(conn, utils.hash_password("second"))
+        entries = storage_index.read_entries_at(self.storage_path, offsets)
+        self.assertEqual([entry["label"] for entry in entries], ["b"])
+
+    def test_verify_does_not_scan_the_store(self):
+        self._store("secret", "alpha")
+        self._store("other", "beta")
+        with mock.patch("passgen.storage._iter_entries") as scan:
+            entries, _ = storage.verify_password("secret", storage_file=str(self.storage_path))
+        scan.assert_not_called()
+        self.assertEqual([entry["label"] for entry in entries], ["alpha"])
+
+    def test_index_stores_raw_digests(self):
+        self._store("secret", "alpha")
+        with storage_index.open_index(self.storage_path) as conn:
+            digest, scheme = conn.execute("SELECT digest, scheme FROM hashes").fetchone()
+        self.assertEqual((digest, scheme), (bytes.fromhex(utils.hash_password("secret")), ""))
+
+    def test_old_index_schema_is_rebuilt(self):
+        self._store("secret", "alpha")
+        path = storage_index.index_path(self.storage_path)
+        path.unlink()
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE hashes (hash TEXT NOT NULL, offset INTEGER NOT NULL);
+            INSERT INTO meta VALUES ('schema_version', 2);
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        entries, _ = storage.verify_password("secret", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in entries], ["alpha"])
+
+    def test_index_catches_up_with_external_appends(self):
+        self._store("secret", "alpha")
+        entry = {"label": "manual", "hash": utils.hash_password("manual"), "length": 6, "options": {}}
+        storage._append_entries(self.storage_path, [entry])
+
+        entries, _ = storage.verify_password("manual", storage_file=str(self.storage_path))
+        self.assertEqual([item["label"] for item in entries], ["manual"])
+
+    def test_index_is_rebuilt_after_rewrite(self):
+        self._store("secret", "alpha")
+        self._store("other", "beta")
+        storage._write_entries(self.storage_path, storage._load_entries(self.storage_path)[1:])
+
+        self.assertEqual(storage.verify_password("secret", storage_file=str(self.storage_path))[0], [])
+        entries, _ = storage.verify_password("other", storage_file=str(self.storage_path))
+        self.assertEqual([entry["label"] for entry in entries], ["beta"])
+
+    def test_verify_applies_label_filter(self):
+        self._store("secret", "alpha")
+        self._store("secret", "beta")
+        entries, _ = storage.verify_password(
+            "secret",
+            label_query="BET",
+            storage_file=str(self.storage_path),
+        )
+        self.assertEqual([entry["label"] for entry in entries], ["beta"])
+
+    def test_lookup_survives_compaction_between_open_and_index(self):
+        self._store("first", "alpha")
+        self._store("first", "alpha")
+        self._store("second", "beta")
+        open_index = storage_index.open_index
+        calls = []
+
+        def compact_then_open(path):
+            if not calls:
+                storage.compact_storage(str(path))
+            calls.append(path)
+            return open_index(path)
+
+        with mock.patch("passgen.storage_index.open_index", side_effect=compact_then_open):
+            entries, _ = storage.verify_password("second", storage_file=str(self.storage_path))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([entry["label"] for entry in entries], ["beta"])
+
+
+class LabelIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage_path = Path(self.tmpdir.name) / "passwords.json"
+        for label in ("Prod-Web-01", "prod-db-02", "staging-web-01", "qa"):
+            storage.store_password(
+                label,
+                label=label,
+                length=len(label),
+                options={},
+                storage_file=str(self.storage_path),
+            )
+
+    def _search(self, query):
+        entries, _ = storage.search_passwords(label_query=query, storage_file=str(self.storage_path))
+        return [entry["label"] for entry in entries]
+
+    def test_label_grams(self):
+        self.assertEqual(storage_index.label_grams("abcd"), {"abc", "bcd"})
+        self.assertEqual(storage_index.label_grams("ab"), set())
+
+    def test_substring_search_uses_index(self):
+        with mock.patch("passgen.storage._iter_entries") as scan:
+            labels = self._search("WEB-01")
+        scan.assert_not_called()
+        self.assertEqual(labels, ["Prod-Web-01", "staging-web-01"])
+
+    def test_trigram_candidates_are_confirmed(self):
+        self.assertEqual(self._search("prod-d"), ["prod-db-02"])
+        self.assertEqual(self._search("web-02"), [])
+
+    def test_short_queries_fall_back_to_label_table(self):
+        self.assertEqual(self._search("qa"), ["qa"])
+        self.assertEqual(self._search("d"), ["Prod-Web-01", "prod-db-02"])
+
+    def test_search_without_label_returns_everything(self):
+        self.assertEqual(len(self._search(None)), 4)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
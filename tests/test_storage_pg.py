@@ -0,0 +1,251 @@
+import sys
+import threading
+import types
+import unittest
+from unittest import mock
+
+from passgen import storage_pg
+
+DSN = "postgresql://user@db/passgen"
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append(" ".join(query.split()))
+
+    def copy_expert(self, query, buffer):
+        self.conn.copied.append(buffer.getvalue())
+
+
+class FakeConnection:
+    def __init__(self, status=0):
+        self.closed = 0
+        self.status = status
+        self.executed = []
+        self.copied = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def cursor(self, name=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+def _fake_psycopg2():
+    """Build a psycopg2 stand-in with the pieces storage_pg touches."""
+    psycopg2 = types.ModuleType("psycopg2")
+    psycopg2.Error = type("Error", (Exception,), {})
+    psycopg2.OperationalError = type("OperationalError", (psycopg2.Error,), {})
+    psycopg2.InterfaceError = type("InterfaceError", (psycopg2.Error,), {})
+
+    extensions = types.ModuleType("psycopg2.extensions")
+    extensions.TRANSACTION_STATUS_UNKNOWN = 4
+
+    pool = types.ModuleType("psycopg2.pool")
+    pool.PoolError = type("PoolError", (psycopg2.Error,), {})
+
+    class ThreadedConnectionPool:
+        created = []
+
+        def __init__(self, minconn, maxconn, dsn):
+            self.maxconn = maxconn
+            self.dsn = dsn
+            self.idle = []
+            self.used = 0
+            self.discarded = []
+            self.lock = threading.Lock()
+            ThreadedConnectionPool.created.append(self)
+
+        def getconn(self):
+            with self.lock:
+                if self.used >= self.maxconn:
+                    raise pool.PoolError("connection pool exhausted")
+                self.used += 1
+                return self.idle.pop() if self.idle else FakeConnection()
+
+        def putconn(self, conn, close=False):
+            with self.lock:
+                self.used -= 1
+                if close:
+                    self.discarded.append(conn)
+                else:
+                    self.idle.append(conn)
+
+        def closeall(self):
+            self.idle.clear()
+
+    pool.ThreadedConnectionPool = ThreadedConnectionPool
+
+    extras = types.ModuleType("psycopg2.extras")
+    extras.Json = lambda value: value
+    extras.execute_values = mock.Mock()
+
+    psycopg2.extensions, psycopg2.pool, psycopg2.extras = extensions, pool, extras
+    return {
+        "psycopg2": psycopg2,
+        "psycopg2.extensions": extensions,
+        "psycopg2.pool": pool,
+        "psycopg2.extras": extras,
+    }
+
+
+class StubbedPostgresTestCase(unittest.TestCase):
+    def setUp(self):
+        self.modules = _fake_psycopg2()
+        patcher = mock.patch.dict(sys.modules, self.modules)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(storage_pg.close_pools)
+        storage_pg.close_pools()
+        self.pool_class = self.modules["psycopg2.pool"].ThreadedConnectionPool
+
+
+class PoolTests(StubbedPostgresTestCase):
+    def test_one_pool_per_dsn(self):
+        for dsn in (DSN, DSN, DSN + "-other"):
+            with storage_pg._connection(dsn):
+                pass
+        self.assertEqual([pool.dsn for pool in self.pool_class.created], [DSN, DSN + "-other"])
+
+    def test_schema_is_ensured_once_per_dsn(self):
+        with mock.patch("passgen.storage_pg._ensure_schema") as ensure:
+            for dsn in (DSN, DSN, DSN + "-other", DSN + "-other"):
+                with storage_pg._connection(dsn):
+                    pass
+        self.assertEqual(ensure.call_count, 2)
+
+    def test_closed_and_unknown_connections_are_dropped(self):
+        with storage_pg._connection(DSN):
+            pass
+        pool = self.pool_class.created[0]
+        healthy, closed, unknown = FakeConnection(), FakeConnection(), FakeConnection(status=4)
+        closed.closed = 1
+        pool.idle[:] = [healthy, unknown, closed]
+
+        with storage_pg._connection(DSN) as conn:
+            self.assertIs(conn, healthy)
+        self.assertEqual(pool.discarded, [closed, unknown])
+
+    def test_broken_connection_is_not_returned(self):
+        psycopg2 = self.modules["psycopg2"]
+        with self.assertRaises(psycopg2.OperationalError):
+            with storage_pg._connection(DSN) as conn:
+                raise psycopg2.OperationalError("server closed the connection")
+        self.assertEqual(self.pool_class.created[0].discarded, [conn])
+
+    def test_callers_wait_for_a_free_connection(self):
+        self.addCleanup(storage_pg.configure_pool, min_size=storage_pg.POOL_MIN_SIZE, max_size=storage_pg.POOL_MAX_SIZE)
+        storage_pg.configure_pool(min_size=0, max_size=2)
+        errors = []
+        barrier = threading.Barrier(6)
+
+        def work():
+            try:
+                barrier.wait()
+                with storage_pg._connection(DSN):
+                    threading.Event().wait(0.01)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.pool_class.created[0].used, 0)
+
+    def test_configure_pool_rejects_bad_sizes(self):
+        for sizes in ({"min_size": -1}, {"max_size": 0}, {"min_size": 5, "max_size": 2}):
+            with self.subTest(sizes=sizes):
+                with self.assertRaises(ValueError):
+                    storage_pg.configure_pool(**sizes)
+
+
+class BulkInsertTests(StubbedPostgresTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("passgen.storage_pg._ensure_schema")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.execute_values = self.modules["psycopg2.extras"].execute_values
+        self.entries = [
+            {"label": f"item-{index}", "hash": f"{index:064x}", "length": 8, "options": {}, "created_at": "2024-01-01T00:00:00Z"}
+            for index in range(5)
+        ]
+
+    def _connection(self):
+        return self.pool_class.created[0].idle[0]
+
+    def test_batches_are_committed_separately(self):
+        count, dsn = storage_pg.store_passwords_postgres(iter(self.entries), dsn=DSN, batch_size=2)
+        self.assertEqual((count, dsn), (5, DSN))
+        batches = [call.args[2] for call in self.execute_values.call_args_list]
+        self.assertEqual([len(rows) for rows in batches], [2, 2, 1])
+        self.assertEqual([row[0] for rows in batches for row in rows], [entry["label"] for entry in self.entries])
+        self.assertEqual([call.kwargs["page_size"] for call in self.execute_values.call_args_list], [2, 2, 1])
+        conn = self._connection()
+        self.assertEqual((conn.commits, conn.rollbacks), (3, 0))
+
+    def test_failed_batch_is_rolled_back(self):
+        error = self.modules["psycopg2"].Error("duplicate key")
+        self.execute_values.side_effect = [None, error]
+        with self.assertRaises(type(error)):
+            storage_pg.store_passwords_postgres(self.entries, dsn=DSN, batch_size=2)
+        conn = self._connection()
+        self.assertEqual((conn.commits, conn.rollbacks), (1, 1))
+
+    def test_missing_fields_get_defaults(self):
+        with mock.patch("passgen.storage_pg.utils.current_timestamp", return_value="2024-01-01T00:00:00Z"):
+            storage_pg.store_passwords_postgres([{"hash": "00" * 32, "length": 8}], dsn=DSN)
+        rows = self.execute_values.call_args.args[2]
+        self.assertEqual(rows, [(None, "00" * 32, 8, {}, "2024-01-01T00:00:00Z")])
+        with self.assertRaisesRegex(ValueError, "Entry 1 has no 'length'"):
+            storage_pg.store_passwords_postgres([{"hash": "00" * 32}], dsn=DSN)
+
+
+class CopyTests(StubbedPostgresTestCase):
+    def test_missing_optional_fields_get_defaults(self):
+        entries = [{"hash": "00" * 32, "length": 12}]
+        with mock.patch("passgen.storage_pg.utils.current_timestamp", return_value="2024-01-01T00:00:00Z"):
+            count, _ = storage_pg.copy_entries_postgres(entries, dsn=DSN)
+        self.assertEqual(count, 1)
+        conn = self.pool_class.created[0].idle[0]
+        self.assertEqual(conn.copied, ["\\N\t" + "00" * 32 + "\t12\t{}\t2024-01-01T00:00:00Z\n"])
+
+    def test_entry_without_length_is_rejected_by_number(self):
+        entries = [{"hash": "00" * 32, "length": 8}, {"hash": "11" * 32, "length": None}]
+        with self.assertRaisesRegex(ValueError, "Entry 2 has no 'length'"):
+            storage_pg.copy_entries_postgres(entries, dsn=DSN, batch_size=1)
+        self.assertEqual(len(self.pool_class.created[0].idle[0].copied), 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from passgen import storage_sqlite, utils
+
+
+class SQLiteStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(storage_sqlite.close_connections)
+        self.path = Path(self.tmpdir.name) / "passwords.db"
+
+    def test_store_and_verify_password(self):
+        entry, path = storage_sqlite.store_password_sqlite(
+            "secret", label="Alpha", length=12, options={"digits": True}, path=self.path
+        )
+        self.assertEqual(path, self.path.resolve())
+        self.assertEqual(entry["hash"], utils.hash_password("secret"))
+
+        found, _ = storage_sqlite.verify_password_sqlite("secret", path=self.path)
+        self.assertEqual(found, [entry])
+        found, _ = storage_sqlite.verify_password_sqlite("secret", label_query="beta", path=self.path)
+        self.assertEqual(found, [])
+
+    def test_missing_length_and_timestamp_stay_empty(self):
+        entry = {"hash": utils.hash_password("bare"), "options": {}}
+        storage_sqlite.store_entries_sqlite([entry], path=self.path)
+        (found,) = storage_sqlite.iter_entries_sqlite(path=self.path)
+        self.assertEqual((found["length"], found["created_at"]), (None, None))
+
+    def test_database_uses_wal_and_indexes(self):
+        storage_sqlite.store_password_sqlite("secret", label="a", length=8, path=self.path)
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        plan = " ".join(
+            str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM passgen_passwords WHERE hash = ?", ("x",)
+            )
+        )
+        self.assertIn("passgen_passwords_hash", plan)
+
+    def test_search_pages_by_offset_and_after_id(self):
+        entries = (
+            utils.build_entry(f"secret-{index}", label=f"Item-{index}", length=8, options={})
+            for index in range(10)
+        )
+        saved, _ = storage_sqlite.store_entries_sqlite(entries, path=self.path, batch_size=3)
+        self.assertEqual(saved, 10)
+
+        page = list(storage_sqlite.iter_search_passwords_sqlite(label_query="item", path=self.path, limit=4))
+        self.assertEqual([entry["label"] for entry in page], [f"Item-{index}" for index in range(4)])
+        following = list(
+            storage_sqlite.iter_search_passwords_sqlite(path=self.path, limit=4, after_id=page[-1]["id"])
+        )
+        self.assertEqual([entry["label"] for entry in following], [f"Item-{index}" for index in range(4, 8)])
+        skipped = list(storage_sqlite.iter_search_passwords_sqlite(path=self.path, offset=8))
+        self.assertEqual(len(skipped), 2)
+        self.assertEqual(len(list(storage_sqlite.iter_entries_sqlite(path=self.path))), 10)
+
+    def test_label_search_uses_trigram_index(self):
+        entries = [
+            utils.build_entry(f"secret-{index}", label=label, length=8, options={})
+            for index, label in enumerate(["Mail-Work", "mail-home", 'say "hi"', "db", None])
+        ]
+        storage_sqlite.store_entries_sqlite(entries, path=self.path)
+
+        def labels(query):
+            return [entry["label"] for entry in storage_sqlite.iter_search_passwords_sqlite(label_query=query, path=self.path)]
+
+        self.assertEqual(labels("MAIL-"), ["Mail-Work", "mail-home"])
+        self.assertEqual(labels('"hi"'), ['say "hi"'])
+        self.assertEqual(labels("db"), ["db"])
+        self.assertEqual(labels("ail-w"), ["Mail-Work"])
+
+        conn = storage_sqlite._connect(self.path.resolve())
+        plan = " ".join(
+            str(row)
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM passgen_passwords WHERE id IN "
+                "(SELECT rowid FROM passgen_labels WHERE passgen_labels MATCH ?) AND instr(label_lower, ?) > 0",
+                ('"mail"', "mail"),
+            )
+        )
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+        # Deleted rows leave the index through the triggers.
+        storage_sqlite.compact_sqlite(path=self.path, retention=timedelta(days=1), now=datetime(2999, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(labels("mail"), [])
+
+    def test_existing_database_gets_the_label_index(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            "CREATE TABLE passgen_passwords (id INTEGER PRIMARY KEY, label TEXT, label_lower TEXT NOT NULL,"
+            " hash TEXT NOT NULL, length INTEGER NOT NULL, options TEXT NOT NULL, created_at TEXT);"
+            "INSERT INTO passgen_passwords VALUES (1, 'Legacy', 'legacy', 'ab', 8, '{}', NULL);"
+        )
+        conn.close()
+        found = list(storage_sqlite.iter_search_passwords_sqlite(label_query="gac", path=self.path))
+        self.assertEqual([entry["label"] for entry in found], ["Legacy"])
+
+    def test_close_connections_reaches_other_threads(self):
+        opened = []
+        worker = threading.Thread(target=lambda: opened.append(storage_sqlite._connect(self.path.resolve())))
+        worker.start()
+        worker.join()
+        storage_sqlite.close_connections(self.path)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+        # The calling thread transparently reconnects.
+        self.assertEqual(list(storage_sqlite.iter_entries_sqlite(path=self.path)), [])
+
+    def test_compact_deletes_in_batches(self):
+        entries = [
+            {"label": "a", "hash": utils.hash_password("old"), "length": 3, "options": {}, "created_at": "2020-01-01T00:00:00Z"},
+            {"label": "a", "hash": utils.hash_password("dup"), "length": 3, "options": {}, "created_at": "2024-06-01T00:00:00+00:00"},
+            {"label": "a", "hash": utils.hash_password("dup"), "length": 3, "options": {}, "created_at": "2024-06-02T00:00:00Z"},
+            {"label": None, "hash": utils.hash_password("dup"), "length": 3, "options": {}, "created_at": None},
+            {"label": None, "hash": utils.hash_password("dup"), "length": 3, "options": {}, "created_at": None},
+        ]
+        storage_sqlite.store_entries_sqlite(entries, path=self.path)
+
+        stats = storage_sqlite.compact_sqlite(
+            path=self.path,
+            retention=timedelta(days=30),
+            batch_size=1,
+            now=datetime(2024, 6, 10, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(stats, {"expired": 1, "duplicates": 2, "kept": 2})
+        remaining = list(storage_sqlite.iter_entries_sqlite(path=self.path))
+        self.assertEqual([entry["created_at"] for entry in remaining], ["2024-06-01T00:00:00+00:00", None])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
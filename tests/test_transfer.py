@@ -0,0 +1,110 @@
+import io
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from passgen import main, storage, transfer, utils
+
+
+class TransferTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.root = Path(self.tmpdir.name)
+        self.source = self.root / "source.json"
+        entries = (
+            utils.build_entry(f"secret-{index}", label=f"item-{index}", length=8, options={})
+            for index in range(7)
+        )
+        storage.store_entries(entries, storage_file=str(self.source))
+
+    def test_export_then_import_roundtrip(self):
+        exported = self.root / "dump.jsonl"
+        target = self.root / "target.json"
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.assertEqual(
+                main.main(["export", "--storage-file", str(self.source), "--output", str(exported)]),
+                0,
+            )
+            self.assertEqual(
+                main.main(
+                    [
+                        "import",
+                        "--input",
+                        str(exported),
+                        "--storage-file",
+                        str(target),
+                        "--batch-size",
+                        "3",
+                    ]
+                ),
+                0,
+            )
+
+        self.assertIn("Выгружено: 7 записей", stderr.getvalue())
+        self.assertIn("Загружено: 7 записей", stderr.getvalue())
+        self.assertEqual(
+            list(storage.iter_entries(str(target))),
+            list(storage.iter_entries(str(self.source))),
+        )
+
+    def test_import_directly_from_another_store(self):
+        target = self.root / "copy.json"
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            status = main.main(
+                ["import", "--from-storage-file", str(self.source), "--storage-file", str(target)]
+            )
+        self.assertEqual(status, 0)
+        found, _ = storage.verify_password("secret-4", storage_file=str(target))
+        self.assertEqual([entry["label"] for entry in found], ["item-4"])
+
+    def test_import_into_the_source_store_is_rejected(self):
+        link = self.root / "link.json"
+        link.symlink_to(self.source)
+        size = self.source.stat().st_size
+        for argv in (
+            ["import", "--input", str(self.source), "--storage-file", str(self.source)],
+            ["import", "--from-storage-file", str(link), "--storage-file", str(self.source)],
+        ):
+            with self.subTest(argv=argv), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                self.assertEqual(main.main(argv), 1)
+                self.assertIn("into itself", stderr.getvalue())
+        self.assertEqual(self.source.stat().st_size, size)
+
+    def test_missing_input_and_unwritable_output_are_reported(self):
+        missing = str(self.root / "missing.jsonl")
+        blocked = str(self.root / "source.json" / "dump.jsonl")
+        for argv in (
+            ["import", "--input", missing, "--storage-file", str(self.root / "target.json")],
+            ["export", "--storage-file", str(self.source), "--output", blocked],
+        ):
+            with self.subTest(argv=argv), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                self.assertEqual(main.main(argv), 1)
+                self.assertIn("Ошибка", stderr.getvalue())
+
+    def test_backend_errors_are_reported(self):
+        dump = self.root / "dump.jsonl"
+        dump.write_text('{"hash": "%s"}\n' % utils.hash_password("x"), encoding="utf-8")
+        (self.root / "store.db").mkdir()
+        argv = ["import", "--input", str(dump), "--storage-url", f"sqlite://{self.root / 'store.db'}"]
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.assertEqual(main.main(argv), 1)
+        self.assertIn("Ошибка", stderr.getvalue())
+
+    def test_read_jsonl_rejects_corrupted_lines(self):
+        broken = self.root / "broken.jsonl"
+        broken.write_text('{"label": "x", "hash": "00"}\nnot json\n', encoding="utf-8")
+        with self.assertRaises(ValueError):
+            list(transfer.read_jsonl(str(broken)))
+
+    def test_progress_counts_tracked_entries(self):
+        stream = io.StringIO()
+        progress = transfer.Progress("Тест", stream=stream)
+        self.assertEqual(len(list(progress.track(range(5)))), 5)
+        progress.finish()
+        self.assertIn("Тест: 5 записей", stream.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -52,5 +52,29 @@ class HashingAndLabelsTests(unittest.TestCase):
             self.assertEqual(utils.default_label(), "entry-2024-01-01T00:00:00Z")
 
 
+class EntryHelpersTests(unittest.TestCase):
+    def test_build_entry_hashes_password(self):
+        with mock.patch("passgen.utils.current_timestamp", return_value="2024-01-01T00:00:00Z"):
+            entry = utils.build_entry("abc", label="x", length=3, options={"digits": False})
+        self.assertEqual(
+            entry,
+            {
+                "label": "x",
+                "hash": utils.hash_password("abc"),
+                "length": 3,
+                "options": {"digits": False},
+                "created_at": "2024-01-01T00:00:00Z",
+            },
+        )
+
+    def test_chunked_splits_stream(self):
+        self.assertEqual(list(utils.chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(utils.chunked([], 3)), [])
+
+    def test_chunked_rejects_invalid_size(self):
+        with self.assertRaises(ValueError):
+            list(utils.chunked([1], 0))
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()